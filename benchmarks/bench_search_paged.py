@@ -0,0 +1,132 @@
+"""
+Compares the per-note SearchNotes stream with the paged SearchNotesPaged RPC.
+
+The gRPC server runs in-process on localhost with an in-memory note repo, 
+so only the gRPC framing, (de)serialization and scheduling costs are measured.
+CPU time is the process time of client and server together.
+
+Usage:
+    python -m benchmarks.bench_search_paged [--notes 5000] [--page-size 100] [--rounds 5]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+import logging
+import time
+from typing import AsyncIterator, List, Optional
+
+import grpc
+
+from src.api.types import Pagination
+from src.db.entities import NoteEntity
+from src.db.repos.note.note import SearchType, UserContext
+from src.db.repos.note.search_planner import SearchPlan
+from src.grpc_mod import GrpcNoteService, add_NoteServiceServicer_to_server, NoteServiceStub
+from src.grpc_mod.proto.note_pb2 import GetSearchNotesRequest
+
+
+class InMemoryNoteRepo:
+    """Serves search results from memory, so that the DB does not distort the measurement"""
+    def __init__(self, notes: List[NoteEntity]):
+        self.notes = notes
+
+    def plan_search(
+        self, search_type: SearchType, query: str, time_budget: Optional[float] = None
+    ) -> SearchPlan:
+        return SearchPlan(search_type, "requested")
+
+    async def stream_search_notes(
+        self, search_type: SearchType, query: str, ctx: UserContext, pagination: Pagination
+    ) -> AsyncIterator[NoteEntity]:
+        for note in self.notes[pagination.offset:pagination.offset + pagination.limit]:
+            yield note
+
+    async def search_notes(
+        self, search_type: SearchType, query: str, ctx: UserContext, pagination: Pagination
+    ) -> List[NoteEntity]:
+        return self.notes[pagination.offset:pagination.offset + pagination.limit]
+
+
+def create_notes(amount: int) -> List[NoteEntity]:
+    return [
+        NoteEntity(
+            note_id=i,
+            title=f"Note {i}",
+            content=f"Content of note {i}. " * 10,
+            author_id=1,
+            updated_at=datetime.now(),
+            embeddings=[],
+            permissions=[],
+        )
+        for i in range(amount)
+    ]
+
+
+async def fetch_streamed(stub: NoteServiceStub, amount: int) -> int:
+    received = 0
+    call = stub.SearchNotes(GetSearchNotesRequest(limit=amount, user_id=1))
+    async for _ in call:
+        received += 1
+    return received
+
+
+async def fetch_paged(stub: NoteServiceStub, page_size: int) -> int:
+    received = 0
+    cursor = b""
+    while True:
+        page = await stub.SearchNotesPaged(
+            GetSearchNotesRequest(limit=page_size, user_id=1, cursor=cursor)
+        )
+        received += len(page.notes)
+        if not page.next_cursor:
+            return received
+        cursor = page.next_cursor
+
+
+async def measure(name: str, rounds: int, amount: int, fetch) -> None:
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(rounds):
+        received = await fetch()
+        assert received == amount, f"{name}: expected {amount} notes, got {received}"
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    total = amount * rounds
+    print(
+        f"{name:<28} {total / wall:>12,.0f} notes/s   "
+        f"wall {wall * 1000:>9.1f} ms   cpu {cpu * 1000:>9.1f} ms   "
+        f"cpu/note {cpu / total * 1e6:>7.2f} us"
+    )
+
+
+async def main(amount: int, page_size: int, rounds: int) -> None:
+    def quiet_logger(name: str, _: object = None) -> logging.Logger:
+        return logging.getLogger(name)
+
+    server = grpc.aio.server()
+    add_NoteServiceServicer_to_server(
+        GrpcNoteService(repo=InMemoryNoteRepo(create_notes(amount)), log=quiet_logger),  # type: ignore[arg-type]
+        server,
+    )
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = NoteServiceStub(channel)
+            # warm up connection and code paths
+            await fetch_streamed(stub, amount)
+            await fetch_paged(stub, page_size)
+
+            print(f"{amount} notes, page size {page_size}, {rounds} rounds")
+            await measure("SearchNotes (stream)", rounds, amount, lambda: fetch_streamed(stub, amount))
+            await measure(f"SearchNotesPaged ({page_size})", rounds, amount, lambda: fetch_paged(stub, page_size))
+    finally:
+        await server.stop(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.notes, args.page_size, args.rounds))
@@ -0,0 +1,128 @@
+"""
+Measures the per call Python overhead of Table's single row operations:
+building the SQL and passing it on to the database.
+
+The database is replaced by one which returns immediately, so only the 
+work of Table is measured. `rebuild` builds the SQL on every call like 
+Table did before its statements were compiled per shape; `compiled` is 
+the current Table.
+
+Usage:
+    python -m benchmarks.bench_table_sql [--calls 200000]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from src.db import table as table_module
+from src.db.table import Table
+
+
+class NullDatabase:
+    """Returns immediately, so that only the Python overhead of Table is measured"""
+    async def fetch(self, sql: str, *args: Any) -> List[Any]:
+        return []
+
+    async def fetchrow(self, sql: str, *args: Any) -> None:
+        return None
+
+    async def fetch_readonly(self, sql: str, *args: Any) -> List[Any]:
+        return []
+
+
+def rebuild_where(columns, dollar_start: int = 1) -> str:
+    where = ""
+    for i, item in zip(range(dollar_start, dollar_start+len(columns)+1), columns):
+        where += f"{'AND ' if i > 0 else ''}{item}=${i} "
+    return where[4:]
+
+
+def rebuild_insert(table: str, columns, returning: str, on_conflict: str) -> str:
+    values_chain = [f'${num}' for num in range(1, len(columns)+1)]
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)})\n"
+        f"VALUES ({', '.join(values_chain)})\n"
+    )
+    if on_conflict:
+        sql += f"ON CONFLICT {on_conflict}\n"
+    if returning:
+        sql += f"RETURNING {returning}\n"
+    return sql
+
+
+def rebuild_update(table: str, set_columns, where: str, returning: str) -> str:
+    num_gen = (num for num in range(1, 100))
+    update_set_query = ", ".join([f'{col_name}=${i}' for i, col_name in zip(num_gen, set_columns)])
+    sql = (
+        f"UPDATE {table} \n"
+        f"SET {update_set_query} \n"
+        f"WHERE {where}\n"
+    )
+    if returning:
+        sql += f"RETURNING {returning} \n"
+    return sql
+
+
+def rebuild_select(table: str, where: str, select: str, order_by, limit_param=None) -> str:
+    sql = (
+        f"SELECT {select} FROM {table}\n"
+        f"WHERE {where}"
+    )
+    if order_by:
+        sql += f"\nORDER BY {order_by}"
+    if limit_param:
+        sql += f"\nLIMIT ${limit_param}"
+    return sql
+
+
+async def measure(name: str, call: Callable[[], Awaitable[Any]], calls: int) -> None:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await call()
+    wall = time.perf_counter() - start
+    print(f"{name:<28} {wall / calls * 1e6:>7.2f} µs/call")
+
+
+async def run(table: Table, calls: int) -> None:
+    row: Dict[str, Any] = {"id": 1, "title": "title", "content": "content", "author_id": 2}
+    await measure("select", lambda: table.select({"id": 1, "author_id": 2}, select="id, title"), calls)
+    await measure("insert", lambda: table.insert(row, returning="id"), calls)
+    await measure("update", lambda: table.update(set={"title": "t", "content": "c"}, where={"id": 1}), calls)
+    await measure("delete", lambda: table.delete({"id": 1}), calls)
+
+
+async def main(calls: int) -> None:
+    def quiet_logger(name: str, _: object = None) -> logging.Logger:
+        return logging.getLogger(name)
+
+    table = Table("note.content", logging_provider=quiet_logger, db=NullDatabase(), id_fields=["id"])  # type: ignore
+
+    compiled = {
+        name: getattr(table_module, name) 
+        for name in ("_where_sql", "_insert_sql", "_update_sql", "_select_sql", "_delete_sql")
+    }
+    print("rebuild")
+    table_module._where_sql = rebuild_where
+    table_module._insert_sql = rebuild_insert
+    table_module._update_sql = rebuild_update
+    table_module._select_sql = rebuild_select
+    table_module._delete_sql = lambda t, where, returning: (
+        f"DELETE FROM {t}\nWHERE {where}\nRETURNING {returning}\n"
+    )
+    try:
+        await run(table, calls)
+    finally:
+        for name, function in compiled.items():
+            setattr(table_module, name, function)
+
+    print("compiled")
+    await run(table, calls)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
@@ -1,4 +1,6 @@
 from abc import ABC, abstractclassmethod, abstractmethod, abstractstaticmethod
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
 from sentence_transformers import SentenceTransformer
@@ -22,6 +24,20 @@ class EmbeddingGeneratorABC(ABC):
     def generate(self, text: str) -> Tensor:
         pass
 
+    def generate_many(self, texts: List[str]) -> List[Tensor]:
+        """Generates the embeddings of several texts, in the order of the texts.
+        Models which encode batches faster than single texts override it."""
+        return [self.generate(text) for text in texts]
+
+    async def generate_async(self, text: str) -> Tensor:
+        """Like `generate`, but without blocking the event loop. Generators whose
+        encoding takes long run it in a worker thread."""
+        return self.generate(text)
+
+    async def generate_many_async(self, texts: List[str]) -> List[Tensor]:
+        """Like `generate_many`, but without blocking the event loop."""
+        return self.generate_many(texts)
+
     @staticmethod
     def tensor_to_str_vec(tensor: Tensor) -> str:
         """
@@ -77,20 +93,85 @@ class EmbeddingGeneratorABC(ABC):
         """Get the string name of the model."""
         ...
 
+    @property
+    def pending(self) -> int:
+        """Number of texts of the async generations, which are currently running 
+        or waiting for the worker."""
+        return 0
+
+    @property
+    def recent_latency(self) -> float:
+        """Smoothed duration of the recent embedding generations in seconds."""
+        return 0.0
+
 
 class EmbeddingGenerator(EmbeddingGeneratorABC):
-    """Generates embeddings for given text using specified model."""
+    """Generates embeddings for given text using specified model.
+    
+    The async methods encode in one worker thread, so the event loop keeps
+    serving other requests, while the encodes queue up behind each other.
+    """
+
+    # weight of the latest generation in the smoothed latency
+    LATENCY_SMOOTHING = 0.2
+
     def __init__(self, model_name: Models, logging_provider: LoggingProvider):
         self.model = SentenceTransformer(model_name.value)
         self.model_enum = model_name
         self.log = logging_provider(__name__, self)
+        self._pending = 0
+        self._recent_latency = 0.0
+        # one worker: the model uses all cores for a single encode anyway
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
 
     def generate(self, text: str) -> Tensor:
         start = datetime.now()
         embedding = self.model.encode(text)
-        self.log.debug(f"Embedding generation took: {datetime.now() - start}")
+        duration = datetime.now() - start
+        self._track_latency(duration.total_seconds())
+        self.log.debug(f"Embedding generation took: {duration}")
         return embedding
 
+    def generate_many(self, texts: List[str]) -> List[Tensor]:
+        if not texts:
+            return []
+        # one forward pass per batch of the model instead of one per text
+        start = datetime.now()
+        embeddings = self.model.encode(texts)
+        # not tracked in recent_latency: it estimates the encoding of a single search query
+        self.log.debug(f"Embedding generation of {len(texts)} texts took: {datetime.now() - start}")
+        return list(embeddings)
+
+    async def generate_async(self, text: str) -> Tensor:
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self.generate, text)
+        finally:
+            self._pending -= 1
+
+    async def generate_many_async(self, texts: List[str]) -> List[Tensor]:
+        if not texts:
+            return []
+        self._pending += len(texts)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self.generate_many, texts)
+        finally:
+            self._pending -= len(texts)
+
+    def _track_latency(self, seconds: float) -> None:
+        if self._recent_latency == 0.0:
+            self._recent_latency = seconds
+        else:
+            self._recent_latency += self.LATENCY_SMOOTHING * (seconds - self._recent_latency)
+
     @property
     def model_name(self) -> str:
-        return self.model_enum.value
\ No newline at end of file
+        return self.model_enum.value
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def recent_latency(self) -> float:
+        return self._recent_latency
\ No newline at end of file
@@ -1,4 +1,8 @@
 from .database import Database
+from .pool import PoolConfig, PoolStats, Workload
+from .replica import Balancing, read_your_writes
+from .predicate import Predicate, Eq, In, Range, IsNull, After, And
+from .columnar import ResultFormat
 from .table import Table, TableABC
 from .repos import *
 from .entities import *
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Conversion of fetched records into columns.
+
+NumPy is a hard dependency of the project (embeddings); pandas and pyarrow
+are only imported when a DataFrame or an Arrow record batch is requested.
+"""
+from datetime import datetime, timezone
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Collection, Dict, List, Sequence
+
+import numpy as np
+from asyncpg import Record
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+
+type Columns = Dict[str, np.ndarray]
+
+
+class ResultFormat(Enum):
+    """How `Table` returns fetched rows"""
+    # list of asyncpg Records
+    RECORDS = "records"
+    # pandas DataFrame, built row by row
+    DATAFRAME = "dataframe"
+    # dict of column name -> NumPy array; vector columns are 2D float32 arrays
+    NUMPY = "numpy"
+    # pyarrow RecordBatch; vector columns are fixed size lists of float32
+    ARROW = "arrow"
+
+
+def _column_dtype(values: Sequence[Any]) -> Any:
+    """NumPy dtype for the values of a column; object when it has NULLs or mixed types"""
+    if not values:
+        return object
+    first = type(values[0])
+    if any(value is None or type(value) is not first for value in values):
+        return object
+    if first is bool:
+        return np.bool_
+    if first is int:
+        return np.int64
+    if first is float:
+        return np.float64
+    if first is datetime:
+        return "datetime64[us]"
+    return object
+
+
+def parse_vectors(values: Sequence[str | None], chunk_size: int = 1024) -> np.ndarray:
+    """Decodes pgvector text values ('[1,2,3]') into one 2D float32 array.
+
+    The vectors are parsed in chunks with one call per chunk, instead of 
+    creating a list of Python floats per vector. NULLs become rows of NaN.
+
+    Raises:
+        ValueError: If the vectors do not all have the same dimension, or a 
+            value is not a vector.
+    """
+    present = [i for i, value in enumerate(values) if value is not None]
+    if not present:
+        return np.empty((len(values), 0), dtype=np.float32)
+    dimension = values[present[0]].count(",") + 1  # type: ignore[union-attr]
+    matrix = np.full((len(values), dimension), np.nan, dtype=np.float32)
+    for start in range(0, len(present), chunk_size):
+        rows = present[start:start + chunk_size]
+        for i in rows:
+            value: str = values[i]  # type: ignore[assignment]
+            if not (value.startswith("[") and value.endswith("]")):
+                raise ValueError(f"Not a vector: {value[:32]!r}")
+            if value.count(",") + 1 != dimension:
+                raise ValueError("Vectors of different dimensions can not be stored in one 2D array")
+        # NumPy parses the strings in C; malformed numbers raise a ValueError
+        flat = np.array(",".join(values[i][1:-1] for i in rows).split(","), dtype=np.float32)  # type: ignore[index]
+        matrix[rows] = flat.reshape(len(rows), dimension)
+    return matrix
+
+
+def to_numpy(records: Sequence[Record], vector_columns: Collection[str] = ()) -> Columns:
+    """One NumPy array per column, without building an object per row.
+
+    Args:
+        records: The fetched records. All have the same columns.
+        vector_columns: Columns with pgvector values, decoded into 2D float32 arrays.
+    """
+    if not records:
+        return {}
+    columns: Columns = {}
+    for i, name in enumerate(records[0].keys()):
+        values = [record[i] for record in records]
+        if name in vector_columns:
+            columns[name] = parse_vectors(values)
+        else:
+            dtype = _column_dtype(values)
+            if dtype == "datetime64[us]" and values[0].tzinfo is not None:
+                # timestamptz -> UTC, since datetime64 has no time zone
+                values = [value.astimezone(timezone.utc).replace(tzinfo=None) for value in values]
+            columns[name] = np.array(values, dtype=dtype)
+    return columns
+
+
+def to_arrow(records: Sequence[Record], vector_columns: Collection[str] = ()) -> "pa.RecordBatch":
+    """One Arrow record batch; vector columns become fixed size lists of float32."""
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("ResultFormat.ARROW needs pyarrow: pip install pyarrow") from e
+
+    arrays: List[pa.Array] = []
+    names: List[str] = []
+    for name, column in to_numpy(records, vector_columns).items():
+        if name in vector_columns:
+            dimension = column.shape[1]
+            arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(column.reshape(-1)), dimension))
+        else:
+            arrays.append(pa.array(column, from_pandas=True))
+        names.append(name)
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def to_dataframe(records: Sequence[Record] | Dict[str, Any]) -> "pd.DataFrame":
+    """DataFrame with one row per record, like `Table` always returned them"""
+    import pandas as pd
+
+    if isinstance(records, list):
+        columns = list(records[0].keys()) if records else []
+    elif isinstance(records, dict):
+        columns = list(records.keys())
+    else:
+        raise TypeError(f"{type(records)} is not supported. Only list and dict can be converted to dataframe.")
+    return pd.DataFrame(data=records, columns=columns)  # type: ignore
@@ -1,10 +1,16 @@
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import copy
 import functools
-from typing import Awaitable, Callable, Coroutine, Dict, Optional, List, Any
+from typing import AsyncContextManager, AsyncIterator, Awaitable, Callable, Coroutine, Dict, Optional, List, Any, Sequence
 import asyncpg
 from asyncpg import Pool, Connection, Record
 
 from src.api.types import LoggingProvider
+from src.db.migrations import migrate
+from src.db.pool import ConnectionPool, PoolConfig, PoolStats, Workload
+from src.db.replica import Balancing, ReplicaSet, current_consistency_key
 from src.utils.singleton import SingletonMeta
 
 
@@ -26,7 +32,9 @@ def strip_args(*args: Any) -> List[Any]:
 def acquire(func: Callable[..., Any]) -> Callable[..., Any]:
     """
     Wrapper for a coroutine which injects
-    an aquired connection as first parameter
+    an aquired connection as first parameter.
+    Inside of a unit of work (see `Database.transaction`)
+    its connection is injected instead
     """
    
 
@@ -36,6 +44,11 @@ def acquire(func: Callable[..., Any]) -> Callable[..., Any]:
             coro_args = (self, *coro_args)
             self = Database.get_instance()
 
+        # reuse the connection of an open unit of work
+        bound = self.bound_connection
+        if bound is not None:
+            return await func(self, *coro_args, _cxn=bound, **coro_kwargs)
+
         # aquire pool from DatabaseConnection
         pool = self.pool
 
@@ -45,12 +58,47 @@ def acquire(func: Callable[..., Any]) -> Callable[..., Any]:
                 # started transaction
                 # -> call coroutine inside the transaction
                 # and pass the connection as first arg
-                return await func(
+                result = await func(
                     self,
                     *coro_args,
                     _cxn=connection,
                     **coro_kwargs
                 )
+                wrote = await self._wrote(connection)
+            if wrote:
+                await self._record_write(connection)
+            return result
+    return wrapper
+
+def acquire_autocommit(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrapper for a coroutine which injects
+    an aquired connection as first parameter,
+    without starting an explicit transaction.
+
+    The statement runs in the implicit transaction of the server, 
+    which saves the BEGIN and COMMIT round trips. Use it only for 
+    single statement reads. With replicas, the connection is one of 
+    a replica (see `Database._acquire_read`).
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self: "Database", *coro_args, **coro_kwargs) -> Any:
+        if isinstance(self, str):
+            coro_args = (self, *coro_args)
+            self = Database.get_instance()
+
+        bound = self.bound_connection
+        if bound is not None:
+            return await func(self, *coro_args, _cxn=bound, **coro_kwargs)
+
+        async with self._acquire_read() as connection:
+            return await func(
+                self,
+                *coro_args,
+                _cxn=connection,
+                **coro_kwargs
+            )
     return wrapper
 
 def copy_docs(copy_from_func: Callable):
@@ -67,7 +115,7 @@ class DatabaseABC(ABC):
     """Abstract Base Class for Database connections."""
     @abstractmethod
     async def init_db(self):
-        """Initializes the database connection pool."""
+        """Initializes the database connection pool and migrates the schema."""
         ...
 
     async def close(self):
@@ -76,10 +124,59 @@ class DatabaseABC(ABC):
         
     @property
     @abstractmethod
-    def pool(self) -> asyncpg.Pool:
+    def pool(self) -> ConnectionPool:
         """Returns the database connection pool."""
         ...
+
+    @abstractmethod
+    def pool_stats(self) -> Dict[str, PoolStats]:
+        """Returns acquire wait times, in use and idle connections and timeouts per pool."""
+        ...
+
+    @abstractmethod
+    def with_workload(self, workload: str) -> "DatabaseABC":
+        """Returns this database, with all queries going to the pool of `workload`."""
+        ...
+
+    @abstractmethod
+    def primary(self) -> "DatabaseABC":
+        """Returns this database, with the readonly methods reading from the primary instead of the replicas."""
+        ...
+
+    @property
+    @abstractmethod
+    def has_pending_writes(self) -> bool:
+        """Whether the replicas may miss writes of the `read_your_writes` key of the current task."""
+        ...
+
+    @abstractmethod
+    async def record_write(self) -> None:
+        """Makes the `read_your_writes` key of the current task wait for the current state of the primary."""
+        ...
     
+    @abstractmethod
+    def transaction(
+        self, readonly: bool = False, isolation: Optional[str] = None
+    ) -> AsyncContextManager[Connection]:
+        """Opens a unit of work: one connection and one transaction for all queries inside."""
+        ...
+
+    @property
+    @abstractmethod
+    def in_transaction(self) -> bool:
+        """Whether the current task runs inside of a unit of work."""
+        ...
+
+    @abstractmethod
+    async def listen(
+        self, 
+        channel: str, 
+        callback: Callable[[str], None], 
+        on_terminate: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Calls `callback` with the payload of every NOTIFY on `channel`."""
+        ...
+
     @abstractmethod
     async def execute(self, query: str, *args: Any) -> str:
         """Executes an SQL command (or commands)."""
@@ -94,47 +191,349 @@ class DatabaseABC(ABC):
     async def fetchrow(self, query: str, *args: Any) -> Optional[Dict]:
         """Fetches a single record from the database."""
         ...
+
+    @abstractmethod
+    async def fetch_readonly(self, query: str, *args: Any) -> List[Dict]:
+        """Fetches multiple records with a single read only statement."""
+        ...
+
+    @abstractmethod
+    async def fetchrow_readonly(self, query: str, *args: Any) -> Optional[Dict]:
+        """Fetches a single record with a single read only statement."""
+        ...
+
+    @abstractmethod
+    async def copy_records_to_table(
+        self, table_name: str, records: List[tuple], columns: List[str], schema_name: Optional[str] = None
+    ) -> str:
+        """Bulk loads records into a table with COPY."""
+        ...
+
+    @abstractmethod
+    def iterate(self, query: str, *args: Any, prefetch: int = 50) -> AsyncIterator[Record]:
+        """Streams the records of a selection through a server side cursor."""
+        ...
+
+    @abstractmethod
+    def cursor(self, query: str, *args: Any, batch_size: int = 1000) -> AsyncIterator[List[Record]]:
+        """Streams the records of a selection in batches through a server side cursor."""
+        ...
     
 class Database(DatabaseABC):
     _instance: Optional["Database"] = None
-    def __init__(self, dsn: str, log: LoggingProvider, init_file: str = "src/init.sql"):
-        self._pool: Optional[Pool] = None
+
+    # session settings of every pooled connection
+    SERVER_SETTINGS: Dict[str, str] = {
+        # keep scanning the HNSW index until enough rows pass author filters
+        "hnsw.iterative_scan": "strict_order",
+    }
+    def __init__(
+        self, 
+        dsn: str, 
+        log: LoggingProvider, 
+        migrations_dir: Optional[str] = "src/migrations", 
+        pool_config: Optional[PoolConfig] = None,
+        pools: Optional[Dict[str, PoolConfig]] = None,
+        replica_dsns: Sequence[str] = (),
+        balancing: Balancing = Balancing.ROUND_ROBIN,
+    ):
+        """
+        Args:
+        -----
+        migrations_dir: `Optional[str]`
+            the schema migrations, which `init_db` applies (see `src.db.migrations`).
+            None skips them, e.g. when a separate deploy step migrates
+        pool_config: `Optional[PoolConfig]`
+            the config of the default pool (`Workload.OLTP`)
+        pools: `Optional[Dict[str, PoolConfig]]`
+            additional pools per workload (see `with_workload`), e.g. 
+            `{Workload.SEARCH: PoolConfig(max_size=4, statement_timeout="5s")}`
+        replica_dsns: `Sequence[str]`
+            read only standbys of `dsn`. The readonly methods (`fetch_readonly`, 
+            `fetchrow_readonly`, `iterate`, `cursor`) read from them, 
+            everything else runs on the primary. Each replica gets the same pools
+        balancing: `Balancing`
+            how the reads are spread over the replicas
+        """
+        self._pool_configs: Dict[str, PoolConfig] = {Workload.OLTP: pool_config or PoolConfig(), **(pools or {})}
+        # filled by init_db; shared with the views of `with_workload`
+        self._pools: Dict[str, ConnectionPool] = {}
+        self._workload: str = Workload.OLTP
+        # shared with the views of `with_workload` and `primary`
+        self._replicas = ReplicaSet(replica_dsns, balancing)
+        self._use_replicas = True
         self._dsn: str = dsn
         self._instance = self
         self._log = log(__name__, self)
-        self._init_file_path = init_file
+        self._migrations_dir = migrations_dir
+        # connection of the unit of work of the current task
+        self._bound_connection: ContextVar[Optional[Connection]] = ContextVar(
+            f"bound_connection_{id(self)}", default=None
+        )
+        # dedicated connections of `listen`, with their termination listener
+        self._listeners: List[tuple[Connection, Callable[[Connection], None]]] = []
+        # names of the cursors of `cursor`, which are currently open. Freed names are
+        # reused, so that the DECLARE statements do not flood the statement caches
+        self._cursor_names: set[str] = set()
     
     async def init_db(self):
-        self._pool = await asyncpg.create_pool(dsn=self._dsn)
-        self._log.info("Database connected")
+        for workload, config in self._pool_configs.items():
+            self._pools[workload] = await ConnectionPool.create(self._dsn, config, self.SERVER_SETTINGS)
+            self._log.info(f"Database connected ({workload} pool size {config.min_size}-{config.max_size})")
         
-        content = ""
-        with open(self._init_file_path) as f:
-            content = f.read()
-        await self._pool.execute(content)
-        self._log.info("Database initialized with init.sql")
+        if self._migrations_dir is not None:
+            # not pooled, so that the statement timeouts of the pools do not cancel index builds
+            connection = await asyncpg.connect(self._dsn)
+            try:
+                applied = await migrate(connection, self._migrations_dir)
+            finally:
+                await connection.close()
+            self._log.info(f"Database schema up to date ({len(applied)} migrations applied)")
+        await self._replicas.open(self._pool_configs, self.SERVER_SETTINGS)
+        if self._replicas:
+            self._log.info(f"Connected to {len(self._replicas.replicas)} replicas ({self._replicas.balancing})")
 
     async def close(self):
-        if self._pool:
-            await self._pool.close()
+        for connection, on_terminate in self._listeners:
+            connection.remove_termination_listener(on_terminate)
+            await connection.close()
+        self._listeners.clear()
+        for pool in self._pools.values():
+            await pool.close()
+        self._pools.clear()
+        await self._replicas.close()
+
+    async def listen(
+        self, 
+        channel: str, 
+        callback: Callable[[str], None], 
+        on_terminate: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """calls `callback` with the payload of every NOTIFY on `channel`.
+
+        Every channel gets a dedicated connection outside of the pool, 
+        since a pooled connection would stop listening when it is released.
+        Notifications only arrive while that connection is alive.
+
+        Args:
+        -----
+        channel: `str`
+            the channel to LISTEN on
+        callback: `Callable[[str], None]`
+            called with the payload of each notification
+        on_terminate: `Optional[Callable[[], None]]`
+            called when the listener connection is lost unexpectedly, 
+            i.e. notifications may have been missed
+        """
+        connection: Connection = await asyncpg.connect(dsn=self._dsn)
+
+        def notify(_connection: Connection, _pid: int, _channel: str, payload: str) -> None:
+            callback(payload)
+
+        def terminate(_connection: Connection) -> None:
+            self._log.warning(f"Listener connection of channel {channel} terminated")
+            if on_terminate is not None:
+                on_terminate()
+
+        connection.add_termination_listener(terminate)
+        await connection.add_listener(channel, notify)
+        self._listeners.append((connection, terminate))
+        self._log.info(f"Listening on channel {channel}")
 
     @property
-    def pool(self) -> asyncpg.Pool:
-        """returns the DB connection pool
+    def pool(self) -> ConnectionPool:
+        """returns the connection pool of the workload of this database.
+        Workloads without an own pool use the `Workload.OLTP` pool
 
         Raises
         -------
         AssertionError:
             when the DB was not initialized with init_db()
         """
-        assert self._pool
-        return self._pool
+        assert self._pools
+        return self._pools.get(self._workload) or self._pools[Workload.OLTP]
+
+    @property
+    def workload(self) -> str:
+        return self._workload
+
+    def with_workload(self, workload: str) -> "Database":
+        """returns this database, but all queries go to the pool of `workload`.
+
+        The returned database shares pools, units of work and listeners with
+        this one, so it is cheap to create. Repos and search strategies use it
+        to declare their workload, so that e.g. a burst of slow searches can not
+        take all connections of the point lookups.
+
+        Example:
+        ```py
+        search_db = db.with_workload(Workload.SEARCH)
+        async for record in search_db.iterate(query):  # uses the search pool
+            ...
+        ```
+        """
+        if workload == self._workload:
+            return self
+        view = copy.copy(self)
+        view._workload = workload
+        return view
+
+    def primary(self) -> "Database":
+        """a view of this database which also reads from the primary.
+
+        Use it for reads which must not lag behind, e.g. the loads of caches 
+        which are invalidated by NOTIFYs of the primary.
+        """
+        if not self._use_replicas:
+            return self
+        view = copy.copy(self)
+        view._use_replicas = False
+        return view
+
+    @property
+    def has_pending_writes(self) -> bool:
+        """whether the `read_your_writes` key of the current task wrote something 
+        which the replicas may not have replayed yet. Such reads must neither be 
+        batched with reads of other tasks nor be cached"""
+        return bool(self._replicas) and self._replicas.pending_lsn(current_consistency_key()) is not None
+
+    @asynccontextmanager
+    async def _acquire_read(self) -> AsyncIterator[Connection]:
+        """a connection for a read: of a replica, or of the primary when the replica 
+        has not replayed the last write of the `read_your_writes` key yet"""
+        if not self._use_replicas or not self._replicas:
+            async with self.pool.acquire() as connection:
+                yield connection
+            return
+
+        replica = self._replicas.choose()
+        lsn = self._replicas.pending_lsn(current_consistency_key())
+        use_primary = False
+        async with replica.acquire(self._workload) as connection:
+            if lsn is None or await self._replicas.serves(replica, connection, lsn):
+                yield connection
+            else:
+                use_primary = True
+        if use_primary:
+            async with self.pool.acquire() as connection:
+                yield connection
+
+    async def record_write(self) -> None:
+        """remembers the current LSN of the primary for the `read_your_writes` key 
+        of the current task. For writes which were committed in another context, 
+        e.g. in a group commit of several tasks"""
+        if current_consistency_key() is not None and self._replicas:
+            async with self.pool.acquire() as connection:
+                await self._record_write(connection)
+
+    async def _wrote(self, connection: Connection) -> bool:
+        """whether the open transaction of `connection` wrote something, which the 
+        `read_your_writes` key has to see. Reads do not get a transaction ID"""
+        if current_consistency_key() is None or not self._replicas:
+            return False
+        return await connection.fetchval("SELECT pg_current_xact_id_if_assigned() IS NOT NULL")
+
+    async def _record_write(self, connection: Connection) -> None:
+        """remembers the LSN of a committed write for the `read_your_writes` key"""
+        key = current_consistency_key()
+        if key is not None and self._replicas:
+            await self._replicas.record_write(connection, key)
+
+    def pool_stats(self) -> Dict[str, PoolStats]:
+        return {
+            **{workload: pool.stats() for workload, pool in self._pools.items()},
+            **self._replicas.stats(),
+        }
+
+    async def check_connection_budget(self, processes: int = 1) -> bool:
+        """whether `processes` server processes with this pool size fit into 
+        the `max_connections` of the server. Logs a warning if not.
+
+        Connections reserved for superusers, and the dedicated connections of 
+        `listen`, are taken into account.
+        """
+        # replicas have their own max_connections
+        record = await self.primary().fetchrow_readonly(
+            "SELECT current_setting('max_connections')::int AS max_connections, "
+            "current_setting('superuser_reserved_connections')::int AS reserved"
+        )
+        available = record["max_connections"] - record["reserved"]
+        per_process = sum(config.max_size for config in self._pool_configs.values()) + len(self._listeners)
+        needed = processes * per_process
+        if needed > available:
+            self._log.warning(
+                f"{processes} processes with up to {per_process} connections each need {needed} "
+                f"connections, but the server only allows {available}"
+            )
+            return False
+        return True
 
     @classmethod
     def get_instance(cls) -> "Database":
         assert cls._instance
         return cls._instance
 
+    @property
+    def bound_connection(self) -> Optional[Connection]:
+        """the connection of the unit of work of the current task, if any"""
+        return self._bound_connection.get()
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.bound_connection is not None
+
+    @asynccontextmanager
+    async def transaction(
+        self, readonly: bool = False, isolation: Optional[str] = None
+    ) -> AsyncIterator[Connection]:
+        """opens a unit of work.
+
+        All queries of this Database inside of the block - also the ones 
+        from repos and tables - run on the same connection in the same 
+        transaction. Hence they take only one pool checkout and are 
+        committed or rolled back together. Nested blocks create a savepoint.
+
+        The connection is bound to the current task (and tasks created inside 
+        of the block). It can not run queries concurrently, so do not 
+        `gather` queries inside of a unit of work.
+
+        Example:
+        ```
+        >>> async with db.transaction():
+        ...     await db.execute("INSERT INTO mytab (a) VALUES (1)")
+        ...     await table.insert({"a": 2})
+        ```
+
+        Args:
+        -----
+        readonly: `bool`
+            whether the transaction is read only
+        isolation: `Optional[str]`
+            the isolation level, e.g. `"repeatable_read"`. Defaults to the 
+            server default. Ignored for nested blocks
+
+        Yields:
+        -------
+        Connection:
+            the connection of the unit of work
+        """
+        bound = self.bound_connection
+        if bound is not None:
+            async with bound.transaction():
+                yield bound
+            return
+
+        async with self.pool.acquire() as connection:
+            async with connection.transaction(readonly=readonly, isolation=isolation):
+                token = self._bound_connection.set(connection)
+                try:
+                    yield connection
+                finally:
+                    self._bound_connection.reset(token)
+                wrote = not readonly and await self._wrote(connection)
+            if wrote:
+                await self._record_write(connection)
+
     @acquire
     async def execute(self, query: str, *args: Any, _cxn: Connection) -> str:
         """
@@ -186,4 +585,154 @@ class Database(DatabaseABC):
             the record from the selection/return or None
         """
         self._log.debug(f"{query} ;; {strip_args(*args)}")
-        return await _cxn.fetchrow(query, *args)
\ No newline at end of file
+        return await _cxn.fetchrow(query, *args)
+
+    @acquire_autocommit
+    async def fetch_readonly(self, query: str, *args: Any, _cxn: Connection) -> List[Record]:
+        """use when making selections with a single statement.
+
+        Unlike `fetch`, no explicit transaction is opened, so the query 
+        costs one round trip instead of three. The statement still sees
+        one consistent snapshot, but multiple calls do not share one.
+
+        Returns:
+        --------
+        List[Record]:
+            the records from the selection
+        """
+        self._log.debug(f"{query} ;; {strip_args(*args)}")
+        return await _cxn.fetch(query, *args)
+
+    @acquire_autocommit
+    async def fetchrow_readonly(self, query: str, *args: Any, _cxn: Connection) -> Optional[Record]:
+        """use when making selections with a single statement that return a single row.
+
+        See `fetch_readonly`.
+
+        Returns:
+        --------
+        Optional[Record]:
+            the record from the selection or None
+        """
+        self._log.debug(f"{query} ;; {strip_args(*args)}")
+        return await _cxn.fetchrow(query, *args)
+
+    @acquire
+    async def copy_records_to_table(
+        self, 
+        table_name: str, 
+        records: List[tuple], 
+        columns: List[str], 
+        schema_name: Optional[str] = None,
+        *, 
+        _cxn: Connection,
+    ) -> str:
+        """use when bulk loading rows without conflicts.
+
+        COPY uses the binary format, so every column type needs a binary 
+        codec in asyncpg - which extension types like `vector` do not have.
+
+        Args:
+        -----
+        records: `List[tuple]`
+            the rows, with values in the order of `columns`
+
+        Returns:
+        --------
+        str:
+            the status, e.g. `COPY 100`
+        """
+        self._log.debug(f"COPY {schema_name or 'public'}.{table_name} ({', '.join(columns)}) ;; {len(records)} records")
+        return await _cxn.copy_records_to_table(
+            table_name, records=records, columns=columns, schema_name=schema_name
+        )
+
+    @asynccontextmanager
+    async def _readonly_connection(self) -> AsyncIterator[Connection]:
+        """the connection of the unit of work, or a pool connection in a read only transaction.
+        Server side cursors only live inside of a transaction"""
+        bound = self.bound_connection
+        if bound is not None:
+            yield bound
+            return
+        async with self._acquire_read() as connection:
+            async with connection.transaction(readonly=True):
+                yield connection
+
+    async def iterate(self, query: str, *args: Any, prefetch: int = 50) -> AsyncIterator[Record]:
+        """use when streaming selections.
+
+        Records are fetched lazily through a server side cursor, which
+        only lives inside a transaction. Hence the connection and a 
+        read only transaction are held until the generator is exhausted 
+        or closed.
+        Closing the generator early (or cancelling the consuming task)
+        rolls back the transaction, which also stops the scan on the server.
+
+        Args:
+        -----
+        prefetch: `int`
+            the number of rows the cursor fetches per round trip
+
+        Yields:
+        -------
+        Record:
+            the records of the selection, one by one
+        """
+        self._log.debug(f"{query} ;; {strip_args(*args)}")
+        async with self._readonly_connection() as connection:
+            async for record in connection.cursor(query, *args, prefetch=prefetch):
+                yield record
+
+    async def cursor(self, query: str, *args: Any, batch_size: int = 1000) -> AsyncIterator[List[Record]]:
+        """use when processing large selections in batches, e.g. for exports or backfills.
+
+        At most `batch_size` records are held in memory at a time. Like `iterate`,
+        the connection and a read only transaction are held until the generator is
+        exhausted or closed. Use `contextlib.aclosing` to close the cursor right away 
+        when breaking out early; otherwise it is closed once the generator is 
+        garbage collected. Inside of a unit of work the cursor is closed without 
+        ending the transaction.
+
+        Args:
+        -----
+        batch_size: `int`
+            the number of rows per batch and round trip
+
+        Yields:
+        -------
+        List[Record]:
+            the records of the selection, at most `batch_size` per batch
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        self._log.debug(f"{query} ;; {strip_args(*args)}")
+        in_unit_of_work = self.in_transaction
+        name = self._reserve_cursor_name()
+        try:
+            async with self._readonly_connection() as connection:
+                await connection.execute(f"DECLARE {name} NO SCROLL CURSOR FOR {query}", *args)
+                try:
+                    exhausted = False
+                    while not exhausted:
+                        batch = await connection.fetch(f"FETCH {batch_size} FROM {name}")
+                        exhausted = len(batch) < batch_size
+                        if batch:
+                            yield batch
+                finally:
+                    if in_unit_of_work and not connection.is_closed():
+                        # the transaction goes on, hence the cursor is closed explicitly
+                        try:
+                            await connection.execute(f"CLOSE {name}")
+                        except asyncpg.InFailedSQLTransactionError:
+                            pass  # the aborted transaction closes it on rollback
+        finally:
+            self._cursor_names.discard(name)
+
+    def _reserve_cursor_name(self) -> str:
+        number = 0
+        while f"wersu_cursor_{number}" in self._cursor_names:
+            number += 1
+        name = f"wersu_cursor_{number}"
+        self._cursor_names.add(name)
+        return name
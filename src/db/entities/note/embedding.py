@@ -12,6 +12,8 @@ class NoteEmbeddingEntity:
     note_id: int
     model: UndefinedOr[str]
     embedding: UndefinedOr[Sequence[float]]
+    # author of the note; the partition key of note.embedding
+    author_id: UndefinedOr[int] = UNDEFINED
 
     def __post_init__(self):
         if isinstance(self.embedding, str):
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
 
-from src.api.undefined import UndefinedOr
+from src.api.undefined import UNDEFINED, UndefinedOr
 
 @dataclass
 class NotePermissionEntity:
     """Represents one record of note.permission"""
     note_id: UndefinedOr[int]
     role_id: UndefinedOr[int]
+    # only stored when note.content is partitioned (see src/db/partitioning.py)
+    author_id: UndefinedOr[int] = UNDEFINED
@@ -0,0 +1,173 @@
+"""Versioned schema migrations.
+
+The migrations are the files `NNNN_name.sql` of a directory (see `src/migrations`),
+applied in the order of their number. Every applied version is recorded in
+`schema_migrations`, so each file runs once per database, and a start against
+an up to date database only reads that table.
+
+A migration runs in one transaction together with its record, unless its
+first line is `-- migrate: no-transaction`. Such migrations are meant for
+`CREATE INDEX CONCURRENTLY`, which does not block writes but can not run inside
+of a transaction. Their statements are sent one by one, split at lines ending
+with `;`, hence they can not contain function bodies. When a statement fails,
+the migration is not recorded and runs again on the next start. A failed
+`CREATE INDEX CONCURRENTLY` leaves an invalid index behind, which has to be
+dropped before that.
+
+Applied migrations must not be edited - add a new one instead.
+"""
+import asyncio
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, List
+
+from asyncpg import Connection
+
+log = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+# held by the process which migrates; the others wait for it
+_LOCK_QUERY = f"SELECT pg_try_advisory_lock(hashtext('{MIGRATIONS_TABLE}'))"
+_LOCK_POLL_INTERVAL = 0.1
+_UNLOCK_QUERY = f"SELECT pg_advisory_unlock(hashtext('{MIGRATIONS_TABLE}'))"
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode()).hexdigest()
+
+    def statements(self) -> List[str]:
+        """the statements of the file, split at lines which end with `;`"""
+        statements: List[str] = []
+        lines: List[str] = []
+        for line in self.sql.splitlines():
+            lines.append(line)
+            if line.rstrip().endswith(";"):
+                statements.append("\n".join(lines))
+                lines = []
+        statements.append("\n".join(lines))
+        # drop the parts which are only comments
+        return [
+            statement for statement in statements
+            if any(line.strip() and not line.strip().startswith("--") for line in statement.splitlines())
+        ]
+
+
+def load_migrations(directory: str) -> List[Migration]:
+    """reads the migrations of `directory`, ordered by version
+
+    Raises:
+    -------
+    ValueError:
+        when a `.sql` file is not named `NNNN_name.sql`, or two files have the same version
+    """
+    migrations: Dict[int, Migration] = {}
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(".sql"):
+            continue
+        match = _FILE_PATTERN.match(file_name)
+        if match is None:
+            raise ValueError(f"migration {file_name} is not named like 0001_name.sql")
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"migrations {migrations[version].name} and {match.group(2)} have both version {version}")
+        with open(os.path.join(directory, file_name)) as f:
+            migrations[version] = Migration(version, match.group(2), f.read())
+    return [migrations[version] for version in sorted(migrations)]
+
+
+async def applied_migrations(connection: Connection) -> Dict[int, str]:
+    """the checksums of the applied migrations by version; empty when no migration ran yet"""
+    if await connection.fetchval(f"SELECT to_regclass('{MIGRATIONS_TABLE}') IS NULL"):
+        return {}
+    records = await connection.fetch(f"SELECT version, checksum FROM {MIGRATIONS_TABLE}")
+    return {record["version"]: record["checksum"] for record in records}
+
+
+async def migrate(connection: Connection, directory: str) -> List[Migration]:
+    """applies the migrations of `directory` which did not run on the database yet.
+
+    Concurrent calls, e.g. of several server processes, are serialized
+    with an advisory lock, and the later ones skip what the first applied.
+
+    Args:
+    -----
+    connection: `Connection`
+        a connection to the primary, outside of a transaction
+    directory: `str`
+        the directory with the `NNNN_name.sql` files
+
+    Returns:
+    --------
+    `List[Migration]`:
+        the migrations which were applied by this call
+    """
+    migrations = load_migrations(directory)
+    applied = await applied_migrations(connection)
+    if all(migration.version in applied for migration in migrations):
+        _warn_on_changes(migrations, applied)
+        return []
+
+    # polled: a process blocked in pg_advisory_lock would be a running transaction, 
+    # which the CREATE INDEX CONCURRENTLY of the migrating process waits for
+    while not await connection.fetchval(_LOCK_QUERY):
+        await asyncio.sleep(_LOCK_POLL_INTERVAL)
+    try:
+        await connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+                version BIGINT PRIMARY KEY,
+                name TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        # another process may have migrated while this one waited for the lock
+        applied = await applied_migrations(connection)
+        _warn_on_changes(migrations, applied)
+        done: List[Migration] = []
+        for migration in migrations:
+            if migration.version in applied:
+                continue
+            log.info(f"Applying migration {migration.version} {migration.name}")
+            if migration.transactional:
+                async with connection.transaction():
+                    await connection.execute(migration.sql)
+                    await _record(connection, migration)
+            else:
+                for statement in migration.statements():
+                    await connection.execute(statement)
+                await _record(connection, migration)
+            done.append(migration)
+        return done
+    finally:
+        await connection.execute(_UNLOCK_QUERY)
+
+
+async def _record(connection: Connection, migration: Migration) -> None:
+    await connection.execute(
+        f"INSERT INTO {MIGRATIONS_TABLE} (version, name, checksum) VALUES ($1, $2, $3)",
+        migration.version, migration.name, migration.checksum,
+    )
+
+
+def _warn_on_changes(migrations: List[Migration], applied: Dict[int, str]) -> None:
+    for migration in migrations:
+        checksum = applied.get(migration.version)
+        if checksum is not None and checksum != migration.checksum:
+            log.warning(f"Migration {migration.version} {migration.name} was changed after it was applied")
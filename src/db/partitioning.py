@@ -0,0 +1,173 @@
+"""Hash partitioning of note.content and note.embedding by author_id.
+
+Every partition has its own indexes - also its own HNSW graph - so vacuum,
+reindex and index builds work on one partition at a time, and the graph
+which an author scoped search walks stays small. Queries which filter on
+`author_id = ...` are pruned to a single partition (see search_strategy.py).
+
+Partitioned tables only allow unique constraints which contain the
+partition key. Hence the primary key of note.content becomes (id, author_id),
+and note.permission and note.neighbour get an author_id column as well, to
+keep their foreign keys; a trigger fills it in on insert. Note IDs stay
+unique through their sequence.
+"""
+import logging
+from typing import Optional
+
+from src.db.database import Database
+
+log = logging.getLogger(__name__)
+
+# the old tables are moved here during the migration, and dropped afterwards
+_OLD_SCHEMA = "note_unpartitioned"
+
+
+async def note_partitions(db: Database) -> Optional[int]:
+    """the amount of hash partitions of note.content, or None when it is not partitioned"""
+    record = await db.fetchrow(
+        """
+        SELECT c.relkind = 'p' AS partitioned,
+            (SELECT count(*) FROM pg_inherits WHERE inhparent = c.oid) AS partitions
+        FROM pg_class AS c WHERE c.oid = 'note.content'::regclass
+        """
+    )
+    return record["partitions"] if record["partitioned"] else None
+
+
+async def partition_note_tables(db: Database, partitions: int = 16) -> bool:
+    """migrates note.content and note.embedding to `partitions` hash partitions by author_id.
+
+    The rows are copied in one transaction, which locks the note tables
+    until it commits - run it during a maintenance window. The indexes
+    and triggers of the old tables are created on the new ones after the copy.
+
+    Args:
+    -----
+    db: `Database`
+        the database, migrated with `init_db`
+    partitions: `int`
+        the amount of partitions. Can not be changed later by this function
+
+    Returns:
+    --------
+    `bool`:
+        whether the tables were migrated; False when they are partitioned already
+
+    Raises:
+    -------
+    ValueError:
+        when the tables are partitioned with a different amount of partitions
+    """
+    if partitions < 1:
+        raise ValueError(f"partitions must be at least 1, got {partitions}")
+
+    async with db.transaction():
+        await db.execute("SELECT pg_advisory_xact_lock(hashtext('partition_note_tables'))")
+        existing = await note_partitions(db)
+        if existing is not None:
+            if existing != partitions:
+                raise ValueError(f"note.content already has {existing} partitions, not {partitions}")
+            return False
+
+        log.info(f"Partitioning note.content and note.embedding into {partitions} partitions")
+        # recreated on the new tables under the same names; the constraints are defined below
+        definitions = await db.fetch("""
+            SELECT pg_get_indexdef(i.indexrelid) AS definition
+            FROM pg_index AS i
+            WHERE i.indrelid IN ('note.content'::regclass, 'note.embedding'::regclass)
+                AND NOT EXISTS (SELECT 1 FROM pg_constraint AS c WHERE c.conindid = i.indexrelid)
+            UNION ALL
+            SELECT pg_get_triggerdef(t.oid) AS definition
+            FROM pg_trigger AS t
+            WHERE t.tgrelid IN ('note.content'::regclass, 'note.embedding'::regclass) AND NOT t.tgisinternal
+        """)
+        await db.execute(f"""
+            LOCK TABLE note.content, note.embedding, note.permission, note.neighbour IN ACCESS EXCLUSIVE MODE;
+
+            -- the sequence keeps handing out the note IDs
+            ALTER SEQUENCE note.content_id_seq OWNED BY NONE;
+            ALTER TABLE note.permission DROP CONSTRAINT IF EXISTS permission_note_id_fkey;
+            ALTER TABLE note.neighbour
+                DROP CONSTRAINT IF EXISTS neighbour_note_id_fkey,
+                DROP CONSTRAINT IF EXISTS neighbour_neighbour_id_fkey;
+
+            -- frees the names of the tables and their indexes
+            CREATE SCHEMA {_OLD_SCHEMA};
+            ALTER TABLE note.content SET SCHEMA {_OLD_SCHEMA};
+            ALTER TABLE note.embedding SET SCHEMA {_OLD_SCHEMA};
+
+            CREATE TABLE note.content (
+                LIKE {_OLD_SCHEMA}.content INCLUDING DEFAULTS INCLUDING GENERATED,
+                CONSTRAINT content_pkey PRIMARY KEY (id, author_id),
+                CONSTRAINT content_author_id_fkey FOREIGN KEY (author_id)
+                    REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE
+            ) PARTITION BY HASH (author_id);
+            ALTER SEQUENCE note.content_id_seq OWNED BY note.content.id;
+
+            CREATE TABLE note.embedding (
+                LIKE {_OLD_SCHEMA}.embedding INCLUDING DEFAULTS,
+                CONSTRAINT embedding_pkey PRIMARY KEY (note_id, model, author_id),
+                CONSTRAINT embedding_note_id_fkey FOREIGN KEY (note_id, author_id)
+                    REFERENCES note.content(id, author_id) ON DELETE CASCADE ON UPDATE CASCADE
+            ) PARTITION BY HASH (author_id);
+            ALTER TABLE note.embedding ALTER COLUMN author_id SET NOT NULL;
+        """)
+        for i in range(partitions):
+            await db.execute(f"""
+                CREATE TABLE note.content_p{i} PARTITION OF note.content
+                    FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i});
+                CREATE TABLE note.embedding_p{i} PARTITION OF note.embedding
+                    FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i});
+            """)
+
+        # indexes are built after the copy, which is faster than maintaining them row by row
+        await db.execute(f"""
+            INSERT INTO note.content (id, title, content, updated_at, author_id)
+            SELECT id, title, content, updated_at, author_id FROM {_OLD_SCHEMA}.content;
+
+            INSERT INTO note.embedding (note_id, model, embedding, author_id)
+            SELECT e.note_id, e.model, e.embedding, c.author_id
+            FROM {_OLD_SCHEMA}.embedding AS e
+            JOIN {_OLD_SCHEMA}.content AS c ON c.id = e.note_id;
+
+            DROP SCHEMA {_OLD_SCHEMA} CASCADE;
+
+            CREATE OR REPLACE FUNCTION note.fill_author_id() RETURNS trigger AS $$
+            BEGIN
+                IF NEW.author_id IS NULL THEN
+                    SELECT author_id INTO NEW.author_id FROM note.content WHERE id = NEW.note_id;
+                END IF;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            ALTER TABLE note.permission ADD COLUMN author_id BIGINT;
+            UPDATE note.permission AS p SET author_id = c.author_id
+            FROM note.content AS c WHERE c.id = p.note_id;
+            ALTER TABLE note.permission
+                ALTER COLUMN author_id SET NOT NULL,
+                ADD CONSTRAINT permission_note_id_fkey FOREIGN KEY (note_id, author_id)
+                    REFERENCES note.content(id, author_id) ON DELETE CASCADE ON UPDATE CASCADE;
+            CREATE TRIGGER permission_fill_author_id
+            BEFORE INSERT ON note.permission
+            FOR EACH ROW EXECUTE FUNCTION note.fill_author_id();
+
+            ALTER TABLE note.neighbour ADD COLUMN author_id BIGINT;
+            UPDATE note.neighbour AS n SET author_id = c.author_id
+            FROM note.content AS c WHERE c.id = n.note_id;
+            -- neighbours are notes of the same author
+            ALTER TABLE note.neighbour
+                ALTER COLUMN author_id SET NOT NULL,
+                ADD CONSTRAINT neighbour_note_id_fkey FOREIGN KEY (note_id, author_id)
+                    REFERENCES note.content(id, author_id) ON DELETE CASCADE ON UPDATE CASCADE,
+                ADD CONSTRAINT neighbour_neighbour_id_fkey FOREIGN KEY (neighbour_id, author_id)
+                    REFERENCES note.content(id, author_id) ON DELETE CASCADE ON UPDATE CASCADE;
+            CREATE TRIGGER neighbour_fill_author_id
+            BEFORE INSERT ON note.neighbour
+            FOR EACH ROW EXECUTE FUNCTION note.fill_author_id();
+        """)
+        # indexes on the partitioned tables are created on every partition
+        for record in definitions:
+            await db.execute(record["definition"])
+        await db.execute("ANALYZE note.content; ANALYZE note.embedding")
+    return True
@@ -0,0 +1,210 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, fields
+from enum import StrEnum
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Mapping, Optional
+
+import asyncpg
+from asyncpg import Connection, Pool
+
+type ConnectionHook = Callable[[Connection], Awaitable[None]]
+
+
+class Workload(StrEnum):
+    """Classes of queries which get their own connection pool (see `Database.with_workload`)"""
+    # point lookups and small writes, e.g. GetNote and GetUser
+    OLTP = "oltp"
+    # slow context, fuzzy and similarity searches
+    SEARCH = "search"
+    # exports, imports and backfills
+    BULK = "bulk"
+
+
+@dataclass
+class PoolConfig:
+    """
+    Configuration of an asyncpg connection pool.
+
+    Every server process opens up to `max_size` connections, so
+    `max_size * processes` has to stay below the `max_connections` of Postgres
+    (see `Database.check_connection_budget`).
+
+    Example:
+    ```py
+    async def init(connection: Connection) -> None:
+        await connection.set_type_codec("json", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+    config = PoolConfig(max_size=20, server_settings={"work_mem": "16MB"}, init=init)
+    db = Database(dsn, logging_provider, pool_config=config)
+    ```
+    """
+    min_size: int = 10
+    max_size: int = 10
+    # seconds after which an idle connection is closed
+    max_inactive_connection_lifetime: float = 300.0
+    # prepared statements cached per connection; 0 disables the cache (e.g. behind pgbouncer)
+    statement_cache_size: int = 100
+    # default timeout of a single statement, in seconds
+    command_timeout: Optional[float] = None
+    # seconds to wait for a free connection, before asyncio.TimeoutError is raised
+    acquire_timeout: Optional[float] = None
+    # session settings (GUCs) of every connection, on top of Database.SERVER_SETTINGS
+    server_settings: Dict[str, str] = field(default_factory=dict)
+    # shortcuts for the server settings of the same name, e.g. '2s' or '64MB'
+    statement_timeout: Optional[str] = None
+    work_mem: Optional[str] = None
+    # called once for every new connection, e.g. to register codecs or prepare statements
+    init: Optional[ConnectionHook] = None
+    # called every time a connection is acquired from the pool
+    setup: Optional[ConnectionHook] = None
+
+    # environment variables are named <prefix><FIELD NAME>, e.g. WERSU_DB_MAX_SIZE
+    ENV_PREFIX = "WERSU_DB_"
+
+    def __post_init__(self):
+        if not 0 <= self.min_size <= self.max_size or self.max_size < 1:
+            raise ValueError(f"Need 0 <= min_size <= max_size and max_size >= 1; got {self.min_size} and {self.max_size}")
+
+    @classmethod
+    def from_env(
+        cls,
+        environ: Mapping[str, str] = os.environ,
+        prefix: str = ENV_PREFIX,
+        **defaults: Any,
+    ) -> "PoolConfig":
+        """creates a config from environment variables like `WERSU_DB_MAX_SIZE=20`.
+        Unset variables keep the value of `defaults`, or the default of the field"""
+        kwargs: Dict[str, Any] = dict(defaults)
+        for config_field in fields(cls):
+            if config_field.type not in (int, float, Optional[float], Optional[str]):
+                continue
+            value = environ.get(f"{prefix}{config_field.name.upper()}")
+            if value is None or value == "":
+                continue
+            if config_field.type is int:
+                kwargs[config_field.name] = int(value)
+            elif config_field.type is Optional[str]:
+                kwargs[config_field.name] = value
+            else:
+                kwargs[config_field.name] = float(value)
+        return cls(**kwargs)
+
+    def session_settings(self, defaults: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """the server settings of every connection: `defaults`, overridden by this config"""
+        settings = {**(defaults or {}), **self.server_settings}
+        if self.statement_timeout is not None:
+            settings["statement_timeout"] = self.statement_timeout
+        if self.work_mem is not None:
+            settings["work_mem"] = self.work_mem
+        return settings
+
+    async def create_pool(self, dsn: str, server_settings: Optional[Dict[str, str]] = None) -> Pool:
+        return await asyncpg.create_pool(
+            dsn=dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+            statement_cache_size=self.statement_cache_size,
+            command_timeout=self.command_timeout,
+            server_settings=self.session_settings(server_settings),
+            init=self.init,
+            setup=self.setup,
+        )
+
+
+@dataclass
+class PoolStats:
+    """Snapshot of the counters of a connection pool"""
+    max_size: int
+    # open connections
+    size: int
+    idle: int
+    # tasks which wait for a connection
+    waiting: int
+    acquires: int
+    timeouts: int
+    # seconds spent waiting for a connection, summed up over all acquires
+    acquire_wait_total: float
+    acquire_wait_max: float
+
+    @property
+    def in_use(self) -> int:
+        return self.size - self.idle
+
+    @property
+    def acquire_wait_avg(self) -> float:
+        """average seconds to get a connection, or 0.0 when there were no acquires yet"""
+        return self.acquire_wait_total / self.acquires if self.acquires else 0.0
+
+
+class ConnectionPool:
+    """
+    asyncpg pool which measures how long callers wait for a connection.
+
+    Everything except `acquire` is passed through to the asyncpg pool.
+    """
+    def __init__(self, pool: Pool, config: PoolConfig):
+        self._pool = pool
+        self.config = config
+        self._waiting = 0
+        self._acquires = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @classmethod
+    async def create(
+        cls, dsn: str, config: PoolConfig, server_settings: Optional[Dict[str, str]] = None
+    ) -> "ConnectionPool":
+        return cls(await config.create_pool(dsn, server_settings), config)
+
+    @asynccontextmanager
+    async def acquire(self, timeout: Optional[float] = None) -> AsyncIterator[Connection]:
+        """acquires a connection and releases it afterwards
+
+        Args:
+        -----
+        timeout: `Optional[float]`
+            seconds to wait for a free connection; defaults to `PoolConfig.acquire_timeout`
+
+        Raises:
+        -------
+        asyncio.TimeoutError:
+            when no connection became free in time
+        """
+        start = time.perf_counter()
+        self._waiting += 1
+        try:
+            connection = await self._pool.acquire(
+                timeout=timeout if timeout is not None else self.config.acquire_timeout
+            )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise
+        finally:
+            self._waiting -= 1
+        wait = time.perf_counter() - start
+        self._acquires += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        try:
+            yield connection
+        finally:
+            await self._pool.release(connection)
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            max_size=self._pool.get_max_size(),
+            size=self._pool.get_size(),
+            idle=self._pool.get_idle_size(),
+            waiting=self._waiting,
+            acquires=self._acquires,
+            timeouts=self._timeouts,
+            acquire_wait_total=self._wait_total,
+            acquire_wait_max=self._wait_max,
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
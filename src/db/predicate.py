@@ -0,0 +1,228 @@
+"""Typed WHERE conditions for `Table.select`, `Table.delete` and `Table.update`.
+
+A predicate is split into its shape and its values. The shape only contains
+column names and operators, and is compiled once into parameterised SQL;
+the values are passed as `$n` parameters. Hence every call with the same
+shape produces the same SQL text and reuses the prepared statement.
+
+Example:
+    >>> where = And(In("author_id", [1, 2]), Range("updated_at", lower=since), IsNull("deleted_at"))
+    >>> where.sql()
+    'author_id = ANY($1) AND updated_at >= $2 AND deleted_at IS NULL'
+    >>> where.values()
+    [[1, 2], since]
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+type Shape = Tuple[Hashable, ...]
+
+
+class Predicate(ABC):
+    """A condition of a WHERE clause"""
+
+    @property
+    @abstractmethod
+    def shape(self) -> Shape:
+        """Hashable description of the SQL of this predicate, without its values."""
+        ...
+
+    @abstractmethod
+    def values(self) -> List[Any]:
+        """The parameters of the predicate, in the order of their placeholders."""
+        ...
+
+    def sql(self, dollar_start: int = 1) -> str:
+        """Compile the predicate to a WHERE clause (without 'WHERE').
+
+        Args:
+            dollar_start: Index of the first $n placeholder. Defaults to 1.
+        """
+        return compile_shape(self.shape, dollar_start)
+
+    def __and__(self, other: "Predicate") -> "And":
+        return And(self, other)
+
+
+@dataclass(frozen=True)
+class Eq(Predicate):
+    """`column = value`"""
+    column: str
+    value: Any
+
+    @property
+    def shape(self) -> Shape:
+        return ("eq", self.column)
+
+    def values(self) -> List[Any]:
+        return [self.value]
+
+
+@dataclass(frozen=True)
+class In(Predicate):
+    """`column = ANY($n)` - matches any of the values with one array parameter
+
+    Attributes:
+        sql_type: Element type used to cast the array (e.g. 'bigint'), when
+            Postgres can not infer it from the column.
+    """
+    column: str
+    items: Sequence[Any]
+    sql_type: Optional[str] = None
+
+    @property
+    def shape(self) -> Shape:
+        return ("in", self.column, self.sql_type)
+
+    def values(self) -> List[Any]:
+        return [list(self.items)]
+
+
+@dataclass(frozen=True)
+class Range(Predicate):
+    """`lower <= column < upper`; a bound which is None is left open"""
+    column: str
+    lower: Any = None
+    upper: Any = None
+    lower_inclusive: bool = True
+    upper_inclusive: bool = False
+
+    def __post_init__(self):
+        if self.lower is None and self.upper is None:
+            raise ValueError(f"Range on {self.column} needs at least one bound")
+
+    @property
+    def shape(self) -> Shape:
+        lower = None if self.lower is None else (">=" if self.lower_inclusive else ">")
+        upper = None if self.upper is None else ("<=" if self.upper_inclusive else "<")
+        return ("range", self.column, lower, upper)
+
+    def values(self) -> List[Any]:
+        return [bound for bound in (self.lower, self.upper) if bound is not None]
+
+
+@dataclass(frozen=True)
+class IsNull(Predicate):
+    """`column IS NULL`, or `column IS NOT NULL` with `negate`"""
+    column: str
+    negate: bool = False
+
+    @property
+    def shape(self) -> Shape:
+        return ("null", self.column, self.negate)
+
+    def values(self) -> List[Any]:
+        return []
+
+
+@dataclass(frozen=True)
+class After(Predicate):
+    """Keyset condition: the rows after `keys` in the order of `columns`.
+
+    Compiles to a row comparison like `(updated_at, id) < ($1, $2)`, hence all
+    columns are sorted in the same direction. Use `order_by` for the matching
+    ORDER BY clause, and make the last column unique so no row is skipped.
+
+    Example:
+        >>> after = After(("updated_at", "id"), (last.updated_at, last.id), descending=True)
+        >>> await table.select(after, order_by=after.order_by, limit=50)
+    """
+    columns: Tuple[str, ...]
+    keys: Tuple[Any, ...]
+    descending: bool = False
+
+    def __post_init__(self):
+        if not self.columns or len(self.columns) != len(self.keys):
+            raise ValueError(f"Keyset needs one key per column; got {self.columns} and {self.keys}")
+
+    @property
+    def shape(self) -> Shape:
+        return ("after", tuple(self.columns), self.descending)
+
+    def values(self) -> List[Any]:
+        return list(self.keys)
+
+    @property
+    def order_by(self) -> str:
+        direction = "DESC" if self.descending else "ASC"
+        return ", ".join(f"{column} {direction}" for column in self.columns)
+
+
+class And(Predicate):
+    """All of the predicates"""
+    def __init__(self, *predicates: Predicate):
+        if not predicates:
+            raise ValueError("And needs at least one predicate")
+        self.predicates = predicates
+
+    @classmethod
+    def from_dict(cls, where: Dict[str, Any]) -> "And":
+        """`column = value` for every item"""
+        return cls(*(Eq(column, value) for column, value in where.items()))
+
+    @property
+    def shape(self) -> Shape:
+        return ("and", tuple(predicate.shape for predicate in self.predicates))
+
+    def values(self) -> List[Any]:
+        return [value for predicate in self.predicates for value in predicate.values()]
+
+    def __and__(self, other: Predicate) -> "And":
+        return And(*self.predicates, other)
+
+    def __repr__(self) -> str:
+        return f"And{self.predicates!r}"
+
+
+def _placeholders(shape: Shape) -> int:
+    kind = shape[0]
+    if kind in ("eq", "in"):
+        return 1
+    if kind == "range":
+        return sum(bound is not None for bound in shape[2:])
+    if kind == "null":
+        return 0
+    if kind == "after":
+        return len(shape[1])  # type: ignore[arg-type]
+    if kind == "and":
+        return sum(_placeholders(child) for child in shape[1])  # type: ignore[union-attr]
+    raise ValueError(f"Unknown predicate shape: {shape}")
+
+
+@lru_cache(maxsize=1024)
+def compile_shape(shape: Shape, dollar_start: int = 1) -> str:
+    """SQL of a predicate shape, with placeholders starting at `$dollar_start`"""
+    kind = shape[0]
+    if kind == "eq":
+        return f"{shape[1]}=${dollar_start}"
+    if kind == "in":
+        _, column, sql_type = shape
+        cast = f"::{sql_type}[]" if sql_type else ""
+        return f"{column} = ANY(${dollar_start}{cast})"
+    if kind == "range":
+        _, column, lower, upper = shape
+        conditions = []
+        n = dollar_start
+        for operator in (lower, upper):
+            if operator is not None:
+                conditions.append(f"{column} {operator} ${n}")
+                n += 1
+        return " AND ".join(conditions)
+    if kind == "null":
+        _, column, negate = shape
+        return f"{column} IS {'NOT ' if negate else ''}NULL"
+    if kind == "after":
+        _, columns, descending = shape
+        placeholders = ", ".join(f"${n}" for n in range(dollar_start, dollar_start + len(columns)))  # type: ignore[arg-type]
+        return f"({', '.join(columns)}) {'<' if descending else '>'} ({placeholders})"  # type: ignore[arg-type]
+    if kind == "and":
+        parts = []
+        n = dollar_start
+        for child in shape[1]:  # type: ignore[union-attr]
+            parts.append(compile_shape(child, n))
+            n += _placeholders(child)
+        return " AND ".join(parts)
+    raise ValueError(f"Unknown predicate shape: {shape}")
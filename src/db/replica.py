@@ -0,0 +1,157 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import StrEnum
+import itertools
+from typing import AsyncIterator, Dict, Hashable, Iterator, List, Optional, Sequence
+
+from asyncpg import Connection
+
+from src.api.undefined import UNDEFINED
+from src.db.pool import ConnectionPool, PoolConfig, PoolStats, Workload
+from src.utils import TTLCache
+
+# LSNs as bytes since 0/0, so that they can be compared as integers
+CURRENT_LSN_QUERY = "SELECT (pg_current_wal_lsn() - '0/0'::pg_lsn)::bigint"
+# NULL on a server which is not a standby
+REPLAY_LSN_QUERY = "SELECT (pg_last_wal_replay_lsn() - '0/0'::pg_lsn)::bigint"
+
+# key (e.g. user ID) whose reads have to see its own writes, see `read_your_writes`
+_consistency_key: ContextVar[Optional[Hashable]] = ContextVar("consistency_key", default=None)
+
+
+@contextmanager
+def read_your_writes(key: Hashable) -> Iterator[None]:
+    """reads inside of the block see the writes which were made under the same key before.
+
+    After a write under `key`, reads with that key go to the primary until the
+    chosen replica has replayed the write. Other keys keep reading from the replicas.
+
+    Example:
+    ```py
+    with read_your_writes(user_id):
+        await repo.insert(note)
+    ...
+    with read_your_writes(user_id):
+        await repo.select_by_id(note_id, ctx)  # sees the inserted note
+    ```
+    """
+    token = _consistency_key.set(key)
+    try:
+        yield
+    finally:
+        _consistency_key.reset(token)
+
+
+def current_consistency_key() -> Optional[Hashable]:
+    return _consistency_key.get()
+
+
+class Balancing(StrEnum):
+    """How reads are spread over the replicas"""
+    ROUND_ROBIN = "round_robin"
+    # the replica with the fewest running queries of this process
+    LEAST_OUTSTANDING = "least_outstanding"
+
+
+class Replica:
+    """A read only standby, with one pool per workload like the primary"""
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.pools: Dict[str, ConnectionPool] = {}
+        # queries of this process which currently run on the replica
+        self.outstanding = 0
+        # the highest LSN this replica is known to have replayed
+        self.replayed_lsn = 0
+
+    def pool(self, workload: str) -> ConnectionPool:
+        return self.pools.get(workload) or self.pools[Workload.OLTP]
+
+    @asynccontextmanager
+    async def acquire(self, workload: str) -> AsyncIterator[Connection]:
+        self.outstanding += 1
+        try:
+            async with self.pool(workload).acquire() as connection:
+                yield connection
+        finally:
+            self.outstanding -= 1
+
+
+class ReplicaSet:
+    """
+    Read replicas of a `Database`, and the write LSNs for read-your-writes.
+
+    The write LSN of a key is dropped, once every replica was seen to have 
+    replayed it, or after `write_lsn_ttl` seconds. A key whose write was not 
+    replayed by then may read stale rows, so the TTL should be well above the
+    expected replication lag.
+    """
+    def __init__(
+        self,
+        dsns: Sequence[str],
+        balancing: Balancing = Balancing.ROUND_ROBIN,
+        write_lsn_ttl: float = 60.0,
+        max_keys: int = 100_000,
+    ):
+        self.replicas: List[Replica] = [Replica(dsn) for dsn in dsns]
+        self.balancing = balancing
+        self._round_robin = itertools.cycle(range(len(self.replicas)))
+        # consistency key -> LSN of its last write on the primary
+        self._write_lsns: TTLCache[Hashable, int] = TTLCache(max_entries=max_keys, ttl=write_lsn_ttl)
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    async def open(self, pool_configs: Dict[str, PoolConfig], server_settings: Dict[str, str]) -> None:
+        for replica in self.replicas:
+            for workload, config in pool_configs.items():
+                replica.pools[workload] = await ConnectionPool.create(replica.dsn, config, server_settings)
+
+    async def close(self) -> None:
+        for replica in self.replicas:
+            for pool in replica.pools.values():
+                await pool.close()
+            replica.pools.clear()
+
+    def choose(self) -> Replica:
+        if self.balancing is Balancing.LEAST_OUTSTANDING:
+            return min(self.replicas, key=lambda replica: replica.outstanding)
+        return self.replicas[next(self._round_robin)]
+
+    async def record_write(self, connection: Connection, key: Hashable) -> None:
+        """remembers the current LSN of the primary as the last write of `key`"""
+        self._write_lsns.set(key, await connection.fetchval(CURRENT_LSN_QUERY))
+
+    def pending_lsn(self, key: Optional[Hashable]) -> Optional[int]:
+        """the LSN a replica has to replay before it can serve reads of `key`"""
+        if key is None:
+            return None
+        lsn = self._write_lsns.get(key)
+        if lsn is UNDEFINED:
+            return None
+        if all(replica.replayed_lsn >= lsn for replica in self.replicas):
+            # every replica serves the write, the key reads like any other from now on
+            self._write_lsns.pop(key)
+            return None
+        return lsn
+
+    async def serves(self, replica: Replica, connection: Connection, lsn: int) -> bool:
+        """whether `replica` replayed `lsn`, asking the server only if it is not known yet"""
+        if replica.replayed_lsn >= lsn:
+            return True
+        if not await self.caught_up(connection, lsn):
+            return False
+        replica.replayed_lsn = max(replica.replayed_lsn, lsn)
+        return True
+
+    @staticmethod
+    async def caught_up(connection: Connection, lsn: int) -> bool:
+        """whether the replica of `connection` replayed `lsn`"""
+        replay_lsn = await connection.fetchval(REPLAY_LSN_QUERY)
+        return replay_lsn is None or replay_lsn >= lsn
+
+    def stats(self) -> Dict[str, PoolStats]:
+        return {
+            f"replica {i} {workload}": pool.stats()
+            for i, replica in enumerate(self.replicas)
+            for workload, pool in replica.pools.items()
+        }
@@ -1,4 +1,5 @@
 from .embedding import *
 from .content import *
 from .note import *
-from .search_strategy import *
\ No newline at end of file
+from .search_strategy import *
+from .neighbour import *
\ No newline at end of file
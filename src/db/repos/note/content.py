@@ -1,14 +1,16 @@
 from abc import ABC, abstractmethod
 from dataclasses import replace
-from typing import List, Optional
+from typing import ClassVar, List, Optional
 
 from asyncpg import Record
 from src.api.undefined import UNDEFINED
 from src.db.entities import NoteEntity
+from src.db.pool import Workload
 from src.db.repos.note import permission
+from src.db.predicate import In
 from src.db.table import TableABC
 
-from src.utils import asdict
+from src.utils import asdict, BatchLoader
 
 
 class NoteContentRepo(ABC):
@@ -111,11 +113,36 @@ class NoteContentRepo(ABC):
         """
         ...
 
+    @abstractmethod
+    async def select_by_ids(
+        self,
+        note_ids: List[int],
+    ) -> List[Optional[NoteEntity]]:
+        """select metadata of multiple notes with one query
+        
+        Args:
+        -----
+        note_ids: `List[int]`
+            the IDs of the notes
+
+        Returns:
+        --------
+        `List[Optional[NoteEntity]]`:
+            the matching entities in the order of `note_ids`;
+            None for IDs which were not found
+        """
+        ...
+
 
 class NoteContentPostgresRepo(NoteContentRepo):
     """Provides an implementation using Postgres as the backend database"""
+    # the connection pool the queries of the repo use
+    WORKLOAD: ClassVar[str] = Workload.OLTP
+
     def __init__(self, table: TableABC[List[Record]]):
-        self._table = table
+        self._table = table.with_workload(self.WORKLOAD)
+        # coalesces concurrent select_by_id calls into one select_by_ids
+        self._loader: BatchLoader[int, NoteEntity] = BatchLoader(self.select_by_ids)
 
     async def insert(self, metadata: NoteEntity) -> NoteEntity:
         records = await self._table.insert(
@@ -183,12 +210,25 @@ class NoteContentPostgresRepo(NoteContentRepo):
         return [NoteEntity(**record) for record in records]
 
     async def select_by_id(self, note_id: int) -> NoteEntity:
-        record = await self._table.fetch_by_id(note_id, select="id, title, content, updated_at, author_id")
-        if not record:
+        if self._table.db.in_transaction:
+            # the batch would not see the uncommitted writes of this transaction
+            entity = (await self.select_by_ids([note_id]))[0]
+        else:
+            entity = await self._loader.load(note_id)
+        if not entity:
             raise RuntimeError(f"Note with ID {note_id} not found")
-        # convert Record to NoteEntity (id -> note_id)
-        record = dict(record)
-        record['note_id'] = record.pop('id')
-
+        # callers of the same batch get their own copy; 
         # neither embeddings nor permissions are fetched here
-        return NoteEntity(**record, embeddings=[], permissions=[])
\ No newline at end of file
+        return replace(entity, embeddings=[], permissions=[])
+
+    async def select_by_ids(self, note_ids: List[int]) -> List[Optional[NoteEntity]]:
+        records = await self._table.select(
+            In("id", note_ids, sql_type="bigint"),
+            select="id, title, content, updated_at, author_id",
+        )
+        by_id = {}
+        for record in records or []:
+            record = dict(record)
+            record['note_id'] = record.pop('id')
+            by_id[record['note_id']] = NoteEntity(**record, embeddings=[], permissions=[])
+        return [by_id.get(note_id) for note_id in note_ids]
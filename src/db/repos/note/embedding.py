@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
 
-from typing import List
+from typing import ClassVar, List, Optional
 
 from asyncpg import Record
+from torch import Tensor
 from src.ai.embedding_generator import EmbeddingGeneratorABC
-from src.db.entities import NoteEmbeddingEntity
+from src.db.entities import NoteEmbeddingEntity, NoteEntity
+from src.db.pool import Workload
 from src.db.table import TableABC
 
 from src.utils import asdict
@@ -17,6 +19,8 @@ class NoteEmbeddingRepo(ABC):
         note_id: int,
         title: str,
         content: str,
+        author_id: int,
+        embedding: Optional[Tensor] = None,
     ) -> NoteEmbeddingEntity:
         """generates the embedding and inserts it
         
@@ -28,6 +32,11 @@ class NoteEmbeddingRepo(ABC):
             the note title, used to generate the embedding
         content: `str`
             the note content, used to generate the embedding
+        author_id: `int`
+            the author of the note
+        embedding: `Optional[Tensor]`
+            the embedding from `encode_many`, so that no model runs inside 
+            of a transaction; generated when None
 
         Returns:
         --------
@@ -36,6 +45,48 @@ class NoteEmbeddingRepo(ABC):
         """
         ...
 
+    @abstractmethod
+    async def encode_many(
+        self,
+        notes: List[NoteEntity],
+    ) -> List[Tensor]:
+        """generates the embeddings of several notes in one batch, without inserting them.
+        Lets callers encode before they open a transaction
+        
+        Args:
+        -----
+        notes: `List[NoteEntity]`
+            the notes, title and content are encoded
+
+        Returns:
+        --------
+        `List[Tensor]`:
+            the embeddings, in the order of the notes
+        """
+        ...
+
+    @abstractmethod
+    async def insert_many(
+        self,
+        notes: List[NoteEntity],
+        embeddings: Optional[List[Tensor]] = None,
+    ) -> List[NoteEmbeddingEntity]:
+        """generates the embeddings of several notes in one batch and inserts them with one statement
+        
+        Args:
+        -----
+        notes: `List[NoteEntity]`
+            the inserted notes, with their IDs
+        embeddings: `Optional[List[Tensor]]`
+            the embeddings of the notes from `encode_many`; generated when None
+
+        Returns:
+        --------
+        `List[NoteEmbeddingEntity]`:
+            the embeddings, in the order of the notes
+        """
+        ...
+
     @abstractmethod
     async def update(
         self,
@@ -102,14 +153,19 @@ class NoteEmbeddingRepo(ABC):
 
 class NoteEmbeddingPostgresRepo(NoteEmbeddingRepo):
     """Provides an impementation using Postgres as the backend database"""
+    # the connection pool the queries of the repo use
+    WORKLOAD: ClassVar[str] = Workload.OLTP
+
     def __init__(self, table: TableABC[List[Record]], embedding_generator: EmbeddingGeneratorABC):
-        self._table = table
+        self._table = table.with_workload(self.WORKLOAD)
         self._embedding_generator = embedding_generator
 
-    async def insert(self, note_id: int, title: str, content: str) -> NoteEmbeddingEntity:
+    async def insert(
+        self, note_id: int, title: str, content: str, author_id: int, embedding: Optional[Tensor] = None
+    ) -> NoteEmbeddingEntity:
         # generate embedding
-        embedding_content = f"{title}\n{content}"
-        embedding = self._embedding_generator.generate(embedding_content)
+        if embedding is None:
+            embedding = await self._embedding_generator.generate_async(f"{title}\n{content}")
         embedding_str = EmbeddingGeneratorABC.tensor_to_str_vec(embedding)
 
         # insert embedding
@@ -117,6 +173,7 @@ class NoteEmbeddingPostgresRepo(NoteEmbeddingRepo):
             "note_id": note_id,
             "model": self._embedding_generator.model_name,
             "embedding": embedding_str,
+            "author_id": author_id,
         })
         if not record:
             raise Exception("Failed to insert embedding")
@@ -130,6 +187,45 @@ class NoteEmbeddingPostgresRepo(NoteEmbeddingRepo):
         )
         return embedding
 
+    async def encode_many(self, notes: List[NoteEntity]) -> List[Tensor]:
+        if not notes:
+            return []
+        return await self._embedding_generator.generate_many_async(
+            [f"{note.title or ''}\n{note.content}" for note in notes]
+        )
+
+    async def insert_many(
+        self, notes: List[NoteEntity], embeddings: Optional[List[Tensor]] = None
+    ) -> List[NoteEmbeddingEntity]:
+        if not notes:
+            return []
+        if embeddings is None:
+            embeddings = await self.encode_many(notes)
+        model = self._embedding_generator.model_name
+        records = await self._table.insert_many(
+            [
+                {
+                    "note_id": note.note_id,
+                    "model": model,
+                    "embedding": EmbeddingGeneratorABC.tensor_to_str_vec(embedding),
+                    "author_id": note.author_id,
+                }
+                for note, embedding in zip(notes, embeddings)
+            ],
+            returning="note_id, embedding",
+        )
+        if not records or len(records) != len(notes):
+            raise Exception("Failed to insert embeddings")
+        by_note_id = {record["note_id"]: record["embedding"] for record in records}
+        return [
+            NoteEmbeddingEntity(
+                note_id=note.note_id,
+                model=model,
+                embedding=self.embedding_generator.str_vec_to_list(by_note_id[note.note_id]),
+            )
+            for note in notes
+        ]
+
     async def update(self, set: NoteEmbeddingEntity, where: NoteEmbeddingEntity) -> NoteEmbeddingEntity:
         record = await self._table.update(
             set=asdict(set),
@@ -0,0 +1,279 @@
+from abc import ABC, abstractmethod
+from typing import ClassVar, List
+
+from src.db.database import DatabaseABC
+from src.db.pool import Workload
+
+
+class NoteNeighbourRepo(ABC):
+    """Maintains the precomputed nearest neighbours of notes in note.neighbour"""
+
+    @property
+    @abstractmethod
+    def k(self) -> int:
+        """the amount of neighbours which are stored per note"""
+        ...
+
+    @abstractmethod
+    async def add(self, note_id: int, model: str) -> None:
+        """computes the neighbours of a new note and adds the note 
+        to the neighbours of the notes it is closer to than their 
+        current k-th neighbour
+        
+        Args:
+        -----
+        note_id: `int`
+            the ID of the note, which already has an embedding
+        model: `str`
+            the model of the embedding
+        """
+        ...
+
+    @abstractmethod
+    async def recompute(self, note_id: int, model: str) -> None:
+        """recomputes the neighbours of one note
+        
+        Args:
+        -----
+        note_id: `int`
+            the ID of the note
+        model: `str`
+            the model of the embedding
+        """
+        ...
+
+    @abstractmethod
+    async def add_many(self, note_ids: List[int], model: str) -> None:
+        """like `add` for many new notes, with one statement per step 
+        instead of one per note
+        
+        Args:
+        -----
+        note_ids: `List[int]`
+            the IDs of the notes, which already have embeddings
+        model: `str`
+            the model of the embeddings
+        """
+        ...
+
+    @abstractmethod
+    async def referencing(self, note_id: int, model: str) -> List[int]:
+        """returns the IDs of the notes which have the given note as neighbour
+        
+        Args:
+        -----
+        note_id: `int`
+            the ID of the neighbour note
+        model: `str`
+            the model of the embedding
+
+        Returns:
+        --------
+        `List[int]`:
+            the IDs of the referencing notes
+        """
+        ...
+
+
+class NoteNeighbourPostgresRepo(NoteNeighbourRepo):
+    """Provides an implementation using Postgres as the backend database"""
+    # the connection pool the queries of the repo use. The maintenance scans all notes 
+    # of an author; inside of a unit of work it runs on the connection of the unit of work
+    WORKLOAD: ClassVar[str] = Workload.BULK
+
+    def __init__(self, db: DatabaseABC, k: int = 10):
+        self._db = db.with_workload(self.WORKLOAD)
+        self._k = k
+
+    @property
+    def k(self) -> int:
+        return self._k
+
+    async def add(self, note_id: int, model: str) -> None:
+        await self.recompute(note_id, model)
+
+        # add the note to other notes of the author, where it is closer than their k-th neighbour
+        query = f"""
+        WITH source AS (
+            SELECT note.embedding.embedding, note.content.author_id
+            FROM note.embedding
+            JOIN note.content ON note.content.id = note.embedding.note_id
+            WHERE note.embedding.note_id = $1 AND note.embedding.model = $2
+        ), candidates AS (
+            SELECT other.note_id, other.embedding <=> source.embedding AS distance
+            FROM source
+            JOIN note.content AS other_content 
+                ON other_content.author_id = source.author_id 
+                AND other_content.id <> $1
+            JOIN note.embedding AS other 
+                ON other.note_id = other_content.id 
+                AND other.model = $2
+                AND other.author_id = source.author_id
+        )
+        INSERT INTO note.neighbour (note_id, model, neighbour_id, distance)
+        SELECT candidates.note_id, $2, $1, candidates.distance
+        FROM candidates
+        CROSS JOIN LATERAL (
+            SELECT count(*) AS amount, max(distance) AS worst
+            FROM note.neighbour
+            WHERE note.neighbour.note_id = candidates.note_id AND note.neighbour.model = $2
+        ) AS current
+        WHERE current.amount < {self._k} OR candidates.distance < current.worst
+        ON CONFLICT (note_id, model, neighbour_id) DO UPDATE SET distance = EXCLUDED.distance
+        """
+        await self._db.execute(query, note_id, model)
+
+        # keep only the k nearest neighbours of the notes, which got the new note
+        query = f"""
+        DELETE FROM note.neighbour
+        USING (
+            SELECT note_id, model, neighbour_id,
+                row_number() OVER (PARTITION BY note_id, model ORDER BY distance) AS rank
+            FROM note.neighbour
+            WHERE model = $2 AND note_id IN (
+                SELECT note_id FROM note.neighbour WHERE neighbour_id = $1 AND model = $2
+            )
+        ) AS ranked
+        WHERE 
+            note.neighbour.note_id = ranked.note_id
+            AND note.neighbour.model = ranked.model
+            AND note.neighbour.neighbour_id = ranked.neighbour_id
+            AND ranked.rank > {self._k}
+        """
+        await self._db.execute(query, note_id, model)
+
+    async def recompute(self, note_id: int, model: str) -> None:
+        await self._lock_author_of(note_id)
+        await self._db.execute(
+            "DELETE FROM note.neighbour WHERE note_id = $1 AND model = $2",
+            note_id, model
+        )
+        query = f"""
+        WITH source AS (
+            SELECT note.embedding.embedding, note.content.author_id
+            FROM note.embedding
+            JOIN note.content ON note.content.id = note.embedding.note_id
+            WHERE note.embedding.note_id = $1 AND note.embedding.model = $2
+        )
+        INSERT INTO note.neighbour (note_id, model, neighbour_id, distance)
+        SELECT $1, $2, other.note_id, other.embedding <=> source.embedding
+        FROM source
+        JOIN note.content AS other_content 
+            ON other_content.author_id = source.author_id 
+            AND other_content.id <> $1
+        JOIN note.embedding AS other 
+            ON other.note_id = other_content.id 
+            AND other.model = $2
+            AND other.author_id = source.author_id
+        ORDER BY other.embedding <=> source.embedding
+        LIMIT {self._k}
+        """
+        await self._db.execute(query, note_id, model)
+
+    async def add_many(self, note_ids: List[int], model: str) -> None:
+        if not note_ids:
+            return
+        # the authors are locked in order, so that concurrent imports do not deadlock
+        await self._db.execute(
+            """
+            SELECT pg_advisory_xact_lock(hashtext('note.neighbour'), author_id::int) 
+            FROM (SELECT DISTINCT author_id FROM note.content WHERE id = ANY($1::bigint[]) ORDER BY author_id) AS authors
+            """,
+            note_ids
+        )
+        await self._db.execute(
+            "DELETE FROM note.neighbour WHERE note_id = ANY($1::bigint[]) AND model = $2",
+            note_ids, model
+        )
+
+        # the embeddings of the authors are read once, instead of once per new note
+        notes = """
+        WITH source AS MATERIALIZED (
+            SELECT note.embedding.note_id, note.embedding.embedding, note.content.author_id
+            FROM note.embedding
+            JOIN note.content ON note.content.id = note.embedding.note_id
+            WHERE note.embedding.note_id = ANY($1::bigint[]) AND note.embedding.model = $2
+        ), authored AS MATERIALIZED (
+            SELECT other.note_id, other.embedding, other_content.author_id
+            FROM note.content AS other_content
+            JOIN note.embedding AS other 
+                ON other.note_id = other_content.id 
+                AND other.model = $2
+                AND other.author_id = other_content.author_id
+            WHERE other_content.author_id IN (SELECT author_id FROM source)
+        )
+        """
+
+        # the neighbours of the new notes
+        query = f"""
+        {notes}
+        INSERT INTO note.neighbour (note_id, model, neighbour_id, distance)
+        SELECT source.note_id, $2, nearest.note_id, nearest.distance
+        FROM source
+        CROSS JOIN LATERAL (
+            SELECT authored.note_id, authored.embedding <=> source.embedding AS distance
+            FROM authored
+            WHERE authored.author_id = source.author_id AND authored.note_id <> source.note_id
+            ORDER BY authored.embedding <=> source.embedding
+            LIMIT {self._k}
+        ) AS nearest
+        """
+        await self._db.execute(query, note_ids, model)
+
+        # add the new notes to the older notes of their authors, where they are closer than the k-th neighbour
+        query = f"""
+        {notes}, candidates AS (
+            SELECT authored.note_id, source.note_id AS neighbour_id, authored.embedding <=> source.embedding AS distance
+            FROM source
+            JOIN authored 
+                ON authored.author_id = source.author_id 
+                AND authored.note_id <> ALL($1::bigint[])
+        ), current AS (
+            -- once per older note, not per pair of an older and a new note
+            SELECT note_id, count(*) AS amount, max(distance) AS worst
+            FROM note.neighbour
+            WHERE model = $2 AND note_id IN (SELECT note_id FROM candidates)
+            GROUP BY note_id
+        )
+        INSERT INTO note.neighbour (note_id, model, neighbour_id, distance)
+        SELECT candidates.note_id, $2, candidates.neighbour_id, candidates.distance
+        FROM candidates
+        LEFT JOIN current ON current.note_id = candidates.note_id
+        WHERE current.note_id IS NULL OR current.amount < {self._k} OR candidates.distance < current.worst
+        ON CONFLICT (note_id, model, neighbour_id) DO UPDATE SET distance = EXCLUDED.distance
+        """
+        await self._db.execute(query, note_ids, model)
+
+        # keep only the k nearest neighbours of the notes, which got new notes
+        query = f"""
+        DELETE FROM note.neighbour
+        USING (
+            SELECT note_id, model, neighbour_id,
+                row_number() OVER (PARTITION BY note_id, model ORDER BY distance) AS rank
+            FROM note.neighbour
+            WHERE model = $2 AND note_id IN (
+                SELECT note_id FROM note.neighbour WHERE neighbour_id = ANY($1::bigint[]) AND model = $2
+            )
+        ) AS ranked
+        WHERE 
+            note.neighbour.note_id = ranked.note_id
+            AND note.neighbour.model = ranked.model
+            AND note.neighbour.neighbour_id = ranked.neighbour_id
+            AND ranked.rank > {self._k}
+        """
+        await self._db.execute(query, note_ids, model)
+
+    async def _lock_author_of(self, note_id: int) -> None:
+        # serializes the maintenance of the neighbours of an author until the commit;
+        # concurrent inserts of the author would otherwise update the same rows in different order
+        await self._db.execute(
+            "SELECT pg_advisory_xact_lock(hashtext('note.neighbour'), author_id::int) FROM note.content WHERE id = $1",
+            note_id
+        )
+
+    async def referencing(self, note_id: int, model: str) -> List[int]:
+        records = await self._db.fetch_readonly(
+            "SELECT note_id FROM note.neighbour WHERE neighbour_id = $1 AND model = $2",
+            note_id, model
+        )
+        return [record["note_id"] for record in records]
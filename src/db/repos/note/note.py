@@ -1,31 +1,35 @@
 from abc import ABC, abstractmethod
-from dataclasses import replace
+from contextlib import aclosing
+from dataclasses import dataclass, replace
 from enum import Enum
-from typing import List, Optional, Type
+import functools
+import json
+from typing import AsyncIterator, ClassVar, Dict, List, Optional, Type
 import typing
 
 import asyncpg
+from torch import Tensor
 
 from src.ai.embedding_generator import EmbeddingGenerator, Models
 from src.api.types import LoggingProvider, Pagination
 from src.db.entities import NoteEntity
 from src.db import Database
+from src.db.pool import Workload
+from src.db.replica import current_consistency_key, read_your_writes
 from src.db.entities.note.embedding import NoteEmbeddingEntity
 from src.db.repos.note.content import NoteContentRepo
 
 from src.db.repos.note.permission import NotePermissionRepo
-from src.db.repos.note.search_strategy import ContextNoteSearchStrategy, DateNoteSearchStrategy, FuzzyTitleContentSearchStrategy, NoteSearchStrategy, WebNoteSearchStrategy
+from src.db.repos.note.search_cache import SearchResultCache
+from src.db.repos.note.note_cache import NoteEntityCache
+from src.db.repos.note.neighbour import NoteNeighbourRepo
+from src.db.repos.note.search_strategy import ContextNoteSearchStrategy, DateNoteSearchStrategy, FuzzyTitleContentSearchStrategy, NoteSearchStrategy, PrecomputedSimilarNoteSearchStrategy, SearchType, SimilarNoteSearchStrategy, WebNoteSearchStrategy
+from src.db.repos.note.search_planner import SearchPlan, SearchPlanner
 from src.db.table import TableABC
 from src.api.undefined import UNDEFINED
 from src.db.entities.note.permission import NotePermissionEntity
 from src.db.repos.note.embedding import NoteEmbeddingRepo
-
-
-class SearchType(Enum):
-    NO_SEARCH = 1
-    FULL_TEXT_TITLE = 2
-    FUZZY = 3
-    CONTEXT = 4
+from src.utils import BatchLoader, WriteCoalescer
 
 
 class UserContext:
@@ -33,6 +37,72 @@ class UserContext:
         self.user_id = user_id
 
 
+@dataclass(frozen=True)
+class NoteProjection:
+    """Selects the parts of a note which are fetched besides its metadata
+    (ID, title, updated_at, author_id). Left out parts are UNDEFINED"""
+    content: bool = True
+    permissions: bool = True
+    embeddings: bool = True
+
+
+@functools.lru_cache(maxsize=None)
+def _select_note_query(projection: NoteProjection, many: bool = False) -> str:
+    """builds the single statement which fetches a note (or with `many` 
+    the notes of an ID array) with the given projection"""
+    columns = ["c.id", "c.title", "c.updated_at", "c.author_id"]
+    if projection.content:
+        columns.append("c.content")
+    if projection.permissions:
+        columns.append(
+            "(SELECT coalesce(array_agg(p.role_id ORDER BY p.role_id), '{}') "
+            "FROM note.permission AS p WHERE p.note_id = c.id) AS role_ids"
+        )
+    if projection.embeddings:
+        columns.append(
+            "(SELECT coalesce(json_agg(json_build_object('model', e.model, 'embedding', e.embedding::text)), '[]') "
+            "FROM note.embedding AS e WHERE e.note_id = c.id) AS embeddings"
+        )
+    return (
+        f"SELECT {', '.join(columns)}\n"
+        f"FROM note.content AS c\n"
+        f"WHERE {'c.id = ANY($1::bigint[])' if many else 'c.id = $1'}"
+    )
+
+
+def _note_from_record(record: asyncpg.Record, projection: NoteProjection) -> NoteEntity:
+    """converts a record of `_select_note_query` to a NoteEntity"""
+    note_id = record["id"]
+    note = NoteEntity(
+        note_id=note_id,
+        title=record["title"],
+        updated_at=record["updated_at"],
+        author_id=record["author_id"],
+    )
+    if projection.content:
+        note.content = record["content"]
+    if projection.permissions:
+        note.permissions = [
+            NotePermissionEntity(note_id=note_id, role_id=role_id)
+            for role_id in record["role_ids"]
+        ]
+    if projection.embeddings:
+        note.embeddings = [
+            NoteEmbeddingEntity(note_id=note_id, **embedding)
+            for embedding in json.loads(record["embeddings"])
+        ]
+    return note
+
+
+def _copy_note(note: NoteEntity) -> NoteEntity:
+    """copies the note and its permission and embedding lists"""
+    return replace(
+        note,
+        permissions=list(note.permissions) if isinstance(note.permissions, list) else note.permissions,
+        embeddings=list(note.embeddings) if isinstance(note.embeddings, list) else note.embeddings,
+    )
+
+
 class NoteRepoFacadeABC(ABC):
     """Represents the ABC for note-operations which operate over multiple relations"""
     @property
@@ -69,6 +139,27 @@ class NoteRepoFacadeABC(ABC):
         """
         ...
 
+    @abstractmethod
+    async def import_notes(
+        self,
+        notes: List[NoteEntity],
+    ) -> List[NoteEntity | Exception]:
+        """bulk inserts a chunk of notes, e.g. of an imported notebook.
+        The contents are loaded with COPY and the embeddings are encoded in one batch.
+        Afterwards every author of the chunk reads the notes with `read_your_writes`
+        
+        Args:
+        -----
+        notes: `List[NoteEntity]`
+            the notes; embeddings are generated
+
+        Returns:
+        --------
+        `List[NoteEntity | Exception]`:
+            per note the inserted entity (updated ID), or the exception why it failed
+        """
+        ...
+
     @abstractmethod
     async def update(
         self,
@@ -115,6 +206,7 @@ class NoteRepoFacadeABC(ABC):
         self,
         note_id: int,
         ctx: UserContext,
+        projection: NoteProjection = NoteProjection(),
     ) -> Optional[NoteEntity]:
         """select a whole note by its ID
         
@@ -122,7 +214,8 @@ class NoteRepoFacadeABC(ABC):
         -----
         note_id: `int`
             the ID of the note
-
+        projection: `NoteProjection`
+            the parts of the note to fetch. Defaults to all parts
             
         Returns:
         --------
@@ -132,6 +225,30 @@ class NoteRepoFacadeABC(ABC):
         """
         ...
 
+    @abstractmethod
+    async def select_by_ids(
+        self,
+        note_ids: List[int],
+        ctx: UserContext,
+        projection: NoteProjection = NoteProjection(),
+    ) -> List[Optional[NoteEntity]]:
+        """select multiple notes by their IDs with a single query
+        
+        Args:
+        -----
+        note_ids: `List[int]`
+            the IDs of the notes
+        projection: `NoteProjection`
+            the parts of the notes to fetch. Defaults to all parts
+            
+        Returns:
+        --------
+        `List[Optional[NoteEntity]]`:
+            the notes in the order of `note_ids`; 
+            None for IDs which were not found
+        """
+        ...
+
     @abstractmethod
     async def search_notes(
         self, 
@@ -158,8 +275,89 @@ class NoteRepoFacadeABC(ABC):
         """
         ...
 
+    @abstractmethod
+    def plan_search(
+        self,
+        search_type: SearchType,
+        query: str,
+        time_budget: Optional[float] = None,
+    ) -> SearchPlan:
+        """resolve which search strategy will run for the query
+        
+        Args:
+        -----
+        search_type: `SearchType`
+            the requested type of search. `SearchType.AUTO` lets the planner decide
+        query: `str`
+            the search query
+        time_budget: `Optional[float]`
+            remaining seconds until the deadline of the request.
+            Expensive searches fall back to cheaper ones, when they would exceed it
+
+        Returns:
+        --------
+        `SearchPlan`:
+            the search type which should run and why
+        """
+        ...
+
+    @abstractmethod
+    def stream_search_notes(
+        self, 
+        search_type: SearchType,
+        query: str, 
+        ctx: UserContext,
+        pagination: Pagination
+    ) -> AsyncIterator[NoteEntity]:
+        """search notes according to the search type and stream 
+        the results while they arrive from the database
+        
+        Args:
+        -----
+        search_type: `SearchType`
+            the type of search to perform
+        query: `str`
+            the search query
+        pagination: `Pagination`
+            pagination parameters (limit, offset)
+
+        Yields:
+        -------
+        `NoteEntity`:
+            the matching notes, in ranking order
+        """
+        ...
+
+    @abstractmethod
+    def similar_notes(
+        self,
+        note_id: int,
+        ctx: UserContext,
+        limit: int,
+    ) -> AsyncIterator[NoteEntity]:
+        """stream the notes which are most similar to an existing note.
+        The stored embedding of the note is used, hence nothing is encoded
+        
+        Args:
+        -----
+        note_id: `int`
+            the ID of the note to find similar notes for
+        limit: `int`
+            the maximum amount of notes
+
+        Yields:
+        -------
+        `NoteEntity`:
+            the similar notes, most similar first
+        """
+        ...
+
 
 class NoteRepoFacade(NoteRepoFacadeABC):
+    # the connection pool of the queries of the facade itself; the sub repos 
+    # and search strategies declare their own
+    WORKLOAD: ClassVar[str] = Workload.OLTP
+
     def __init__(
         self, 
         db: Database,
@@ -167,15 +365,195 @@ class NoteRepoFacade(NoteRepoFacadeABC):
         embedding_repo: NoteEmbeddingRepo,
         permission_repo: NotePermissionRepo,
         logging_provider: LoggingProvider,
+        search_cache: Optional[SearchResultCache] = None,
+        search_planner: Optional[SearchPlanner] = None,
+        neighbour_repo: Optional[NoteNeighbourRepo] = None,
+        note_cache: Optional[NoteEntityCache] = None,
+        insert_window: Optional[float] = None,
+        max_insert_batch: int = 100,
     ):
-        self._db = db
+        """
+        Args:
+        -----
+        insert_window: `Optional[float]`
+            seconds in which concurrent inserts are collected and written together 
+            in one transaction (group commit). None writes every insert on its own
+        max_insert_batch: `int`
+            the maximum amount of notes per group commit
+        """
+        self._db = db.with_workload(self.WORKLOAD)
+        # imports run long transactions, which must not take the connections of the point queries
+        self._bulk_db = self._db.with_workload(Workload.BULK)
         self._content_repo = content_repo
         self._embedding_repo = embedding_repo
         self._permission_repo = permission_repo
+        self._search_cache = search_cache
+        self._search_planner = search_planner or SearchPlanner(embedding_repo.embedding_generator)
+        self._neighbour_repo = neighbour_repo
+        self._note_cache = note_cache
+        # the cache is invalidated by NOTIFYs of the primary, a lagging replica
+        # could put the old version back
+        self._load_db = self._db.primary() if note_cache is not None else self._db
+        # coalesce concurrent select_by_id calls, one loader per projection
+        self._note_loaders: Dict[NoteProjection, BatchLoader[int, NoteEntity]] = {}
+        self._insert_coalescer: Optional[WriteCoalescer[NoteEntity, NoteEntity]] = None
+        if insert_window is not None:
+            self._insert_coalescer = WriteCoalescer(
+                self._insert_many, self._insert_one, window=insert_window, max_batch_size=max_insert_batch
+            )
         self.log = logging_provider(__name__, self)
 
+    def _invalidate_note_cache(self, note_id: object) -> None:
+        """drops the cached note right away. Other processes are notified by the DB triggers"""
+        if self._note_cache is not None and isinstance(note_id, int):
+            self._note_cache.invalidate(note_id)
+
+    def _invalidate_search_cache(self, *user_ids: object) -> None:
+        """drops cached search results of the given users after their notes changed"""
+        if self._search_cache is None:
+            return
+        for user_id in user_ids:
+            if isinstance(user_id, int):
+                self._search_cache.invalidate_user(user_id)
+
     
     async def insert(self, note: NoteEntity):
+        # inserts inside of a unit of work of the caller have to stay in it
+        if self._insert_coalescer is None or self._db.in_transaction:
+            note = await self._insert_one(note)
+        else:
+            note = await self._insert_coalescer.write(note)
+            # the group commit ran outside of the read_your_writes context of the caller
+            await self._db.record_write()
+        self._invalidate_search_cache(note.author_id)
+        return note
+
+    async def _insert_one(self, note: NoteEntity) -> NoteEntity:
+        # encoding takes long, the transaction would hold its connection meanwhile
+        encoded = (await self._embedding_repo.encode_many([note]))[0] if note.content else None
+        # content, embedding, neighbours and permissions are written atomically
+        async with self._db.transaction():
+            return await self._insert(note, encoded)
+
+    async def import_notes(self, notes: List[NoteEntity]) -> List[NoteEntity | Exception]:
+        results: List[NoteEntity | Exception]
+        # encoded once, the notes are inserted one by one with the same embeddings when the chunk fails
+        encoded = await self._embedding_repo.encode_many([note for note in notes if note.content])
+        try:
+            results = list(await self._insert_many(notes, copy=True, encoded=encoded))
+        except Exception as e:
+            # find the notes which failed the chunk
+            self.log.warning(f"Import of {len(notes)} notes failed, inserting them one by one: {e}")
+            results = []
+            remaining = iter(encoded)
+            for note in notes:
+                note_encoded = next(remaining) if note.content else None
+                try:
+                    async with self._bulk_db.transaction():
+                        results.append(await self._insert(note, note_encoded))
+                except Exception as note_error:
+                    results.append(note_error)
+        # the transactions recorded the write for the `read_your_writes` key of the caller, 
+        # the other authors of the chunk have to see their notes as well
+        authors = {note.author_id for note in notes}
+        for author_id in authors - {current_consistency_key()}:
+            with read_your_writes(author_id):
+                await self._db.record_write()
+        self._invalidate_search_cache(*authors)
+        return results
+
+    async def _insert_many(
+        self, notes: List[NoteEntity], copy: bool = False, encoded: Optional[List[Tensor]] = None
+    ) -> List[NoteEntity]:
+        """inserts the notes in one transaction, with one statement per table.
+        Works on copies, since the notes are inserted one by one when it fails.
+
+        Args:
+        -----
+        copy: `bool`
+            whether contents and permissions are loaded with COPY, which is 
+            faster for large chunks than INSERT ... SELECT FROM unnest. 
+            Such imports run on the BULK pool
+        encoded: `Optional[List[Tensor]]`
+            the embeddings of the notes with content, from `encode_many`; generated when None
+        """
+        notes = [replace(note, embeddings=[]) for note in notes]
+        with_content = [note for note in notes if note.content]
+        if encoded is None:
+            # encoding a chunk takes long, the transaction would hold its locks and connection meanwhile
+            encoded = await self._embedding_repo.encode_many(with_content)
+        # the queries below use the connection of the unit of work, whichever view opened it
+        async with (self._bulk_db if copy else self._db).transaction():
+            # the IDs are drawn first, hence rows never have to be matched with RETURNING
+            records = await self._db.fetch(
+                "SELECT nextval(pg_get_serial_sequence($1, 'id')) AS id FROM generate_series(1, $2)",
+                self.content_table_name, len(notes)
+            )
+            for note, record in zip(notes, records):
+                note.note_id = record["id"]
+            if copy:
+                schema_name, _, table_name = self.content_table_name.rpartition(".")
+                await self._db.copy_records_to_table(
+                    table_name,
+                    records=[(note.note_id, note.title, note.content, note.updated_at, note.author_id) for note in notes],
+                    columns=["id", "title", "content", "updated_at", "author_id"],
+                    schema_name=schema_name or None,
+                )
+            else:
+                await self._db.execute(
+                    f"""
+                    INSERT INTO {self.content_table_name}(id, title, content, updated_at, author_id)
+                    SELECT * FROM unnest($1::bigint[], $2::text[], $3::text[], $4::timestamp[], $5::bigint[])
+                    """,
+                    [note.note_id for note in notes],
+                    [note.title for note in notes],
+                    [note.content for note in notes],
+                    [note.updated_at for note in notes],
+                    [note.author_id for note in notes],
+                )
+
+            embeddings = await self._embedding_repo.insert_many(with_content, encoded)
+            for note, embedding in zip(with_content, embeddings):
+                note.embeddings = [embedding]
+            if self._neighbour_repo is not None and embeddings:
+                await self._neighbour_repo.add_many([note.note_id for note in with_content], embeddings[0].model)
+
+            permissions: List[NotePermissionEntity] = []
+            for note in notes:
+                if isinstance(note.permissions, list):
+                    for permission in note.permissions:
+                        permission.note_id = note.note_id
+                        permissions.append(permission)
+                else:
+                    note.permissions = []
+            if permissions and copy:
+                schema_name, _, table_name = self.permission_table_name.rpartition(".")
+                await self._db.copy_records_to_table(
+                    table_name,
+                    records=[(permission.note_id, permission.role_id) for permission in permissions],
+                    columns=["note_id", "role_id"],
+                    schema_name=schema_name or None,
+                )
+            elif permissions:
+                await self._db.execute(
+                    f"""
+                    INSERT INTO {self.permission_table_name}(note_id, role_id)
+                    SELECT * FROM unnest($1::bigint[], $2::bigint[])
+                    """,
+                    [permission.note_id for permission in permissions],
+                    [permission.role_id for permission in permissions],
+                )
+        self.log.debug(f"Inserted {len(notes)} notes in one transaction")
+        return notes
+
+    async def _insert(self, note: NoteEntity, encoded: Optional[Tensor] = None) -> NoteEntity:
+        """inserts the note with one statement per row.
+
+        Args:
+        -----
+        encoded: `Optional[Tensor]`
+            the encoded note, generated when None
+        """
         # insert note itself
         query = f"""
         INSERT INTO {self.content_table_name}(title, content, updated_at, author_id)
@@ -199,9 +577,13 @@ class NoteRepoFacade(NoteRepoFacadeABC):
             embedding = await self._embedding_repo.insert(
                 note_id,
                 note.title if note.title else "",
-                note.content
+                note.content,
+                note.author_id,
+                encoded,
             )
             note.embeddings.append(embedding)
+            if self._neighbour_repo is not None:
+                await self._neighbour_repo.add(note_id, embedding.model)
 
         # insert permissions
         query = f"""
@@ -230,35 +612,81 @@ class NoteRepoFacade(NoteRepoFacadeABC):
         # add removed embeddings and permissions
         note_entity.embeddings = note.embeddings or []
         note_entity.permissions = note.permissions or []
+        self._invalidate_search_cache(ctx.user_id, note_entity.author_id)
+        self._invalidate_note_cache(note.note_id)
         return note_entity
 
     async def delete(self, note_id: int, ctx: UserContext) -> Optional[List[NoteEntity]]:
-        return await self._content_repo.delete(NoteEntity(note_id=note_id, author_id=ctx.user_id))
+        # notes which lose this note as neighbour through the cascade, need new neighbours
+        model = self._embedding_repo.embedding_generator.model_name
+        referencing: List[int] = []
+        async with self._db.transaction():
+            if self._neighbour_repo is not None:
+                referencing = await self._neighbour_repo.referencing(note_id, model)
+
+            deleted = await self._content_repo.delete(NoteEntity(note_id=note_id, author_id=ctx.user_id))
+
+            if self._neighbour_repo is not None:
+                for other_note_id in referencing:
+                    await self._neighbour_repo.recompute(other_note_id, model)
+        self._invalidate_search_cache(ctx.user_id)
+        self._invalidate_note_cache(note_id)
+        return deleted
     
-    async def select_by_id(self, note_id: int, ctx: UserContext) -> Optional[NoteEntity]:
-        record = await self._content_repo.select_by_id(note_id)
-        if not record:
-            return None
-        
-        # fetch embeddings
-        embeddings = await self._embedding_repo.select(
-            NoteEmbeddingEntity(
-                note_id=note_id,
-                model=UNDEFINED,
-                embedding=UNDEFINED,
-            )
-        )
-        record.embeddings = embeddings
-
-        # fetch permissions
-        permissions = await self._permission_repo.select(
-            NotePermissionEntity(
-                note_id=note_id,
-                role_id=UNDEFINED,
-            )
-        )
-        record.permissions = permissions
-        return record
+    async def select_by_id(
+        self, 
+        note_id: int, 
+        ctx: UserContext, 
+        projection: NoteProjection = NoteProjection(),
+    ) -> Optional[NoteEntity]:
+        if self._db.in_transaction or self._db.has_pending_writes:
+            # content, permissions and embeddings in one statement and therefore one snapshot.
+            # Neither cached nor batched, since both would miss uncommitted writes of this transaction
+            # (or writes of the `read_your_writes` key, which a replica may not have replayed yet)
+            record = await self._db.fetchrow_readonly(_select_note_query(projection), note_id)
+            if not record:
+                raise RuntimeError(f"Note with ID {note_id} not found")
+            return _note_from_record(record, projection)
+
+        cache = self._note_cache
+        if cache is not None:
+            cached = cache.get(note_id, projection)
+            if cached is not None:
+                return _copy_note(cached)
+            generation = cache.generation
+
+        note = await self._note_loader(projection).load(note_id)
+        if not note:
+            raise RuntimeError(f"Note with ID {note_id} not found")
+        if cache is not None:
+            cache.set(note_id, projection, _copy_note(note), generation)
+        # callers of the same batch get their own copy
+        return _copy_note(note)
+
+    def _note_loader(self, projection: NoteProjection) -> BatchLoader[int, NoteEntity]:
+        loader = self._note_loaders.get(projection)
+        if loader is None:
+            async def load_many(note_ids: List[int]) -> List[Optional[NoteEntity]]:
+                return await self._select_by_ids(note_ids, projection, self._load_db)
+            loader = self._note_loaders[projection] = BatchLoader(load_many)
+        return loader
+
+    async def select_by_ids(
+        self, 
+        note_ids: List[int], 
+        ctx: UserContext, 
+        projection: NoteProjection = NoteProjection(),
+    ) -> List[Optional[NoteEntity]]:
+        return await self._select_by_ids(note_ids, projection, self._db)
+
+    async def _select_by_ids(
+        self, note_ids: List[int], projection: NoteProjection, db: Database
+    ) -> List[Optional[NoteEntity]]:
+        if not note_ids:
+            return []
+        records = await db.fetch_readonly(_select_note_query(projection, many=True), note_ids)
+        by_id = {record["id"]: _note_from_record(record, projection) for record in records}
+        return [by_id.get(note_id) for note_id in note_ids]
 
     async def search_notes(
         self, 
@@ -267,6 +695,42 @@ class NoteRepoFacade(NoteRepoFacadeABC):
         ctx: UserContext,
         pagination: Pagination
     ) -> List[NoteEntity]:
+        return [
+            note async for note in self.stream_search_notes(
+                search_type, query, ctx, pagination
+            )
+        ]
+
+    def plan_search(
+        self,
+        search_type: SearchType,
+        query: str,
+        time_budget: Optional[float] = None,
+    ) -> SearchPlan:
+        plan = self._search_planner.plan(search_type, query, time_budget)
+        if plan.search_type != search_type:
+            self.log.debug(f"Planned {plan.search_type} instead of {search_type}: {plan.reason}")
+        return plan
+
+    async def stream_search_notes(
+        self, 
+        search_type: SearchType,
+        query: str, 
+        ctx: UserContext,
+        pagination: Pagination
+    ) -> AsyncIterator[NoteEntity]:
+        if search_type == SearchType.AUTO:
+            search_type = self.plan_search(search_type, query).search_type
+
+        cache_key = None
+        if self._search_cache is not None:
+            cache_key = self._search_cache.key(ctx.user_id, search_type, query, pagination)
+            cached_notes = self._search_cache.get(cache_key)
+            if cached_notes is not None:
+                # copies, a caller which changes a result must not change the cache
+                for note in cached_notes:
+                    yield _copy_note(note)
+                return
 
         # these parameters are common to all strategies __init__ fn
         common_init_parameters = {
@@ -291,13 +755,45 @@ class NoteRepoFacade(NoteRepoFacadeABC):
         else: 
             raise ValueError(f"Unknown SearchType: {search_type}")
 
-        note_entities = await strategy.search()
-        return note_entities
-
-
+        # close the strategies cursor also when the consumer stops early
+        notes = strategy.search()
+        streamed_notes: List[NoteEntity] = []
+        async with aclosing(notes):
+            async for note in notes:
+                streamed_notes.append(_copy_note(note))
+                yield note
 
+        # only complete results are cached. A consumer which stopped early never gets here
+        if cache_key is not None and self._search_cache is not None:
+            self._search_cache.set(cache_key, streamed_notes)
 
+    async def similar_notes(
+        self,
+        note_id: int,
+        ctx: UserContext,
+        limit: int,
+    ) -> AsyncIterator[NoteEntity]:
+        strategy_parameters = {
+            "db": self._db,
+            "note_id": note_id,
+            "model": self._embedding_repo.embedding_generator.model_name,
+            "limit": limit,
+            "user_id": ctx.user_id,
+        }
 
-    
-
-    
\ No newline at end of file
+        # precomputed neighbours are preferred. Notes from before the table 
+        # existed, or limits above k, use the ANN index instead
+        found = False
+        if self._neighbour_repo is not None and limit <= self._neighbour_repo.k:
+            notes = PrecomputedSimilarNoteSearchStrategy(**strategy_parameters).search()
+            async with aclosing(notes):
+                async for note in notes:
+                    found = True
+                    yield note
+        if found:
+            return
+
+        notes = SimilarNoteSearchStrategy(**strategy_parameters).search()
+        async with aclosing(notes):
+            async for note in notes:
+                yield note
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import logging
+import sys
+from typing import Hashable, Optional, Set, Tuple
+
+from src.api.undefined import UNDEFINED
+from src.db.database import DatabaseABC
+from src.db.entities import NoteEntity
+from src.utils import CacheStats, TTLCache
+
+
+# channel of the NOTIFY issued by the triggers on note.content, note.permission and note.embedding.
+# The payload is the ID of the changed note
+NOTE_CHANGED_CHANNEL = "note_changed"
+
+type NoteCacheKey = Tuple[int, Hashable]
+
+
+def _note_sizeof(note: NoteEntity) -> int:
+    """rough estimation of the memory used by a cached note"""
+    size = sys.getsizeof(note) + len(note.title or "") + len(note.content or "")
+    if isinstance(note.embeddings, list):
+        for embedding in note.embeddings:
+            size += 8 * len(embedding.embedding or [])
+    return size
+
+
+class NoteEntityCache:
+    """
+    Caches assembled notes per note ID and projection.
+
+    Changes of other processes arrive as NOTIFY on `NOTE_CHANGED_CHANNEL`,
+    once `subscribe` was awaited. When the listener connection is lost,
+    the cache disables itself, since it could serve stale notes from then on.
+
+    Every invalidation increases the generation, and the cache remembers
+    the generation of the latest invalidation per note. A note is not stored,
+    when it was invalidated after the generation its load started in, so a
+    load which raced with a change of that note can not put the old version
+    into the cache. Loads of other notes are not affected.
+
+    Only the latest `max_entries` invalidated notes are remembered. Loads
+    which started before the generation of a forgotten note are not stored.
+    """
+    def __init__(self, max_entries: int = 4096, ttl: float = 60.0):
+        self._cache: TTLCache[NoteCacheKey, NoteEntity] = TTLCache(
+            max_entries=max_entries,
+            ttl=ttl,
+            sizeof=_note_sizeof,
+        )
+        self._projections: Set[Hashable] = set()
+        self._generation = 0
+        # note_id -> generation of its latest invalidation, the oldest first
+        self._invalidated: OrderedDict[int, int] = OrderedDict()
+        self._max_invalidated = max_entries
+        # loads which started before this generation are not stored
+        self._oldest_storable = 0
+        self._enabled = True
+        self._log = logging.getLogger(__name__)
+
+    @property
+    def generation(self) -> int:
+        """increases with every invalidation; read it before a load and pass it to `set`"""
+        return self._generation
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def get(self, note_id: int, projection: Hashable) -> Optional[NoteEntity]:
+        if not self._enabled:
+            return None
+        note = self._cache.get((note_id, projection))
+        if note is UNDEFINED:
+            return None
+        return note
+
+    def set(self, note_id: int, projection: Hashable, note: NoteEntity, generation: int) -> None:
+        """stores the note, if it was not invalidated since `generation`"""
+        if not self._enabled or generation < self._oldest_storable:
+            return
+        if self._invalidated.get(note_id, 0) > generation:
+            return
+        self._projections.add(projection)
+        self._cache.set((note_id, projection), note)
+
+    def invalidate(self, note_id: int) -> None:
+        """drops all cached projections of the note"""
+        self._generation += 1
+        self._invalidated.pop(note_id, None)
+        self._invalidated[note_id] = self._generation
+        if len(self._invalidated) > self._max_invalidated:
+            _, forgotten = self._invalidated.popitem(last=False)
+            self._oldest_storable = forgotten
+        for projection in self._projections:
+            self._cache.pop((note_id, projection))
+
+    def disable(self) -> None:
+        """stops caching, e.g. when invalidations can not be received anymore"""
+        self._enabled = False
+        self._generation += 1
+        self._oldest_storable = self._generation
+        self._invalidated.clear()
+        self._cache.clear()
+
+    async def subscribe(self, db: DatabaseABC) -> None:
+        """invalidates notes on NOTIFY of the note triggers, also for changes of other processes"""
+        def on_notify(payload: str) -> None:
+            try:
+                self.invalidate(int(payload))
+            except ValueError:
+                self._log.warning(f"Unexpected payload on {NOTE_CHANGED_CHANNEL}: {payload!r}")
+
+        def on_terminate() -> None:
+            self._log.warning("Lost the listener connection - disabling the note cache")
+            self.disable()
+
+        await db.listen(NOTE_CHANGED_CHANNEL, on_notify, on_terminate=on_terminate)
+
+    def stats(self) -> CacheStats:
+        """hit ratio, entries and estimated memory use of the cache"""
+        return self._cache.stats()
@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import ClassVar, List
 
 from asyncpg import Record
 from src.db.entities import NotePermissionEntity
+from src.db.pool import Workload
 from src.db.table import TableABC
 
 from src.utils import asdict
@@ -92,8 +93,11 @@ class NotePermissionRepo(ABC):
 
 class NotePermissionPostgresRepo(NotePermissionRepo):
     """Provides an implementation using Postgres as the backend database"""
+    # the connection pool the queries of the repo use
+    WORKLOAD: ClassVar[str] = Workload.OLTP
+
     def __init__(self, table: TableABC[List[Record]]):
-        self._table = table
+        self._table = table.with_workload(self.WORKLOAD)
 
     async def insert(self, permission: NotePermissionEntity) -> NotePermissionEntity:
         record = await self._table.insert(asdict(permission))
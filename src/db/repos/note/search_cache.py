@@ -0,0 +1,119 @@
+import itertools
+import sys
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from src.api.types import Pagination
+from src.api.undefined import UNDEFINED
+from src.db.entities import NoteEntity
+from src.db.repos.note.search_strategy import SearchType
+from src.utils import CacheStats, TTLCache
+
+
+type SearchCacheKey = Tuple[int, int, SearchType, str, int, int]
+
+
+def _notes_sizeof(notes: Tuple[NoteEntity, ...]) -> int:
+    """rough estimation of the memory used by a cached search result"""
+    size = sys.getsizeof(notes)
+    for note in notes:
+        size += sys.getsizeof(note)
+        size += len(note.title or "") + len(note.content or "")
+    return size
+
+
+class SearchResultCache:
+    """
+    Caches search results per user, search type, normalised query and page.
+
+    Every user has a generation, which is part of the cache key. Writes to 
+    notes of a user give it a new generation, so that all cached results of 
+    that user become unreachable at once. The stale entries leave the cache 
+    through LRU eviction or their TTL.
+
+    Generations are only kept for users, which were invalidated within the
+    last TTL. Afterwards all entries of older generations have expired, and 
+    the user falls back to generation 0. Since results are only cached for
+    the current generation and generations are never reused, no stale result
+    becomes reachable again.
+    """
+    def __init__(
+        self, 
+        max_entries: int = 1024, 
+        ttl: float = 30.0, 
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._cache: TTLCache[SearchCacheKey, Tuple[NoteEntity, ...]] = TTLCache(
+            max_entries=max_entries,
+            ttl=ttl,
+            sizeof=_notes_sizeof,
+            clock=clock,
+        )
+        self._ttl = ttl
+        self._clock = clock
+        # user_id -> (generation, invalidated_at), ordered by invalidated_at
+        self._generations: Dict[int, Tuple[int, float]] = {}
+        self._next_generation = itertools.count(1)
+
+    @staticmethod
+    def normalise_query(query: str) -> str:
+        """lowercases the query and collapses whitespace. 
+        All search strategies are case insensitive."""
+        return " ".join(query.lower().split())
+
+    def key(
+        self, 
+        user_id: int, 
+        search_type: SearchType, 
+        query: str, 
+        pagination: Pagination
+    ) -> SearchCacheKey:
+        """creates the cache key for a search with the current generation of the user"""
+        return (
+            user_id,
+            self._generation(user_id),
+            search_type,
+            self.normalise_query(query),
+            pagination.limit,
+            pagination.offset,
+        )
+
+    def get(self, key: SearchCacheKey) -> Optional[Tuple[NoteEntity, ...]]:
+        notes = self._cache.get(key)
+        if notes is UNDEFINED:
+            return None
+        return notes
+
+    def set(self, key: SearchCacheKey, notes: Sequence[NoteEntity]) -> None:
+        user_id, generation, *_ = key
+        # the notes of a search, which started before an invalidation, may be stale
+        if generation != self._generation(user_id):
+            return
+        self._cache.set(key, tuple(notes))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """makes all cached results of the user unreachable"""
+        now = self._clock()
+        self._generations.pop(user_id, None)
+        self._generations[user_id] = (next(self._next_generation), now)
+        self._prune_generations(now)
+
+    def _generation(self, user_id: int) -> int:
+        generation, _ = self._generations.get(user_id, (0, 0.0))
+        return generation
+
+    def _prune_generations(self, now: float) -> None:
+        while self._generations:
+            user_id, (_, invalidated_at) = next(iter(self._generations.items()))
+            if invalidated_at + self._ttl > now:
+                break
+            del self._generations[user_id]
+
+    @property
+    def tracked_users(self) -> int:
+        """amount of users, whose generation is kept"""
+        return len(self._generations)
+
+    def stats(self) -> CacheStats:
+        """hit ratio, entries and estimated memory use of the cache"""
+        return self._cache.stats()
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from src.ai.embedding_generator import EmbeddingGeneratorABC
+from src.db.repos.note.search_strategy import SearchType
+
+
+@dataclass(frozen=True)
+class SearchPlan:
+    """The search type which will actually run, and why it was chosen"""
+    search_type: SearchType
+    reason: str
+
+
+class SearchPlanner:
+    """
+    Picks the search strategy for a query.
+
+    `SearchType.AUTO` is resolved by looking at the query: empty queries 
+    list the latest notes, short queries use full text search and longer
+    ones the semantic context search.
+
+    A context search (requested or planned) falls back to the trigram 
+    search, when the expected duration of the embedding generation plus 
+    the vector query exceeds the remaining time budget of the request.
+    """
+    def __init__(
+        self,
+        generator: EmbeddingGeneratorABC,
+        short_query_words: int = 1,
+        vector_query_latency: float = 0.02,
+    ):
+        """
+        Args:
+        -----
+        generator: `EmbeddingGeneratorABC`
+            the generator used by the context search. The encodes waiting 
+            for its worker and its recent latency are used to estimate the 
+            duration of an encode
+        short_query_words: `int`
+            queries with at most this amount of words use full text search
+        vector_query_latency: `float`
+            expected duration of the vector query itself in seconds
+        """
+        self._generator = generator
+        self._short_query_words = short_query_words
+        self._vector_query_latency = vector_query_latency
+
+    def estimate_context_search(self) -> float:
+        """estimated duration of a context search in seconds"""
+        encode_latency = self._generator.recent_latency
+        return (self._generator.pending + 1) * encode_latency + self._vector_query_latency
+
+    def plan(
+        self, 
+        search_type: SearchType, 
+        query: str, 
+        time_budget: Optional[float] = None
+    ) -> SearchPlan:
+        """resolves the search type which should run
+
+        Args:
+        -----
+        search_type: `SearchType`
+            the requested search type
+        query: `str`
+            the search query
+        time_budget: `Optional[float]`
+            remaining seconds until the deadline of the request, 
+            or None when there is no deadline
+
+        Returns:
+        --------
+        `SearchPlan`:
+            the search type to run and the reason
+        """
+        plan = SearchPlan(search_type, "requested")
+        if search_type == SearchType.AUTO:
+            words = query.split()
+            if not words:
+                plan = SearchPlan(SearchType.NO_SEARCH, "empty query")
+            elif len(words) <= self._short_query_words:
+                plan = SearchPlan(SearchType.FULL_TEXT_TITLE, "short query")
+            else:
+                plan = SearchPlan(SearchType.CONTEXT, "long query")
+
+        if plan.search_type == SearchType.CONTEXT and time_budget is not None:
+            estimate = self.estimate_context_search()
+            if estimate > time_budget:
+                plan = SearchPlan(
+                    SearchType.FUZZY,
+                    f"context search needs ~{estimate * 1000:.0f}ms, "
+                    f"but only {time_budget * 1000:.0f}ms are left"
+                )
+        return plan
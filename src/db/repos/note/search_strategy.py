@@ -1,16 +1,28 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import List, Self
+from enum import Enum
+from typing import AsyncIterator, ClassVar, List, Optional, Self
 
 from asyncpg import Record
 from src.ai.embedding_generator import EmbeddingGenerator, EmbeddingGeneratorABC, Models
 from src.db.database import Database, DatabaseABC
+from src.db.pool import Workload
 from src.db.entities import NoteEntity
 from src.db import TableABC
 
 
+class SearchType(Enum):
+    NO_SEARCH = 1
+    FULL_TEXT_TITLE = 2
+    FUZZY = 3
+    CONTEXT = 4
+    AUTO = 5  # resolved by the SearchPlanner
+
+
 class NoteSearchStrategy(ABC):
     """Represents a strategy for searching notes."""
+    # the connection pool the queries of the strategy use
+    WORKLOAD: ClassVar[str] = Workload.SEARCH
 
     def __init__(
         self,
@@ -20,7 +32,7 @@ class NoteSearchStrategy(ABC):
         offset: int,
         user_id: int,
     ) -> None:
-        self.db = db
+        self.db = db.with_workload(self.WORKLOAD)
         self.query = query
         self.limit = limit
         self.offset = offset
@@ -61,30 +73,52 @@ class NoteSearchStrategy(ABC):
         return self
     
     @abstractmethod
-    async def search(self) -> list["NoteEntity"]:
+    def search(self) -> AsyncIterator["NoteEntity"]:
         """Searches for notes based on the provided query.
 
+        The notes are streamed as soon as their rows arrive from the 
+        database, instead of materializing the whole result first.
+        Closing the iterator early stops the scan in the database.
+
+        Yields:
+        -------
+        `NoteEntity`:
+            the notes matching the search criteria, in ranking order.
+        """
+        ...
+
+    async def _iterate_notes(
+        self, 
+        query: str, 
+        *args: object, 
+        not_found_message: Optional[str] = None,
+    ) -> AsyncIterator["NoteEntity"]:
+        """Streams the given query and converts each row to a `NoteEntity`.
+
         Args:
         -----
         query: `str`
-            The search query.
-        limit: `int`
-            The maximum number of results to return.
-        offset: `int`
-            The number of results to skip.
-
-        Returns:
-        --------
-        `list[NoteEntity]`:
-            A list of notes matching the search criteria.
+            the SQL query to stream
+        args: `object`
+            the values for the placeholders of the query
+        not_found_message: `Optional[str]`
+            when set, a `RuntimeError` with this message is raised 
+            if the query did not return a single row
         """
-        ...
+        found = False
+        async for record in self.db.iterate(query, *args):
+            found = True
+            yield NoteEntity.from_record(record)
+        if not found and not_found_message:
+            raise RuntimeError(not_found_message)
 
 
 class DateNoteSearchStrategy(NoteSearchStrategy):
     """Return notes sorted by date (most recent first)."""
+    # an index scan of one author, as cheap as a point lookup
+    WORKLOAD = Workload.OLTP
     
-    async def search(self) -> list["NoteEntity"]:
+    async def search(self) -> AsyncIterator["NoteEntity"]:
         query = f"""
         SELECT id, title, author_id, content, updated_at
         FROM note.content
@@ -93,10 +127,8 @@ class DateNoteSearchStrategy(NoteSearchStrategy):
         LIMIT {self.limit}
         OFFSET {self.offset};
         """
-        records = await self.db.fetch(query, self.user_id)
-        if not records:
-            return []
-        return [NoteEntity.from_record(record) for record in records]
+        async for note in self._iterate_notes(query, self.user_id):
+            yield note
 
 
 class WebNoteSearchStrategy(NoteSearchStrategy):
@@ -105,7 +137,7 @@ class WebNoteSearchStrategy(NoteSearchStrategy):
     Title is also fuzzy searched
     """
     
-    async def search(self) -> list["NoteEntity"]:
+    async def search(self) -> AsyncIterator["NoteEntity"]:
         query = f"""
         SELECT id, title, author_id, content, updated_at,
             ts_rank(
@@ -120,16 +152,17 @@ class WebNoteSearchStrategy(NoteSearchStrategy):
         LIMIT {self.limit}
         OFFSET {self.offset};
         """
-        records = await self.db.fetch(query, self.query, self.user_id)
-        if not records:
-            raise RuntimeError("Failed to fetch notes by exact title.")
-        return [NoteEntity.from_record(record) for record in records]
+        async for note in self._iterate_notes(
+            query, self.query, self.user_id,
+            not_found_message="Failed to fetch notes by exact title."
+        ):
+            yield note
     
 
 class FuzzyTitleContentSearchStrategy(NoteSearchStrategy):
     """Return notes where the title or content is similar to the query"""
     
-    async def search(self) -> list["NoteEntity"]:
+    async def search(self) -> AsyncIterator["NoteEntity"]:
         query = f"""
         SELECT id, title, author_id, content, updated_at
         FROM note.content
@@ -138,10 +171,11 @@ class FuzzyTitleContentSearchStrategy(NoteSearchStrategy):
         LIMIT {self.limit}
         OFFSET {self.offset};
         """
-        records = await self.db.fetch(query, self.query, self.user_id)
-        if not records:
-            raise RuntimeError("Failed to fetch notes by fuzzy title/content.")
-        return [NoteEntity.from_record(record) for record in records]
+        async for note in self._iterate_notes(
+            query, self.query, self.user_id,
+            not_found_message="Failed to fetch notes by fuzzy title/content."
+        ):
+            yield note
 
 
 class ContextNoteSearchStrategy(NoteSearchStrategy):
@@ -150,24 +184,83 @@ class ContextNoteSearchStrategy(NoteSearchStrategy):
         super().__init__(db, query, limit, offset, user_id)
         self.generator = generator
 
-    async def search(self) -> list["NoteEntity"]:
+    async def search(self) -> AsyncIterator["NoteEntity"]:
         model = Models.MINI_LM_L6_V2
         query = f"""
-        SELECT id, title, author_id, content, updated_at, (embedding <=> $1::vector) AS similarity
+        SELECT id, title, note.content.author_id, content, updated_at, (embedding <=> $1::vector) AS similarity
         FROM note.embedding
         JOIN 
             note.content on note.content.id = note.embedding.note_id 
             AND note.embedding.model = $2
             AND note.content.author_id = {self.user_id}
+        -- prunes note.embedding to the partition (and HNSW index) of the author
+        WHERE note.embedding.author_id = {self.user_id}
         ORDER BY similarity ASC
         LIMIT {self.limit}
         OFFSET {self.offset}
         """
-        query_embedding = self.generator.generate(self.query)
+        query_embedding = await self.generator.generate_async(self.query)
         query_embedding_str = self.generator.tensor_to_str_vec(query_embedding)
-        start = datetime.now()
-        records = await self.db.fetch(query, query_embedding_str, model.value)
+        async for note in self._iterate_notes(
+            query, query_embedding_str, model.value,
+            not_found_message="Failed to fetch notes by context."
+        ):
+            yield note
+
+class SimilarNoteSearchStrategy(NoteSearchStrategy):
+    """
+    Return notes which are semantically similar to an existing note.
+    The stored embedding of that note is used for an ANN lookup, 
+    hence no embedding is generated.
+    """
+    def __init__(self, db: DatabaseABC, note_id: int, model: str, limit: int, user_id: int) -> None:
+        super().__init__(db, query="", limit=limit, offset=0, user_id=user_id)
+        self.note_id = note_id
+        self.model = model
 
-        if not records:
-            raise RuntimeError("Failed to fetch notes by context.")
-        return [NoteEntity.from_record(record) for record in records]
\ No newline at end of file
+    async def search(self) -> AsyncIterator["NoteEntity"]:
+        # the source note has to be owned by the user as well
+        source_embedding = """
+            SELECT source_embedding.embedding
+            FROM note.embedding AS source_embedding
+            JOIN note.content AS source_content 
+                ON source_content.id = source_embedding.note_id 
+                AND source_content.author_id = $2
+            WHERE source_embedding.note_id = $1 AND source_embedding.model = $3 AND source_embedding.author_id = $2
+        """
+        query = f"""
+        SELECT id, title, note.content.author_id, content, updated_at
+        FROM note.embedding
+        JOIN 
+            note.content on note.content.id = note.embedding.note_id 
+            AND note.embedding.model = $3
+            AND note.content.author_id = $2
+        WHERE 
+            note.embedding.author_id = $2
+            AND note.embedding.note_id <> $1
+            AND EXISTS ({source_embedding})
+        ORDER BY embedding <=> ({source_embedding})
+        LIMIT {self.limit}
+        """
+        async for note in self._iterate_notes(query, self.note_id, self.user_id, self.model):
+            yield note
+
+
+class PrecomputedSimilarNoteSearchStrategy(SimilarNoteSearchStrategy):
+    """Return notes which are similar to an existing note from the precomputed note.neighbour table"""
+    # a primary key lookup in note.neighbour
+    WORKLOAD = Workload.OLTP
+
+    async def search(self) -> AsyncIterator["NoteEntity"]:
+        query = f"""
+        SELECT id, title, author_id, content, updated_at
+        FROM note.neighbour
+        JOIN 
+            note.content on note.content.id = note.neighbour.neighbour_id 
+            AND note.content.author_id = $2
+        WHERE note.neighbour.note_id = $1 AND note.neighbour.model = $3
+        ORDER BY note.neighbour.distance ASC
+        LIMIT {self.limit}
+        """
+        async for note in self._iterate_notes(query, self.note_id, self.user_id, self.model):
+            yield note
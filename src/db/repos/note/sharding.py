@@ -0,0 +1,381 @@
+"""Notes spread over multiple Postgres servers by author.
+
+Every author lives on exactly one shard, chosen by consistent hashing of the
+author ID. All search strategies are scoped to one author, so every search
+runs on a single shard - there is no scatter-gather. Only lookups by note ID
+do not know the author; they try the shard of the requesting user first and
+ask the other shards for the IDs which were not found there.
+
+Note IDs stay unique over all shards: the ID sequence of the shard with
+number `n` only hands out IDs with `id % ID_STRIDE == n` (see `prepare_shard`).
+Moved notes keep their ID. With 64 bit IDs every shard has about
+2^63 / ID_STRIDE ≈ 1.4 * 10^17 IDs; `prepare_shard` refuses 32 bit sequences
+and warns when fewer than `MIN_NOTE_ID_HEADROOM` IDs are left.
+
+Users and roles are not sharded, so the foreign keys of the note tables to
+them are dropped on the shards. Deleting a user does therefore not cascade
+to the notes of the user on the shards.
+"""
+import asyncio
+from dataclasses import dataclass
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+from src.api.types import Pagination
+from src.db.database import Database
+from src.db.entities import NoteEntity
+from src.db.repos.note.note import NoteProjection, NoteRepoFacadeABC, UserContext
+from src.db.repos.note.search_planner import SearchPlan
+from src.db.repos.note.search_strategy import SearchType
+from src.utils import HashRing
+
+log = logging.getLogger(__name__)
+
+# the maximum amount of shards; every shard uses every ID_STRIDE-th note ID
+ID_STRIDE = 64
+# note IDs a shard has left, below which `prepare_shard` warns
+MIN_NOTE_ID_HEADROOM = 10_000_000
+
+# constraints which would reference users and roles on the same server
+_CROSS_SHARD_FOREIGN_KEYS = {
+    "note.content": "content_author_id_fkey",
+    "note.permission": "permission_role_id_fkey",
+}
+
+
+@dataclass(frozen=True, eq=False)
+class Shard:
+    """
+    One Postgres server with notes.
+
+    `name` places the shard on the hash ring, `number` selects its note IDs.
+    Both have to stay the same for the lifetime of the shard.
+    """
+    name: str
+    number: int
+    db: Database
+    # the repo of the notes on this shard; not needed to prepare or rebalance
+    repo: Optional[NoteRepoFacadeABC] = None
+
+    def __post_init__(self):
+        if not 0 <= self.number < ID_STRIDE:
+            raise ValueError(f"Shard number has to be in [0, {ID_STRIDE}); got {self.number}")
+
+
+def shard_ring(shards: Sequence[Shard], vnodes: int = 128) -> HashRing[str]:
+    """the ring of the shard names. Server and rebalancing tool have to use the same vnodes"""
+    return HashRing([shard.name for shard in shards], vnodes=vnodes)
+
+
+async def prepare_shard(shard: Shard) -> int:
+    """drops the foreign keys to users and roles and lets the note ID sequence
+    hand out only the IDs of the shard. Idempotent; concurrent calls are serialized
+
+    Returns:
+    --------
+    `int`:
+        the note IDs the shard has left. Inserts fail once they are used up
+
+    Raises:
+    -------
+    `RuntimeError`:
+        if the note IDs have 32 bit, i.e. the migrations were not applied
+    """
+    async with shard.db.transaction():
+        await shard.db.execute("SELECT pg_advisory_xact_lock(hashtext('prepare_shard'))")
+        for table, constraint in _CROSS_SHARD_FOREIGN_KEYS.items():
+            await shard.db.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+
+        sequence = await shard.db.fetchrow(
+            "SELECT data_type::text AS data_type, increment_by FROM pg_sequences "
+            "WHERE schemaname = 'note' AND sequencename = 'content_id_seq'"
+        )
+        if sequence["data_type"] != "bigint":
+            raise RuntimeError(
+                f"Note IDs of shard {shard.name} are {sequence['data_type']}, which leaves "
+                f"a shard only 2^31 / {ID_STRIDE} IDs; apply the migration 0004_note_id_bigint"
+            )
+        if sequence["increment_by"] != ID_STRIDE:
+            await _stride_note_ids(shard)
+
+        headroom = (await shard.db.fetchrow(f"""
+            SELECT (s.max_value - used.last_value) / {ID_STRIDE} AS headroom
+            FROM pg_sequences AS s, note.content_id_seq AS used
+            WHERE s.schemaname = 'note' AND s.sequencename = 'content_id_seq'
+        """))["headroom"]
+    if headroom < MIN_NOTE_ID_HEADROOM:
+        log.warning(f"Shard {shard.name} has only {headroom} note IDs left")
+    return headroom
+
+
+async def _stride_note_ids(shard: Shard) -> None:
+    """lets the note ID sequence hand out every ID_STRIDE-th ID, starting at the shard number"""
+    # continue above every ID which was handed out before
+    await shard.db.execute(f"""
+        SELECT setval('note.content_id_seq', top - top % {ID_STRIDE} + {shard.number}
+            + CASE WHEN top % {ID_STRIDE} >= {shard.number} THEN {ID_STRIDE} ELSE 0 END, false)
+        FROM (
+            SELECT greatest(
+                (SELECT coalesce(max(id), 0) FROM note.content),
+                (SELECT last_value FROM note.content_id_seq)
+            ) AS top
+        ) AS used
+    """)
+    await shard.db.execute(f"ALTER SEQUENCE note.content_id_seq INCREMENT BY {ID_STRIDE}")
+
+
+async def move_author(author_id: int, source: Shard, target: Shard) -> int:
+    """copies the notes of an author with embeddings, permissions and neighbours
+    from `source` to `target`, and deletes them on `source` afterwards.
+
+    The copy is committed on `target` before anything is deleted, so a failed
+    move can be repeated. Notes which are written on `source` while the author
+    is moved stay there; move authors after the ring sends their writes to `target`.
+
+    Returns:
+    --------
+    `int`:
+        the amount of moved notes
+    """
+    async with source.db.transaction(readonly=True, isolation="repeatable_read"):
+        contents = await source.db.fetch(
+            "SELECT id, title, content, updated_at, author_id FROM note.content WHERE author_id = $1",
+            author_id,
+        )
+        note_ids = [record["id"] for record in contents]
+        embeddings = await source.db.fetch(
+            "SELECT note_id, model, embedding::text AS embedding FROM note.embedding WHERE note_id = ANY($1::bigint[])",
+            note_ids,
+        )
+        permissions = await source.db.fetch(
+            "SELECT note_id, role_id FROM note.permission WHERE note_id = ANY($1::bigint[])",
+            note_ids,
+        )
+        neighbours = await source.db.fetch(
+            "SELECT note_id, model, neighbour_id, distance FROM note.neighbour WHERE note_id = ANY($1::bigint[])",
+            note_ids,
+        )
+    if not contents:
+        return 0
+
+    def column(records: List, name: str) -> List:
+        return [record[name] for record in records]
+
+    async with target.db.transaction():
+        await target.db.execute(
+            """
+            INSERT INTO note.content (id, title, content, updated_at, author_id)
+            SELECT * FROM unnest($1::bigint[], $2::text[], $3::text[], $4::timestamp[], $5::bigint[])
+            ON CONFLICT DO NOTHING
+            """,
+            *(column(contents, name) for name in ("id", "title", "content", "updated_at", "author_id")),
+        )
+        await target.db.execute(
+            """
+            INSERT INTO note.embedding (note_id, model, embedding, author_id)
+            SELECT note_id, model, embedding::vector, $4
+            FROM unnest($1::bigint[], $2::text[], $3::text[]) AS e(note_id, model, embedding)
+            ON CONFLICT DO NOTHING
+            """,
+            *(column(embeddings, name) for name in ("note_id", "model", "embedding")),
+            author_id,
+        )
+        await target.db.execute(
+            """
+            INSERT INTO note.permission (note_id, role_id)
+            SELECT * FROM unnest($1::bigint[], $2::bigint[])
+            ON CONFLICT DO NOTHING
+            """,
+            *(column(permissions, name) for name in ("note_id", "role_id")),
+        )
+        await target.db.execute(
+            """
+            INSERT INTO note.neighbour (note_id, model, neighbour_id, distance)
+            SELECT * FROM unnest($1::bigint[], $2::text[], $3::bigint[], $4::real[])
+            ON CONFLICT DO NOTHING
+            """,
+            *(column(neighbours, name) for name in ("note_id", "model", "neighbour_id", "distance")),
+        )
+
+    # embeddings, permissions and neighbours are deleted by the cascade
+    await source.db.execute(
+        "DELETE FROM note.content WHERE author_id = $1 AND id = ANY($2::bigint[])", author_id, note_ids
+    )
+    return len(contents)
+
+
+async def rebalance(shards: Sequence[Shard], ring: Optional[HashRing[str]] = None) -> Dict[int, str]:
+    """moves every author, which is not on its shard of the ring, to that shard.
+    Run it after shards were added or removed.
+
+    Returns:
+    --------
+    `Dict[int, str]`:
+        the moved authors and the name of their new shard
+    """
+    ring = ring or shard_ring(shards)
+    by_name = {shard.name: shard for shard in shards}
+    moved: Dict[int, str] = {}
+    for source in shards:
+        records = await source.db.primary().fetch_readonly("SELECT DISTINCT author_id FROM note.content")
+        for record in records:
+            target = by_name[ring.node_for(record["author_id"])]
+            if target is not source:
+                await move_author(record["author_id"], source, target)
+                moved[record["author_id"]] = target.name
+    return moved
+
+
+class ShardedNoteRepoFacade(NoteRepoFacadeABC):
+    """
+    Routes every call to the `NoteRepoFacade` of the shard of the author.
+
+    Writes, searches and similar notes use the author of the note or the
+    user of the context. Lookups by ID start at the shard of the user.
+
+    Example:
+    ```py
+    shards = [Shard("a", 0, db_a, repo_a), Shard("b", 1, db_b, repo_b)]
+    for shard in shards:
+        await prepare_shard(shard)
+    repo = ShardedNoteRepoFacade(shards)
+    ```
+    """
+    def __init__(self, shards: Sequence[Shard], ring: Optional[HashRing[str]] = None):
+        if not shards:
+            raise ValueError("At least one shard is needed")
+        if len({shard.number for shard in shards}) != len(shards):
+            raise ValueError("Shard numbers have to be unique")
+        if any(shard.repo is None for shard in shards):
+            raise ValueError("Every shard needs a repo")
+        self._shards: Dict[str, Shard] = {shard.name: shard for shard in shards}
+        self._ring = ring or shard_ring(shards)
+
+    @property
+    def shards(self) -> List[Shard]:
+        return list(self._shards.values())
+
+    def shard_for(self, author_id: int) -> Shard:
+        return self._shards[self._ring.node_for(author_id)]
+
+    def _repo(self, author_id: int) -> NoteRepoFacadeABC:
+        return self.shard_for(author_id).repo  # type: ignore[return-value]
+
+    async def insert(self, note: NoteEntity) -> NoteEntity:
+        return await self._repo(note.author_id).insert(note)
+
+    async def import_notes(self, notes: List[NoteEntity]) -> List[NoteEntity | Exception]:
+        # one chunk per shard, imported in parallel
+        positions: Dict[str, List[int]] = {}
+        for i, note in enumerate(notes):
+            positions.setdefault(self.shard_for(note.author_id).name, []).append(i)
+        shard_results = await asyncio.gather(*(
+            self._shards[name].repo.import_notes([notes[i] for i in indexes])  # type: ignore[union-attr]
+            for name, indexes in positions.items()
+        ))
+        results: List[NoteEntity | Exception] = [None] * len(notes)  # type: ignore[list-item]
+        for indexes, chunk_results in zip(positions.values(), shard_results):
+            for i, result in zip(indexes, chunk_results):
+                results[i] = result
+        return results
+
+    async def update(self, note: NoteEntity, ctx: UserContext) -> NoteEntity:
+        return await self._repo(note.author_id).update(note, ctx)
+
+    async def delete(self, note_id: int, ctx: UserContext) -> Optional[List[NoteEntity]]:
+        # only the author can delete a note
+        return await self._repo(ctx.user_id).delete(note_id, ctx)
+
+    async def select_by_id(
+        self,
+        note_id: int,
+        ctx: UserContext,
+        projection: NoteProjection = NoteProjection(),
+    ) -> Optional[NoteEntity]:
+        try:
+            return await self._repo(ctx.user_id).select_by_id(note_id, ctx, projection)
+        except RuntimeError:
+            note = (await self._select_on_other_shards([note_id], ctx, projection))[0]
+            if note is None:
+                raise
+            return note
+
+    async def select_by_ids(
+        self,
+        note_ids: List[int],
+        ctx: UserContext,
+        projection: NoteProjection = NoteProjection(),
+    ) -> List[Optional[NoteEntity]]:
+        notes = await self._repo(ctx.user_id).select_by_ids(note_ids, ctx, projection)
+        missing = [i for i, note in enumerate(notes) if note is None]
+        if missing:
+            found = await self._select_on_other_shards([note_ids[i] for i in missing], ctx, projection)
+            for i, note in zip(missing, found):
+                notes[i] = note
+        return notes
+
+    async def _select_on_other_shards(
+        self, note_ids: List[int], ctx: UserContext, projection: NoteProjection
+    ) -> List[Optional[NoteEntity]]:
+        """the notes from the shards except the one of the user, which are asked in parallel"""
+        home = self.shard_for(ctx.user_id)
+        others = [shard for shard in self._shards.values() if shard is not home]
+        results = await asyncio.gather(*(
+            shard.repo.select_by_ids(note_ids, ctx, projection)  # type: ignore[union-attr]
+            for shard in others
+        ))
+        notes: List[Optional[NoteEntity]] = [None] * len(note_ids)
+        for shard_notes in results:
+            for i, note in enumerate(shard_notes):
+                if note is not None:
+                    notes[i] = note
+        return notes
+
+    async def search_notes(
+        self,
+        search_type: SearchType,
+        query: str,
+        ctx: UserContext,
+        pagination: Pagination,
+    ) -> List[NoteEntity]:
+        return await self._repo(ctx.user_id).search_notes(search_type, query, ctx, pagination)
+
+    def plan_search(
+        self,
+        search_type: SearchType,
+        query: str,
+        time_budget: Optional[float] = None,
+    ) -> SearchPlan:
+        # the planner only looks at the query, hence every shard plans the same
+        return next(iter(self._shards.values())).repo.plan_search(search_type, query, time_budget)  # type: ignore[union-attr]
+
+    def stream_search_notes(
+        self,
+        search_type: SearchType,
+        query: str,
+        ctx: UserContext,
+        pagination: Pagination,
+    ) -> AsyncIterator[NoteEntity]:
+        return self._repo(ctx.user_id).stream_search_notes(search_type, query, ctx, pagination)
+
+    def similar_notes(
+        self,
+        note_id: int,
+        ctx: UserContext,
+        limit: int,
+    ) -> AsyncIterator[NoteEntity]:
+        return self._repo(ctx.user_id).similar_notes(note_id, ctx, limit)
+
+
+def parse_shards(value: str) -> List[tuple[str, str]]:
+    """parses `name=dsn,name=dsn` (e.g. of WERSU_DB_SHARDS) into (name, dsn) pairs.
+    The position is the number of the shard, so new shards are appended"""
+    shards = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, dsn = item.partition("=")
+        if not sep or not name.strip() or not dsn.strip():
+            raise ValueError(f"Expected name=dsn, got {item!r}")
+        shards.append((name.strip(), dsn.strip()))
+    return shards
@@ -1 +1,2 @@
-from .user import UserRepoABC, UserPostgresRepo
\ No newline at end of file
+from .user import UserRepoABC, UserPostgresRepo
+from .user_cache import UserCache
@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+import asyncio
+from dataclasses import replace
+from typing import Callable, ClassVar, List, Optional
 
 from src.db.entities import UserEntity
 from src.db import Database
+from src.db.pool import Workload
 from src.utils.logging import logging_provider
+from src.utils.batch_loader import BatchLoader
+from src.db.repos.user.user_cache import UserCache
 
 
 class UserRepoABC(ABC):
@@ -27,11 +32,21 @@ class UserRepoABC(ABC):
         """Select a user by ID."""
         pass
 
+    @abstractmethod
+    async def select_many(self, user_ids: List[int]) -> List[Optional[UserEntity]]:
+        """Select users by ID with one query; None for IDs which were not found."""
+        pass
+
     @abstractmethod
     async def select_by_discord_id(self, discord_id: int) -> Optional[UserEntity]:
         """Select a user by discord_id."""
         pass
 
+    @abstractmethod
+    async def select_many_by_discord_ids(self, discord_ids: List[int]) -> List[Optional[UserEntity]]:
+        """Select users by discord_id with one query; None for discord_ids which were not found."""
+        pass
+
     @abstractmethod
     async def delete(self, user_id: int) -> bool:
         """Delete a user by ID."""
@@ -40,25 +55,49 @@ class UserRepoABC(ABC):
 
 class UserPostgresRepo(UserRepoABC):
     """Provides an impementation using Postgres as the backend database"""
-    def __init__(self, db: Database):
-        self.db = db
+    SELECT_COLUMNS = "id, discord_id, avatar, username, discriminator, email"
+    # the connection pool the queries of the repo use
+    WORKLOAD: ClassVar[str] = Workload.OLTP
+
+    def __init__(self, db: Database, cache: Optional[UserCache] = None):
+        self.db = db.with_workload(self.WORKLOAD)
+        self._cache = cache
+        # the cache is invalidated by NOTIFYs of the primary, a lagging replica
+        # could put the old version back
+        self._read_db = self.db.primary() if cache is not None else self.db
+        # coalesce concurrent selects into one query
+        self._loader: BatchLoader[int, UserEntity] = BatchLoader(self._fetch_many)
+        self._discord_id_loader: BatchLoader[int, UserEntity] = BatchLoader(self._fetch_many_by_discord_ids)
+
+    def _write_through(self, user: UserEntity) -> None:
+        """updates the cache after a write. Inside of a transaction the user is only dropped,
+        since the write may still be rolled back"""
+        if self._cache is None or user.id is None:
+            return
+        if self.db.in_transaction:
+            self._cache.invalidate(user.id)
+        else:
+            self._cache.set(user)
 
     async def insert(self, user: UserEntity) -> UserEntity:
         """Insert a new user and return the created entity with ID."""
         query = "INSERT INTO users (discord_id, avatar, username, discriminator, email) VALUES ($1, $2, $3, $4, $5) RETURNING id"
         user_id = await self.db.fetchrow(query, user.discord_id, user.avatar, user.username, user.discriminator, user.email)
         user.id = user_id["id"]
+        self._write_through(user)
         return user
 
     async def update(self, user: UserEntity) -> UserEntity:
         """Update an existing user."""
         if user.id is None:
             raise ValueError("User ID is required for update operation")
-        query = "UPDATE users SET discord_id = $1, avatar = $2 WHERE id = $3 RETURNING *"
+        query = f"UPDATE users SET discord_id = $1, avatar = $2 WHERE id = $3 RETURNING {self.SELECT_COLUMNS}"
         ret = await self.db.fetchrow(query, user.discord_id, user.avatar, user.id)
         if not ret:
             raise Exception(f"Failed to update user; returned: {ret}")
-        return UserEntity(**ret)
+        updated = UserEntity(**ret)
+        self._write_through(updated)
+        return updated
 
     async def upsert(self, user: UserEntity) -> UserEntity:
         """Insert or update a user based on discord_id."""
@@ -70,41 +109,79 @@ class UserPostgresRepo(UserRepoABC):
             RETURNING id
         """
         user_id = await self.db.fetchrow(query, user.discord_id, user.avatar, user.username, user.discriminator, user.email)
-        user.id = user_id
+        user.id = user_id["id"]
+        self._write_through(user)
         return user
 
     async def select(self, user_id: int) -> Optional[UserEntity]:
         """Select a user by ID."""
-        query = "SELECT id, discord_id, avatar, username, discriminator, email FROM users WHERE id = $1"
-        row = await self.db.fetchrow(query, user_id)
-        if row:
-            return UserEntity(
-                id=row["id"],
-                discord_id=row["discord_id"],
-                avatar=row["avatar"],
-                username=row["username"],
-                discriminator=row["discriminator"],
-                email=row["email"]
-            )
-        return None
+        return (await self.select_many([user_id]))[0]
+
+    async def select_many(self, user_ids: List[int]) -> List[Optional[UserEntity]]:
+        """Select users by ID with one query; None for IDs which were not found."""
+        if self.db.in_transaction or self.db.has_pending_writes:
+            # neither cache nor batch would see the uncommitted writes of this transaction, 
+            # or the writes of the `read_your_writes` key
+            return await self._fetch_many(user_ids)
+        return await self._select_cached(
+            user_ids, 
+            self._cache.get if self._cache else None, 
+            self._loader,
+        )
 
     async def select_by_discord_id(self, discord_id: int) -> Optional[UserEntity]:
         """Select a user by discord_id."""
-        query = "SELECT id, discord_id, avatar, username, discriminator, email FROM users WHERE discord_id = $1"
-        row = await self.db.fetchrow(query, discord_id)
-        if row:
-            return UserEntity(
-                id=row["id"],
-                discord_id=row["discord_id"],
-                avatar=row["avatar"],
-                username=row["username"],
-                discriminator=row["discriminator"],
-                email=row["email"]
-            )
-        return None
+        return (await self.select_many_by_discord_ids([discord_id]))[0]
+
+    async def select_many_by_discord_ids(self, discord_ids: List[int]) -> List[Optional[UserEntity]]:
+        """Select users by discord_id with one query; None for discord_ids which were not found."""
+        if self.db.in_transaction or self.db.has_pending_writes:
+            return await self._fetch_many_by_discord_ids(discord_ids)
+        return await self._select_cached(
+            discord_ids, 
+            self._cache.get_by_discord_id if self._cache else None, 
+            self._discord_id_loader,
+        )
+
+    async def _select_cached(
+        self, 
+        keys: List[int], 
+        get_cached: Optional[Callable[[int], Optional[UserEntity]]],
+        loader: BatchLoader[int, UserEntity],
+    ) -> List[Optional[UserEntity]]:
+        """answers the keys from the cache and loads the missing ones in one batch"""
+        users: List[Optional[UserEntity]] = [get_cached(key) if get_cached else None for key in keys]
+        missing = [i for i, user in enumerate(users) if user is None]
+        if not missing:
+            return users
+
+        generation = self._cache.generation if self._cache else 0
+        loaded = await asyncio.gather(*(loader.load(keys[i]) for i in missing))
+        for i, user in zip(missing, loaded):
+            if user is None:
+                continue
+            if self._cache is not None:
+                self._cache.set(user, generation)
+            # callers of the same batch get their own copy
+            users[i] = replace(user)
+        return users
+
+    async def _fetch_many(self, user_ids: List[int]) -> List[Optional[UserEntity]]:
+        query = f"SELECT {self.SELECT_COLUMNS} FROM users WHERE id = ANY($1::int[])"
+        records = await self._read_db.fetch_readonly(query, user_ids)
+        users = {record["id"]: UserEntity(**record) for record in records}
+        return [users.get(user_id) for user_id in user_ids]
+
+    async def _fetch_many_by_discord_ids(self, discord_ids: List[int]) -> List[Optional[UserEntity]]:
+        query = f"SELECT {self.SELECT_COLUMNS} FROM users WHERE discord_id = ANY($1::bigint[])"
+        records = await self._read_db.fetch_readonly(query, discord_ids)
+        users = {record["discord_id"]: UserEntity(**record) for record in records}
+        return [users.get(discord_id) for discord_id in discord_ids]
 
     async def delete(self, user_id: int) -> bool:
         """Delete a user by ID."""
         query = "DELETE FROM users WHERE id = $1"
         result = await self.db.execute(query, user_id)
+        if self._cache is not None:
+            self._cache.invalidate(user_id)
         return result == "DELETE 1"
@@ -0,0 +1,101 @@
+from dataclasses import replace
+import logging
+from typing import Optional
+
+from src.api.undefined import UNDEFINED
+from src.db.database import DatabaseABC
+from src.db.entities import UserEntity
+from src.utils import CacheStats, TTLCache
+
+
+# channel of the NOTIFY issued by the trigger on users. The payload is the ID of the changed user
+USER_CHANGED_CHANNEL = "user_changed"
+
+
+class UserCache:
+    """
+    Caches users by ID and by discord_id.
+
+    Users are stored once by ID; the discord_id index only maps to the ID.
+    The repo writes users through on insert, update and upsert. Changes of
+    other processes arrive as NOTIFY on `USER_CHANGED_CHANNEL`, once
+    `subscribe` was awaited.
+
+    Every invalidation increases the generation. A user which was loaded
+    in an older generation is not stored, so a load which raced with
+    a write can not put the old version into the cache.
+    """
+    def __init__(self, max_entries: int = 8192, ttl: float = 300.0):
+        self._users: TTLCache[int, UserEntity] = TTLCache(max_entries=max_entries, ttl=ttl)
+        self._ids_by_discord_id: TTLCache[int, int] = TTLCache(max_entries=max_entries, ttl=ttl)
+        self._generation = 0
+        self._enabled = True
+        self._log = logging.getLogger(__name__)
+
+    @property
+    def generation(self) -> int:
+        """increases with every invalidation"""
+        return self._generation
+
+    def get(self, user_id: int) -> Optional[UserEntity]:
+        if not self._enabled:
+            return None
+        user = self._users.get(user_id)
+        if user is UNDEFINED:
+            return None
+        return replace(user)
+
+    def get_by_discord_id(self, discord_id: int) -> Optional[UserEntity]:
+        if not self._enabled:
+            return None
+        user_id = self._ids_by_discord_id.get(discord_id)
+        if user_id is UNDEFINED:
+            return None
+        user = self.get(user_id)
+        if user is None or user.discord_id != discord_id:
+            # user left the cache or changed its discord_id
+            self._ids_by_discord_id.pop(discord_id)
+            return None
+        return user
+
+    def set(self, user: UserEntity, generation: Optional[int] = None) -> None:
+        """stores the user. With `generation`, only if nothing was invalidated since then"""
+        if not self._enabled or user.id is None:
+            return
+        if generation is not None and generation != self._generation:
+            return
+        previous = self._users.get(user.id)
+        if previous is not UNDEFINED and previous.discord_id != user.discord_id:
+            self._ids_by_discord_id.pop(previous.discord_id)
+        self._users.set(user.id, replace(user))
+        self._ids_by_discord_id.set(user.discord_id, user.id)
+
+    def invalidate(self, user_id: int) -> None:
+        """drops the user; the discord_id index entry is dropped lazily"""
+        self._generation += 1
+        self._users.pop(user_id)
+
+    def disable(self) -> None:
+        """stops caching, e.g. when invalidations can not be received anymore"""
+        self._enabled = False
+        self._generation += 1
+        self._users.clear()
+        self._ids_by_discord_id.clear()
+
+    async def subscribe(self, db: DatabaseABC) -> None:
+        """invalidates users on NOTIFY of the users trigger, also for changes of other processes"""
+        def on_notify(payload: str) -> None:
+            try:
+                self.invalidate(int(payload))
+            except ValueError:
+                self._log.warning(f"Unexpected payload on {USER_CHANGED_CHANNEL}: {payload!r}")
+
+        def on_terminate() -> None:
+            self._log.warning("Lost the listener connection - disabling the user cache")
+            self.disable()
+
+        await db.listen(USER_CHANGED_CHANNEL, on_notify, on_terminate=on_terminate)
+
+    def stats(self) -> CacheStats:
+        """hit ratio, entries and estimated memory use of the cache"""
+        return self._users.stats()
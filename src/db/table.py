@@ -1,23 +1,133 @@
-from typing import Any, Callable, Generic, List, Optional, Dict, Sequence, TypeVar, cast, Protocol, runtime_checkable, Union
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Generic, List, Optional, Dict, Sequence, Tuple, TypeVar, cast, Protocol, runtime_checkable, Union
 from collections import OrderedDict
-from functools import wraps, update_wrapper
+from contextlib import aclosing
+from dataclasses import dataclass
+from functools import lru_cache, wraps, update_wrapper
 from abc import ABC, abstractmethod
+import copy
 import traceback
 import logging
+import sys
 import typing
 
-import pandas as pd
-from pandas import DataFrame
 import asyncpg
 from asyncpg import Record
 
 from src.api.types import LoggingProvider
+from src.db.columnar import Columns, ResultFormat, to_arrow, to_dataframe, to_numpy
 from src.db.database import Database
+from src.db.predicate import Predicate
 from src.utils import asdict, drop_undefined
 
-TReturn = TypeVar('TReturn', List[Record], pd.DataFrame, covariant=True)
+if TYPE_CHECKING:
+    # pandas is only imported when a DataFrame is requested
+    import pandas as pd
+    import pyarrow as pa
+
+TReturn = TypeVar('TReturn', List[Record], "pd.DataFrame", Columns, "pa.RecordBatch", covariant=True)
+# rows of multi row operations
+type Rows = pd.DataFrame | Sequence[Dict[str, Any]]
 log: Optional[logging.Logger] = None
 
+
+def _is_dataframe(value: Any) -> bool:
+    """whether value is a DataFrame, without importing pandas"""
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+@dataclass(frozen=True)
+class ColumnType:
+    """Type of a column, as needed to send its values as array"""
+    name: str
+    # e.g. 'bigint' or 'vector(384)'
+    sql_type: str
+    # defined in pg_catalog, hence asyncpg has a binary codec for it
+    builtin: bool
+    is_array: bool
+
+
+# Compiled statements. The SQL of Table's single row operations only depends on 
+# the table, the operation and the column signature, hence it is built once per 
+# shape. Since the text is identical for every call of the same shape, asyncpg 
+# also reuses the prepared statement of its per connection statement cache.
+STATEMENT_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _where_sql(columns: Tuple[str, ...], dollar_start: int = 1) -> str:
+    return " AND ".join(f"{column}=${i}" for i, column in enumerate(columns, dollar_start))
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _insert_sql(table: str, columns: Tuple[str, ...], returning: str, on_conflict: str) -> str:
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)})\n"
+        f"VALUES ({', '.join(f'${i}' for i in range(1, len(columns) + 1))})\n"
+    )
+    if on_conflict:
+        sql += f"ON CONFLICT {on_conflict}\n"
+    if returning:
+        sql += f"RETURNING {returning}\n"
+    return sql
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _upsert_sql(table: str, columns: Tuple[str, ...], conflict_columns: Tuple[str, ...], returning: str) -> str:
+    # the first column is the conflict target, when the table has no id_fields
+    update_set = ", ".join(f"{column}=${i}" for i, column in enumerate(columns[1:], 2))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) \n"
+        f"VALUES ({', '.join(f'${i}' for i in range(1, len(columns) + 1))}) \n"
+        f"ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE \n"
+        f"SET {update_set} \n"
+    )
+    if returning:
+        sql += f"RETURNING {returning} \n"
+    return sql
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _update_sql(table: str, set_columns: Tuple[str, ...], where: str, returning: str) -> str:
+    sql = (
+        f"UPDATE {table} \n"
+        f"SET {', '.join(f'{column}=${i}' for i, column in enumerate(set_columns, 1))} \n"
+        f"WHERE {where}\n"
+    )
+    if returning:
+        sql += f"RETURNING {returning} \n"
+    return sql
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _delete_sql(table: str, where: str, returning: str) -> str:
+    return (
+        f"DELETE FROM {table}\n"
+        f"WHERE {where}\n"
+        f"RETURNING {returning}\n"
+    )
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _select_sql(table: str, where: str, select: str, order_by: Optional[str], limit_param: Optional[int] = None) -> str:
+    sql = f"SELECT {select} FROM {table}"
+    if where:
+        sql += f"\nWHERE {where}"
+    if order_by:
+        sql += f"\nORDER BY {order_by}"
+    if limit_param:
+        sql += f"\nLIMIT ${limit_param}"
+    return sql
+
+
+def _compile_where(where: Dict[str, Any] | Predicate, dollar_start: int = 1) -> Tuple[str, List[Any]]:
+    """WHERE clause (without 'WHERE') and its values, for a dict of `column=value` or a predicate"""
+    if isinstance(where, Predicate):
+        return where.sql(dollar_start), where.values()
+    return _where_sql(tuple(where.keys()), dollar_start), list(where.values())
+
+
 def with_log(reraise_exc: bool = True):
     def decorator(func: Callable):
         @wraps(func)
@@ -44,20 +154,7 @@ def formatter(func: Callable):
     async def wrapper(*args, **kwargs):
         self = args[0]
         return_value = await func(*args, **kwargs)
-        if self._as_dataframe:
-
-            columns: List[str] = []
-            if isinstance(return_value, list):
-                if len(return_value) > 0:
-                    columns = [k for k in return_value[0].keys()]
-                else:
-                    columns = []
-            elif isinstance(return_value, dict):
-                columns = [k for k in return_value.keys()]
-            else:
-                raise TypeError(f"{type(return_value)} is not supported. Only list and dict can be converted to dataframe.")
-            return_value = pd.DataFrame(data=return_value, columns=columns)  # type: ignore
-        return return_value
+        return await self._format(return_value)
     update_wrapper(wrapper, func)
     return wrapper
 
@@ -78,7 +175,7 @@ class TableABC(Protocol, Generic[TReturn]):
         log: Logger instance for debugging and error tracking.
         do_log: Flag indicating whether debug logging is enabled.
         _executed_sql: The last executed SQL query with values (for logging).
-        _as_dataframe: Flag to determine if results should be returned as DataFrame.
+        _result_format: Whether results are returned as Records, DataFrame, NumPy columns or Arrow.
         _error_logging: Flag to enable/disable error logging.
     
     Example:
@@ -87,6 +184,7 @@ class TableABC(Protocol, Generic[TReturn]):
     """
     # table name
     name: str
+    db: Database
     def return_as_dataframe(self, b: bool) -> None:
         """Configure whether query results should be returned as pandas DataFrame.
         
@@ -97,6 +195,40 @@ class TableABC(Protocol, Generic[TReturn]):
             b: True to return results as DataFrame, False for asyncpg Records.
         """
         ...
+
+    def return_as(self, result_format: ResultFormat) -> None:
+        """Configure in which format query results are returned.
+        
+        The columnar formats build one array per column straight from the 
+        fetched records, without an object per row. Columns of pgvector type
+        are decoded into 2D float32 arrays (NumPy) or fixed size lists (Arrow).
+        pandas and pyarrow are only imported when their format is used.
+        
+        Args:
+            result_format: RECORDS, DATAFRAME, NUMPY (dict of column name -> array)
+                or ARROW (pyarrow.RecordBatch).
+        
+        Example:
+            >>> table.return_as(ResultFormat.NUMPY)
+            >>> columns = await table.select(In('note_id', note_ids), select='note_id, embedding')
+            >>> columns['embedding'].shape
+            (1000, 384)
+        """
+        ...
+
+    def with_workload(self, workload: str) -> "TableABC[TReturn]":
+        """Get a view of this table, whose queries use the pool of `workload`.
+        
+        Repositories use it to declare their workload (see `Database.with_workload`).
+        The view shares the result format with the table at the time of the call.
+        
+        Args:
+            workload: The workload, e.g. `Workload.OLTP` or `Workload.BULK`.
+        
+        Returns:
+            The view, or this table when it already uses the workload.
+        """
+        ...
     
     def get_id_fields(self) -> List[str]:
         """Get the list of column names that form the table's identifier.
@@ -159,7 +291,7 @@ class TableABC(Protocol, Generic[TReturn]):
     async def update(
         self, 
         set: Dict[str, Any], 
-        where: Dict[str, Any],
+        where: Dict[str, Any] | Predicate,
         returning: str = "*"
     ) -> Optional[Union[List[Record], Record, str]]:
         """Update existing records in the table.
@@ -168,9 +300,8 @@ class TableABC(Protocol, Generic[TReturn]):
         
         Args:
             set: Dictionary mapping column names to new values.
-            where: Dictionary mapping column names to filter values
-                with columns as field names and rows as filter criteria.
-                Only records matching all conditions will be updated.
+            where: Dictionary mapping column names to filter values, or
+                a Predicate. Only records matching all conditions will be updated.
             returning: Columns to return from updated rows. Defaults to '*'.
         
         Returns:
@@ -187,7 +318,7 @@ class TableABC(Protocol, Generic[TReturn]):
     
     async def delete(
         self, 
-        where: Dict[str, Any] | pd.DataFrame,
+        where: Dict[str, Any] | pd.DataFrame | Predicate,
         returning: str = "*"
     ) -> Optional[TReturn]:
         """Delete records from the table and return them.
@@ -195,8 +326,9 @@ class TableABC(Protocol, Generic[TReturn]):
         Executes a DELETE statement with WHERE clause and returns deleted records.
         
         Args:
-            where: Dictionary mapping column names to filter values, or DataFrame
-                with columns as field names and rows as filter criteria.
+            where: Dictionary mapping column names to filter values, DataFrame
+                with columns as field names and rows as filter criteria, or
+                a Predicate.
         
         Returns:
             List of deleted records as dictionaries, or DataFrame if
@@ -210,22 +342,27 @@ class TableABC(Protocol, Generic[TReturn]):
     
     async def select(
         self, 
-        where: Dict[str, Any] | pd.DataFrame,
+        where: Dict[str, Any] | pd.DataFrame | Predicate,
         order_by: Optional[str] = None, 
         select: str = "*",
         additional_values: Optional[List] = None,
+        limit: Optional[int] = None,
     ) -> Optional[TReturn]:
         """Select records from the table with filtering and ordering.
         
         Executes a SELECT statement with WHERE clause and optional ORDER BY.
         
         Args:
-            where: Dictionary mapping column names to filter values, or DataFrame
-                with columns as field names and rows as filter criteria.
+            where: Dictionary mapping column names to filter values, DataFrame
+                with columns as field names and rows as filter criteria, or
+                a Predicate (see src.db.predicate) for IN, ranges, IS NULL 
+                and keyset conditions.
             order_by: ORDER BY clause (e.g., 'created_at DESC').
             select: Columns to select. Defaults to '*'.
             additional_values: Additional parameterized values to append
                 to WHERE conditions (for complex queries).
+            limit: Maximum amount of rows. Passed as parameter, so the
+                statement is the same for every limit.
         
         Returns:
             List of selected records as dictionaries, or DataFrame if
@@ -237,9 +374,132 @@ class TableABC(Protocol, Generic[TReturn]):
             ...     order_by='created_at DESC',
             ...     select='id, name'
             ... )
+            >>> await table.select(In('id', [1, 2, 3]) & IsNull('deleted_at'), limit=10)
         """
         ...
     
+    async def insert_many(
+        self,
+        rows: Rows,
+        returning: str = "*",
+        on_conflict: str = "",
+    ) -> Optional[List[Record]]:
+        """Insert many rows with one statement.
+        
+        The rows are sent as one array per column and inserted with
+        INSERT ... SELECT FROM unnest(...). Without `returning` and
+        `on_conflict`, and when all columns have builtin types, COPY is
+        used instead.
+        
+        Args:
+            rows: DataFrame, or list of dicts which all have the same keys.
+            returning: Columns to return from the inserted rows. Defaults to '*'.
+            on_conflict: ON CONFLICT clause (e.g., 'DO NOTHING'). Defaults to empty.
+        
+        Returns:
+            The inserted records as specified by returning. Empty for COPY.
+        
+        Example:
+            >>> await table.insert_many([{'name': 'Alice'}, {'name': 'Bob'}], returning='id')
+        """
+        ...
+
+    async def upsert_many(
+        self,
+        rows: Rows,
+        returning: str = "",
+    ) -> Optional[List[Record]]:
+        """Insert many rows or update the existing ones with one statement.
+        
+        The columns from get_id_fields() are the conflict target, all other
+        columns are updated. The same key must not occur twice in `rows`.
+        
+        Args:
+            rows: DataFrame, or list of dicts which all have the same keys.
+            returning: Columns to return. Defaults to empty (no return).
+        
+        Returns:
+            The upserted records if returning is specified.
+        
+        Example:
+            >>> await table.upsert_many(pd.DataFrame({'id': [1, 2], 'age': [31, 42]}))
+        """
+        ...
+
+    async def delete_many(
+        self,
+        keys: Rows,
+        returning: str = "*",
+    ) -> Optional[List[Record]]:
+        """Delete the rows matching any of the given (composite) keys with one statement.
+        
+        Args:
+            keys: DataFrame, or list of dicts which all have the same keys,
+                e.g. the id_fields of the rows to delete.
+            returning: Columns to return from deleted rows. Defaults to '*'.
+        
+        Returns:
+            The deleted records.
+        
+        Example:
+            >>> await table.delete_many([{'note_id': 1, 'role_id': 2}, {'note_id': 1, 'role_id': 3}])
+        """
+        ...
+
+    async def select_many(
+        self,
+        keys: Rows,
+        order_by: Optional[str] = None,
+        select: str = "*",
+    ) -> Optional[TReturn]:
+        """Select the rows matching any of the given (composite) keys with one statement.
+        
+        Args:
+            keys: DataFrame, or list of dicts which all have the same keys.
+            order_by: ORDER BY clause (e.g., 'created_at DESC').
+            select: Columns to select. Defaults to '*'.
+        
+        Returns:
+            List of selected records, or DataFrame if return_as_dataframe is enabled.
+        
+        Example:
+            >>> await table.select_many([{'id': 1}, {'id': 2}], select='id, name')
+        """
+        ...
+
+    def iter_select(
+        self,
+        where: Optional[Dict[str, Any] | Predicate] = None,
+        batch_size: int = 1000,
+        order_by: Optional[str] = None,
+        select: str = "*",
+    ) -> AsyncIterator[TReturn]:
+        """Stream the selected rows in batches through a server side cursor.
+        
+        Unlike select(), the result is never materialised as a whole, so 
+        exports and backfills over whole tables run with bounded memory.
+        Each batch is returned in the configured result format. The cursor
+        is closed when the iteration ends or the generator is closed; use
+        contextlib.aclosing to close it right away when breaking out early.
+        
+        Args:
+            where: Dictionary mapping column names to filter values, or a 
+                Predicate. None selects all rows.
+            batch_size: Maximum amount of rows per batch. Defaults to 1000.
+            order_by: ORDER BY clause (e.g., 'id').
+            select: Columns to select. Defaults to '*'.
+        
+        Yields:
+            Batches of at most batch_size rows, as list of Records, DataFrame,
+            NumPy columns or Arrow record batch.
+        
+        Example:
+            >>> async with aclosing(table.iter_select(batch_size=500)) as batches:
+            ...     async for batch in batches:
+            ...         await reembed(batch)
+        """
+        ...
+
     async def select_row(
         self, 
         where: Dict[str, Any] | pd.DataFrame,
@@ -391,7 +651,7 @@ class Table(TableABC):
         log: Logger instance for this table.
         do_log: True if debug logging is enabled.
         _executed_sql: Last executed SQL with values (for logging).
-        _as_dataframe: When True, return results as pandas DataFrame.
+        _result_format: Whether results are returned as Records, DataFrame, NumPy columns or Arrow.
         _error_logging: When True, log errors and exceptions.
         id_fields: Column names that form the table's identifier.
     
@@ -427,14 +687,29 @@ class Table(TableABC):
         self.do_log = self.log.level == logging.DEBUG
         self.id_fields = id_fields or []
         self._executed_sql = ""
-        self._as_dataframe: bool = False
+        self._result_format: ResultFormat = ResultFormat.RECORDS
         self._error_logging = error_log
+        self._column_type_cache: Optional[Dict[str, ColumnType]] = None
     
     def get_id_fields(self) -> List[str]:
         return self.id_fields
 
     def return_as_dataframe(self, b: bool) -> None:
-        self._as_dataframe = b
+        self._result_format = ResultFormat.DATAFRAME if b else ResultFormat.RECORDS
+
+    def return_as(self, result_format: ResultFormat) -> None:
+        self._result_format = result_format
+
+    def with_workload(self, workload: str) -> "Table":
+        if self.db.workload == workload:
+            return self
+        view = copy.copy(self)
+        view.db = self.db.with_workload(workload)
+        return view
+
+    async def _vector_columns(self) -> List[str]:
+        types = await self._column_types()
+        return [name for name, column_type in types.items() if column_type.sql_type.startswith("vector")]
 
     async def insert(
         self, 
@@ -456,24 +731,13 @@ class Table(TableABC):
         on_conflict: str = "",
     ) -> Optional[List[Record]]:
         # Convert DataFrame to dict-like format
-        if isinstance(where, pd.DataFrame):
-            # For now, handle single row DataFrame
+        if _is_dataframe(where):
             if len(where) != 1:
-                raise ValueError("DataFrame must contain exactly one row for insert")
+                return await self._insert_many(where, returning=returning, on_conflict=on_conflict)
             where = dict(where.iloc[0])
         
-        which_columns = list(where.keys())
         values = list(where.values())
-
-        values_chain = [f'${num}' for num in range(1, len(values)+1)]
-        sql = (
-            f"INSERT INTO {self.name} ({', '.join(which_columns)})\n"
-            f"VALUES ({', '.join(values_chain)})\n" 
-        )
-        if on_conflict:
-            sql += f"ON CONFLICT {on_conflict}\n"
-        if returning:
-            sql += f"RETURNING {returning}\n"
+        sql = _insert_sql(self.name, tuple(where.keys()), returning, on_conflict)
         return_values = await self.db.fetch(sql, *values)
         return return_values
 
@@ -489,42 +753,25 @@ class Table(TableABC):
         returning: str = ""
     ) -> Optional[Record]:
         # Convert DataFrame to dict-like format
-        if isinstance(where, pd.DataFrame):
+        if _is_dataframe(where):
             if len(where) != 1:
-                raise ValueError("DataFrame must contain exactly one row for upsert")
+                return await self._upsert_many(where, returning=returning)
             where = dict(where.iloc[0])
         
-        which_columns = list(where.keys())
+        which_columns = tuple(where.keys())
         values = list(where.values())
         
         assert values and which_columns
-        values_chain = [f'${num}' for num in range(1, len(values)+1)]
-        update_set_query = ""
-        for i, item in enumerate(zip(which_columns, values_chain)):
-            if i == 0:
-                continue
-            update_set_query += f"{item[0]}={item[1]}, "
-        update_set_query = update_set_query[:-2]  # remove last ","
-        
         # Use id_fields from dependency injection
-        id_fields = self.get_id_fields()
-        on_conflict_values = ", ".join(id_fields) if id_fields else which_columns[0]
-        
-        sql = (
-            f"INSERT INTO {self.name} ({', '.join(which_columns)}) \n"
-            f"VALUES ({', '.join(values_chain)}) \n"
-            f"ON CONFLICT ({on_conflict_values}) DO UPDATE \n"
-            f"SET {update_set_query} \n"
-        )
-        if returning:
-            sql += f"RETURNING {returning} \n"
+        conflict_columns = tuple(self.get_id_fields()) or which_columns[:1]
+        sql = _upsert_sql(self.name, which_columns, conflict_columns, returning)
         return_values = await self.db.fetch(sql, *values)
         return return_values   
     
     async def update(
         self, 
         set: Dict[str, Any], 
-        where: Dict[str, Any],
+        where: Dict[str, Any] | Predicate,
         returning: str = "*"
     ) -> Optional[Union[List[Record], Record, str]]:
         return await self._update(
@@ -536,28 +783,20 @@ class Table(TableABC):
     async def _update(
         self, 
         set: Dict[str, Any], 
-        where: Dict[str, Any],
+        where: Dict[str, Any] | Predicate,
         returning: str = "*"
     ) -> Optional[List[Record]]:
-        where = drop_undefined(where)  # removes UNDEFINED values
-        num_gen = (num for num in range(1,100))
-        update_set_query = ", ".join([f'{col_name}=${i}' for i, col_name in zip(num_gen, set.keys())])
-        next_ = next(num_gen) -1  # otherwise it would be one to high - python bug?
-        sql = (
-            f"UPDATE {self.name} \n"
-            f"SET {update_set_query} \n"
-            f"WHERE {self.__class__.create_where_statement([*where.keys()], dollar_start=next_)}\n"
-        )
-        if returning:
-            sql += f"RETURNING {returning} \n"
-        values = [*set.values(), *where.values()]
+        if not isinstance(where, Predicate):
+            where = drop_undefined(where)  # removes UNDEFINED values
+        where_sql, where_values = _compile_where(where, dollar_start=len(set) + 1)
+        sql = _update_sql(self.name, tuple(set.keys()), where_sql, returning)
+        values = [*set.values(), *where_values]
         return_values = await self.db.fetchrow(sql, *values)
-        self.log.error(f"Update returned: {return_values}")
         return return_values   
 
     async def delete(
         self, 
-        where: Dict[str, Any] | pd.DataFrame,
+        where: Dict[str, Any] | pd.DataFrame | Predicate,
         returning: str = "*"
     ) -> Optional[List[Record]]:
         return await self._delete(
@@ -567,24 +806,17 @@ class Table(TableABC):
 
     async def _delete(
         self, 
-        where: Dict[str, Any] | pd.DataFrame,
+        where: Dict[str, Any] | pd.DataFrame | Predicate,
         returning: str = "*"
     ) -> Optional[List[Record]]:
         # Convert DataFrame to dict if needed
-        if isinstance(where, pd.DataFrame):
+        if _is_dataframe(where):
             if len(where) != 1:
-                raise ValueError("DataFrame must contain exactly one row for delete")
+                return await self._delete_many(where, returning=returning)
             where = dict(where.iloc[0])
         
-        columns = list(where.keys())
-        matching_values = list(where.values())
-        where_stmt = self.__class__.create_where_statement(columns)
-
-        sql = (
-            f"DELETE FROM {self.name}\n"
-            f"WHERE {where_stmt}\n"
-            f"RETURNING {returning}\n"
-        )
+        where_sql, matching_values = _compile_where(where)
+        sql = _delete_sql(self.name, where_sql, returning)
         records = await self.db.fetch(sql, *matching_values)
         return records
 
@@ -596,47 +828,302 @@ class Table(TableABC):
 
     async def select(
         self, 
-        where: Dict[str, Any] | pd.DataFrame,
+        where: Dict[str, Any] | pd.DataFrame | Predicate,
         order_by: Optional[str] = None, 
         select: str = "*",
         additional_values: Optional[List] = None,
+        limit: Optional[int] = None,
     ) -> Optional[List[Record]]:
         return await self._select(
             where=where,
             order_by=order_by,
             select=select,
-            additional_values=additional_values
+            additional_values=additional_values,
+            limit=limit,
         )
     
     @with_log()
     @formatter
     async def _select(
         self, 
-        where: Dict[str, Any] | pd.DataFrame,
+        where: Dict[str, Any] | pd.DataFrame | Predicate,
         order_by: Optional[str] = None, 
         select: str = "*",
         additional_values: Optional[List] = None,
+        limit: Optional[int] = None,
     ) -> Optional[List[Record]]:
         # Convert DataFrame to dict if needed
-        if isinstance(where, pd.DataFrame):
+        if _is_dataframe(where):
             if len(where) != 1:
-                raise ValueError("DataFrame must contain exactly one row for select")
+                if additional_values:
+                    raise ValueError("additional_values are not supported for multi row selects")
+                return await self._select_many_records(where, order_by=order_by, select=select)
             where = dict(where.iloc[0])
         
-        columns = list(where.keys())
-        matching_values = list(where.values())
-        where_stmt = self.__class__.create_where_statement(columns)
+        where_sql, matching_values = _compile_where(where)
+        if additional_values:
+            matching_values.extend(additional_values)
+        limit_param = None
+        if limit is not None:
+            matching_values.append(limit)
+            limit_param = len(matching_values)
+        sql = _select_sql(self.name, where_sql, select, order_by, limit_param)
+            
+        records = await self.db.fetch_readonly(sql, *matching_values)
+        return records
+
+    async def _column_types(self) -> Dict[str, ColumnType]:
+        """the types of the columns of this table, looked up once from the catalog"""
+        if self._column_type_cache is None:
+            records = await self.db.fetch_readonly(
+                "SELECT a.attname AS name, format_type(a.atttypid, a.atttypmod) AS sql_type,\n"
+                "    t.typnamespace = 'pg_catalog'::regnamespace AS builtin, t.typcategory = 'A' AS is_array\n"
+                "FROM pg_attribute AS a\n"
+                "JOIN pg_type AS t ON t.oid = a.atttypid\n"
+                "WHERE a.attrelid = $1::regclass AND a.attnum > 0 AND NOT a.attisdropped",
+                self.name
+            )
+            self._column_type_cache = {record["name"]: ColumnType(**record) for record in records}
+        return self._column_type_cache
+
+    @staticmethod
+    def _to_rows(rows: Rows) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """splits DataFrames or lists of dicts into column names and value tuples"""
+        if _is_dataframe(rows):
+            import pandas as pd
+
+            # NaN -> None and numpy scalars -> python objects
+            frame = rows.astype(object).where(pd.notna(rows), None)
+            return [str(column) for column in frame.columns], list(frame.itertuples(index=False, name=None))
+        if not rows:
+            return [], []
+        columns = list(rows[0].keys())
+        for row in rows:
+            if row.keys() != rows[0].keys():
+                raise ValueError(f"All rows need the same columns; expected {columns}, got {list(row.keys())}")
+        return columns, [tuple(row[column] for column in columns) for row in rows]
+
+    async def _unnest(
+        self, 
+        columns: List[str], 
+        rows: List[Tuple[Any, ...]],
+    ) -> Tuple[str, str, List[List[Any]]]:
+        """creates the select list and the `unnest(...)` source, which turn 
+        one array argument per column back into rows
+
+        Returns:
+            select list, FROM source and the array arguments
+        """
+        types = await self._column_types()
+        select: List[str] = []
+        params: List[str] = []
+        args: List[List[Any]] = []
+        for i, column in enumerate(columns):
+            column_type = types.get(column)
+            if column_type is None:
+                raise ValueError(f"{self.name} has no column {column}")
+            if column_type.is_array:
+                raise ValueError(f"Array column {column} is not supported in multi row operations")
+            values = [row[i] for row in rows]
+            if column_type.builtin:
+                params.append(f"${i + 1}::{column_type.sql_type}[]")
+                select.append(f"u.{column}")
+            else:
+                # extension types (e.g. vector) have no binary codec in asyncpg -> send as text
+                params.append(f"${i + 1}::text[]")
+                select.append(f"u.{column}::{column_type.sql_type}")
+                values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+            args.append(values)
+        source = f"unnest({', '.join(params)}) AS u({', '.join(columns)})"
+        return ", ".join(select), source, args
+
+    async def insert_many(
+        self,
+        rows: Rows,
+        returning: str = "*",
+        on_conflict: str = "",
+    ) -> Optional[List[Record]]:
+        return await self._insert_many(
+            rows,
+            returning=returning,
+            on_conflict=on_conflict,
+        )
+
+    @with_log()
+    async def _insert_many(
+        self,
+        rows: Rows,
+        returning: str = "*",
+        on_conflict: str = "",
+    ) -> Optional[List[Record]]:
+        columns, tuples = self._to_rows(rows)
+        if not tuples:
+            return []
+
+        types = await self._column_types()
+        if (
+            not returning and not on_conflict 
+            and all(column in types and types[column].builtin and not types[column].is_array for column in columns)
+        ):
+            schema_name, _, table_name = self.name.rpartition(".")
+            await self.db.copy_records_to_table(
+                table_name, records=tuples, columns=columns, schema_name=schema_name or None
+            )
+            return []
+
+        select, source, args = await self._unnest(columns, tuples)
+        sql = (
+            f"INSERT INTO {self.name} ({', '.join(columns)})\n"
+            f"SELECT {select} FROM {source}\n"
+        )
+        if on_conflict:
+            sql += f"ON CONFLICT {on_conflict}\n"
+        if returning:
+            sql += f"RETURNING {returning}\n"
+        self._create_sql_log_message(sql, args)
+        return await self.db.fetch(sql, *args)
+
+    async def upsert_many(
+        self,
+        rows: Rows,
+        returning: str = "",
+    ) -> Optional[List[Record]]:
+        return await self._upsert_many(
+            rows,
+            returning=returning,
+        )
+
+    @with_log()
+    async def _upsert_many(
+        self,
+        rows: Rows,
+        returning: str = "",
+    ) -> Optional[List[Record]]:
+        columns, tuples = self._to_rows(rows)
+        if not tuples:
+            return []
+
+        id_fields = self.get_id_fields() or columns[:1]
+        missing = [field for field in id_fields if field not in columns]
+        if missing:
+            raise ValueError(f"Rows for upsert need the id fields {missing}")
+        update_columns = [column for column in columns if column not in id_fields]
+        if update_columns:
+            on_conflict = "DO UPDATE SET " + ", ".join(f"{column}=EXCLUDED.{column}" for column in update_columns)
+        else:
+            on_conflict = "DO NOTHING"
+
+        select, source, args = await self._unnest(columns, tuples)
+        sql = (
+            f"INSERT INTO {self.name} ({', '.join(columns)})\n"
+            f"SELECT {select} FROM {source}\n"
+            f"ON CONFLICT ({', '.join(id_fields)}) {on_conflict}\n"
+        )
+        if returning:
+            sql += f"RETURNING {returning}\n"
+        self._create_sql_log_message(sql, args)
+        return await self.db.fetch(sql, *args)
+
+    async def delete_many(
+        self,
+        keys: Rows,
+        returning: str = "*",
+    ) -> Optional[List[Record]]:
+        return await self._delete_many(
+            keys,
+            returning=returning,
+        )
+
+    @with_log()
+    async def _delete_many(
+        self,
+        keys: Rows,
+        returning: str = "*",
+    ) -> Optional[List[Record]]:
+        columns, tuples = self._to_rows(keys)
+        if not tuples:
+            return []
+
+        select, source, args = await self._unnest(columns, tuples)
+        sql = (
+            f"DELETE FROM {self.name}\n"
+            f"WHERE ({', '.join(columns)}) IN (SELECT {select} FROM {source})\n"
+        )
+        if returning:
+            sql += f"RETURNING {returning}\n"
+        self._create_sql_log_message(sql, args)
+        return await self.db.fetch(sql, *args)
+
+    async def select_many(
+        self,
+        keys: Rows,
+        order_by: Optional[str] = None,
+        select: str = "*",
+    ) -> Optional[List[Record]]:
+        return await self._select_many(
+            keys,
+            order_by=order_by,
+            select=select,
+        )
+
+    @with_log()
+    @formatter
+    async def _select_many(
+        self,
+        keys: Rows,
+        order_by: Optional[str] = None,
+        select: str = "*",
+    ) -> Optional[List[Record]]:
+        return await self._select_many_records(keys, order_by=order_by, select=select)
+
+    async def _select_many_records(
+        self,
+        keys: Rows,
+        order_by: Optional[str] = None,
+        select: str = "*",
+    ) -> List[Record]:
+        columns, tuples = self._to_rows(keys)
+        if not tuples:
+            return []
+
+        key_select, source, args = await self._unnest(columns, tuples)
         sql = (
             f"SELECT {select} FROM {self.name}\n"
-            f"WHERE {where_stmt}"
+            f"WHERE ({', '.join(columns)}) IN (SELECT {key_select} FROM {source})"
         )
         if order_by:
             sql += f"\nORDER BY {order_by}"
-        if additional_values:
-            matching_values.extend(additional_values)
-            
-        records = await self.db.fetch(sql, *matching_values)
-        return records
+        self._create_sql_log_message(sql, args)
+        return await self.db.fetch_readonly(sql, *args)
+
+    async def _format(self, return_value: Any) -> Any:
+        """converts fetched records into the configured result format"""
+        if self._result_format is ResultFormat.DATAFRAME:
+            return to_dataframe(return_value)
+        if self._result_format in (ResultFormat.NUMPY, ResultFormat.ARROW):
+            records = return_value or []
+            if not isinstance(records, list):
+                records = [records]
+            vector_columns = await self._vector_columns()
+            if self._result_format is ResultFormat.NUMPY:
+                return to_numpy(records, vector_columns)
+            return to_arrow(records, vector_columns)
+        return return_value
+
+    async def iter_select(
+        self,
+        where: Optional[Dict[str, Any] | Predicate] = None,
+        batch_size: int = 1000,
+        order_by: Optional[str] = None,
+        select: str = "*",
+    ) -> AsyncIterator[Any]:
+        where_sql, values = _compile_where(where) if where else ("", [])
+        sql = _select_sql(self.name, where_sql, select, order_by)
+        self._create_sql_log_message(sql, values)
+        # closing this generator closes the cursor as well
+        async with aclosing(self.db.cursor(sql, *values, batch_size=batch_size)) as batches:
+            async for batch in batches:
+                yield await self._format(batch)
 
     async def select_row(
         self, 
@@ -703,10 +1190,7 @@ class Table(TableABC):
 
     @staticmethod
     def create_where_statement(columns: List[str], dollar_start: int = 1) -> str:
-        where = ""
-        for i, item in zip(range(dollar_start, dollar_start+len(columns)+1),columns):
-            where += f"{'AND ' if i > 0 else ''}{item}=${i} "
-        return where[4:]  # cut first and
+        return _where_sql(tuple(columns), dollar_start)
     
     def _create_sql_log_message(self, sql:str, values: List):
         self._executed_sql = (
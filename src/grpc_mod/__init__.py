@@ -2,10 +2,15 @@ from .proto.note_pb2_grpc import add_NoteServiceServicer_to_server, NoteService,
 from .proto.note_pb2 import (
     GetNoteRequest, Note, NotePermission, 
     PostNoteRequest, NoteEmbedding, GetSearchNotesRequest,
-    MinimalNote
+    MinimalNote, NotePage, GetSimilarNotesRequest,
+    BatchGetNotesRequest, BatchGetNotesResponse, NoteResult,
+    ImportFailure, ImportSummary,
 )
 from .proto.user_pb2_grpc import add_UserServiceServicer_to_server, UserService, UserServiceServicer, UserServiceStub
-from .proto.user_pb2 import User, GetUserRequest, AlterUserRequest, DeleteUserRequest, DeleteUserResponse, PostUserRequest
+from .proto.user_pb2 import (
+    User, GetUserRequest, AlterUserRequest, DeleteUserRequest, DeleteUserResponse, PostUserRequest,
+    BatchGetUsersRequest, BatchGetUsersResponse, UserResult
+)
 from .service import *
 from .converter.note_entity_converter import to_grpc_note
 from .converter.user_entity_converter import to_grpc_user
\ No newline at end of file
@@ -1,2 +1,3 @@
-from .note_entity_converter import to_grpc_note
+from .note_entity_converter import to_grpc_note, to_note_projection
+from .page_cursor import encode_page_cursor, decode_page_cursor
 from .user_entity_converter import to_grpc_user
\ No newline at end of file
@@ -1,9 +1,10 @@
 from typing import Any, Dict
+from google.protobuf.field_mask_pb2 import FieldMask
 from google.protobuf.timestamp_pb2 import Timestamp
 
 from src.api.undefined import UNDEFINED
 from src.db.entities.note.metadata import NoteEntity
-from src.db.repos.note.note import SearchType
+from src.db.repos.note.note import NoteProjection, SearchType
 from src.grpc_mod.proto.note_pb2 import GetSearchNotesRequest, MinimalNote, Note, NoteEmbedding, NotePermission
 from src.utils import asdict
 from src.utils.dict_helper import drop_except_keys, drop_undefined
@@ -33,10 +34,9 @@ def to_grpc_note(note_entity: NoteEntity | None) -> Note:
     )
     basic_args["id"] = basic_args.pop("note_id")
 
-    # convert permissions
-    assert isinstance(note_entity.permissions, list)
+    # convert permissions (UNDEFINED when left out by a projection)
     perms: list[NotePermission] = []
-    for p in note_entity.permissions:
+    for p in note_entity.permissions or []:
         assert isinstance(p.role_id, int)
         perms.append(NotePermission(role_id=p.role_id))
 
@@ -47,6 +47,26 @@ def to_grpc_note(note_entity: NoteEntity | None) -> Note:
         permissions=perms,
     )
 
+def to_note_projection(read_mask: FieldMask) -> NoteProjection:
+    """Converts the read mask of a GetNoteRequest to the parts of the note which need to be fetched.
+    An empty mask selects all fields.
+    
+    Raises:
+    -------
+    ValueError:
+        when the mask contains paths which are not fields of Note
+    """
+    if not read_mask.paths:
+        return NoteProjection(embeddings=False)
+    if not read_mask.IsValidForDescriptor(Note.DESCRIPTOR):
+        raise ValueError(f"Invalid read mask: {', '.join(read_mask.paths)}")
+    return NoteProjection(
+        content="content" in read_mask.paths,
+        permissions="permissions" in read_mask.paths,
+        # embeddings are reserved in the proto file
+        embeddings=False,
+    )
+
 def to_grpc_minimal_note(note_entity: NoteEntity) -> MinimalNote:
     """Converts a NoteEntity to a gRPC MinimalNote message."""
 
@@ -69,7 +89,7 @@ def to_grpc_minimal_note(note_entity: NoteEntity) -> MinimalNote:
 
 def to_search_type(proto_value: GetSearchNotesRequest.SearchType.ValueType) ->  SearchType:
     if proto_value == GetSearchNotesRequest.SearchType.Undefined:
-        return SearchType.CONTEXT
+        return SearchType.AUTO
     elif proto_value == GetSearchNotesRequest.SearchType.NoSearch:
         return SearchType.NO_SEARCH
     elif proto_value == GetSearchNotesRequest.SearchType.FullTextTitle:
@@ -0,0 +1,27 @@
+import struct
+
+
+_CURSOR_VERSION = 1
+_CURSOR_FORMAT = ">BI"  # version, offset
+
+
+def encode_page_cursor(offset: int) -> bytes:
+    """Encodes the offset of the next page into an opaque cursor for `NotePage.next_cursor`."""
+    return struct.pack(_CURSOR_FORMAT, _CURSOR_VERSION, offset)
+
+
+def decode_page_cursor(cursor: bytes) -> int:
+    """Decodes a cursor created with `encode_page_cursor` back to its offset.
+
+    Raises:
+    -------
+    ValueError:
+        when the cursor was not created by `encode_page_cursor`
+    """
+    try:
+        version, offset = struct.unpack(_CURSOR_FORMAT, cursor)
+    except struct.error as e:
+        raise ValueError(f"Malformed page cursor: {cursor!r}") from e
+    if version != _CURSOR_VERSION:
+        raise ValueError(f"Unsupported page cursor version: {version}")
+    return offset
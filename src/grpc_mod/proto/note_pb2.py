@@ -23,9 +23,10 @@ _sym_db = _symbol_database.Default()
 
 
 from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1dsrc/grpc_mod/proto/note.proto\x12\x05proto\x1a\x1fgoogle/protobuf/timestamp.proto\"-\n\x0eGetNoteRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\"\xea\x01\n\x15GetSearchNotesRequest\x12<\n\x0bsearch_type\x18\x01 \x01(\x0e\x32\'.proto.GetSearchNotesRequest.SearchType\x12\r\n\x05query\x18\x02 \x01(\t\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x0e\n\x06offset\x18\x04 \x01(\x05\x12\x0f\n\x07user_id\x18\x05 \x01(\x05\"T\n\nSearchType\x12\r\n\tUndefined\x10\x00\x12\x0c\n\x08NoSearch\x10\x01\x12\x11\n\rFullTextTitle\x10\x02\x12\t\n\x05\x46uzzy\x10\x03\x12\x0b\n\x07\x43ontext\x10\x04\"\x85\x01\n\x0bMinimalNote\x12\n\n\x02id\x18\x01 \x01(\x05\x12\r\n\x05title\x18\x02 \x01(\t\x12\x11\n\tauthor_id\x18\x03 \x01(\x05\x12.\n\nupdated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x18\n\x10stripped_content\x18\x05 \x01(\t\"\xa7\x01\n\x04Note\x12\n\n\x02id\x18\x01 \x01(\x05\x12\r\n\x05title\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12.\n\nupdated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x11\n\tauthor_id\x18\x05 \x01(\x05\x12*\n\x0bpermissions\x18\x07 \x03(\x0b\x32\x15.proto.NotePermissionJ\x04\x08\x06\x10\x07\"1\n\rNoteEmbedding\x12\r\n\x05model\x18\x01 \x01(\t\x12\x11\n\tembedding\x18\x02 \x03(\x02\"!\n\x0eNotePermission\x12\x0f\n\x07role_id\x18\x01 \x01(\x05\"U\n\x0fPostNoteRequest\x12\r\n\x05title\x18\x01 \x01(\t\x12\x14\n\x07\x63ontent\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x11\n\tauthor_id\x18\x03 \x01(\x05\x42\n\n\x08_content\"2\n\x11\x44\x65leteNoteRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x11\n\tauthor_id\x18\x02 \x01(\x05\"\x84\x01\n\x10\x41lterNoteRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x12\n\x05title\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x14\n\x07\x63ontent\x18\x03 \x01(\tH\x01\x88\x01\x01\x12\x16\n\tauthor_id\x18\x04 \x01(\x05H\x02\x88\x01\x01\x42\x08\n\x06_titleB\n\n\x08_contentB\x0c\n\n_author_id2\x98\x02\n\x0bNoteService\x12-\n\x07GetNote\x12\x15.proto.GetNoteRequest\x1a\x0b.proto.Note\x12/\n\x08PostNote\x12\x16.proto.PostNoteRequest\x1a\x0b.proto.Note\x12\x31\n\tPatchNote\x12\x17.proto.AlterNoteRequest\x1a\x0b.proto.Note\x12\x33\n\nDeleteNote\x12\x18.proto.DeleteNoteRequest\x1a\x0b.proto.Note\x12\x41\n\x0bSearchNotes\x12\x1c.proto.GetSearchNotesRequest\x1a\x12.proto.MinimalNote0\x01\x42\x31Z/github.com/KuramaSyu/Wersu-Rest/src/proto;protob\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1dsrc/grpc_mod/proto/note.proto\x12\x05proto\x1a\x1fgoogle/protobuf/timestamp.proto\x1a google/protobuf/field_mask.proto\"\\\n\x0eGetNoteRequest\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\x12-\n\tread_mask\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"c\n\x14\x42\x61tchGetNotesRequest\x12\x0b\n\x03ids\x18\x01 \x03(\x03\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\x12-\n\tread_mask\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"T\n\nNoteResult\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x1b\n\x04note\x18\x02 \x01(\x0b\x32\x0b.proto.NoteH\x00\x12\x13\n\tnot_found\x18\x03 \x01(\x08H\x00\x42\x08\n\x06result\";\n\x15\x42\x61tchGetNotesResponse\x12\"\n\x07results\x18\x01 \x03(\x0b\x32\x11.proto.NoteResult\"\xfa\x01\n\x15GetSearchNotesRequest\x12<\n\x0bsearch_type\x18\x01 \x01(\x0e\x32\'.proto.GetSearchNotesRequest.SearchType\x12\r\n\x05query\x18\x02 \x01(\t\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x0e\n\x06offset\x18\x04 \x01(\x05\x12\x0f\n\x07user_id\x18\x05 \x01(\x05\x12\x0e\n\x06\x63ursor\x18\x06 \x01(\x0c\"T\n\nSearchType\x12\r\n\tUndefined\x10\x00\x12\x0c\n\x08NoSearch\x10\x01\x12\x11\n\rFullTextTitle\x10\x02\x12\t\n\x05\x46uzzy\x10\x03\x12\x0b\n\x07\x43ontext\x10\x04\"I\n\x16GetSimilarNotesRequest\x12\x0f\n\x07note_id\x18\x01 \x01(\x03\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\"\x85\x01\n\x0bMinimalNote\x12\n\n\x02id\x18\x01 \x01(\x03\x12\r\n\x05title\x18\x02 \x01(\t\x12\x11\n\tauthor_id\x18\x03 \x01(\x05\x12.\n\nupdated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x18\n\x10stripped_content\x18\x05 \x01(\t\"B\n\x08NotePage\x12!\n\x05notes\x18\x01 \x03(\x0b\x32\x12.proto.MinimalNote\x12\x13\n\x0bnext_cursor\x18\x02 \x01(\x0c\"\xa7\x01\n\x04Note\x12\n\n\x02id\x18\x01 \x01(\x03\x12\r\n\x05title\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12.\n\nupdated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x11\n\tauthor_id\x18\x05 \x01(\x05\x12*\n\x0bpermissions\x18\x07 \x03(\x0b\x32\x15.proto.NotePermissionJ\x04\x08\x06\x10\x07\"1\n\rNoteEmbedding\x12\r\n\x05model\x18\x01 \x01(\t\x12\x11\n\tembedding\x18\x02 \x03(\x02\"!\n\x0eNotePermission\x12\x0f\n\x07role_id\x18\x01 \x01(\x05\"\x81\x01\n\x0fPostNoteRequest\x12\r\n\x05title\x18\x01 \x01(\t\x12\x14\n\x07\x63ontent\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x11\n\tauthor_id\x18\x03 \x01(\x05\x12*\n\x0bpermissions\x18\x04 \x03(\x0b\x32\x15.proto.NotePermissionB\n\n\x08_content\".\n\rImportFailure\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x0e\n\x06reason\x18\x02 \x01(\t\"\x8d\x01\n\rImportSummary\x12\x10\n\x08imported\x18\x01 \x01(\x05\x12\x0e\n\x06\x66\x61iled\x18\x02 \x01(\x05\x12&\n\x08\x66\x61ilures\x18\x03 \x03(\x0b\x32\x14.proto.ImportFailure\x12\x18\n\x10\x64uration_seconds\x18\x04 \x01(\x01\x12\x18\n\x10notes_per_second\x18\x05 \x01(\x01\"2\n\x11\x44\x65leteNoteRequest\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x11\n\tauthor_id\x18\x02 \x01(\x05\"\x84\x01\n\x10\x41lterNoteRequest\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x12\n\x05title\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x14\n\x07\x63ontent\x18\x03 \x01(\tH\x01\x88\x01\x01\x12\x16\n\tauthor_id\x18\x04 \x01(\x05H\x02\x88\x01\x01\x42\x08\n\x06_titleB\n\n\x08_contentB\x0c\n\n_author_id2\xab\x04\n\x0bNoteService\x12-\n\x07GetNote\x12\x15.proto.GetNoteRequest\x1a\x0b.proto.Note\x12J\n\rBatchGetNotes\x12\x1b.proto.BatchGetNotesRequest\x1a\x1c.proto.BatchGetNotesResponse\x12/\n\x08PostNote\x12\x16.proto.PostNoteRequest\x1a\x0b.proto.Note\x12=\n\x0bImportNotes\x12\x16.proto.PostNoteRequest\x1a\x14.proto.ImportSummary(\x01\x12\x31\n\tPatchNote\x12\x17.proto.AlterNoteRequest\x1a\x0b.proto.Note\x12\x33\n\nDeleteNote\x12\x18.proto.DeleteNoteRequest\x1a\x0b.proto.Note\x12\x41\n\x0bSearchNotes\x12\x1c.proto.GetSearchNotesRequest\x1a\x12.proto.MinimalNote0\x01\x12\x41\n\x10SearchNotesPaged\x12\x1c.proto.GetSearchNotesRequest\x1a\x0f.proto.NotePage\x12\x43\n\x0cSimilarNotes\x12\x1d.proto.GetSimilarNotesRequest\x1a\x12.proto.MinimalNote0\x01\x42\x31Z/github.com/KuramaSyu/Wersu-Rest/src/proto;protob\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,26 +34,40 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'src.grpc_mod.proto.note_pb2
 if not _descriptor._USE_C_DESCRIPTORS:
   _globals['DESCRIPTOR']._loaded_options = None
   _globals['DESCRIPTOR']._serialized_options = b'Z/github.com/KuramaSyu/Wersu-Rest/src/proto;proto'
-  _globals['_GETNOTEREQUEST']._serialized_start=73
-  _globals['_GETNOTEREQUEST']._serialized_end=118
-  _globals['_GETSEARCHNOTESREQUEST']._serialized_start=121
-  _globals['_GETSEARCHNOTESREQUEST']._serialized_end=355
-  _globals['_GETSEARCHNOTESREQUEST_SEARCHTYPE']._serialized_start=271
-  _globals['_GETSEARCHNOTESREQUEST_SEARCHTYPE']._serialized_end=355
-  _globals['_MINIMALNOTE']._serialized_start=358
-  _globals['_MINIMALNOTE']._serialized_end=491
-  _globals['_NOTE']._serialized_start=494
-  _globals['_NOTE']._serialized_end=661
-  _globals['_NOTEEMBEDDING']._serialized_start=663
-  _globals['_NOTEEMBEDDING']._serialized_end=712
-  _globals['_NOTEPERMISSION']._serialized_start=714
-  _globals['_NOTEPERMISSION']._serialized_end=747
-  _globals['_POSTNOTEREQUEST']._serialized_start=749
-  _globals['_POSTNOTEREQUEST']._serialized_end=834
-  _globals['_DELETENOTEREQUEST']._serialized_start=836
-  _globals['_DELETENOTEREQUEST']._serialized_end=886
-  _globals['_ALTERNOTEREQUEST']._serialized_start=889
-  _globals['_ALTERNOTEREQUEST']._serialized_end=1021
-  _globals['_NOTESERVICE']._serialized_start=1024
-  _globals['_NOTESERVICE']._serialized_end=1304
+  _globals['_GETNOTEREQUEST']._serialized_start=107
+  _globals['_GETNOTEREQUEST']._serialized_end=199
+  _globals['_BATCHGETNOTESREQUEST']._serialized_start=201
+  _globals['_BATCHGETNOTESREQUEST']._serialized_end=300
+  _globals['_NOTERESULT']._serialized_start=302
+  _globals['_NOTERESULT']._serialized_end=386
+  _globals['_BATCHGETNOTESRESPONSE']._serialized_start=388
+  _globals['_BATCHGETNOTESRESPONSE']._serialized_end=447
+  _globals['_GETSEARCHNOTESREQUEST']._serialized_start=450
+  _globals['_GETSEARCHNOTESREQUEST']._serialized_end=700
+  _globals['_GETSEARCHNOTESREQUEST_SEARCHTYPE']._serialized_start=616
+  _globals['_GETSEARCHNOTESREQUEST_SEARCHTYPE']._serialized_end=700
+  _globals['_GETSIMILARNOTESREQUEST']._serialized_start=702
+  _globals['_GETSIMILARNOTESREQUEST']._serialized_end=775
+  _globals['_MINIMALNOTE']._serialized_start=778
+  _globals['_MINIMALNOTE']._serialized_end=911
+  _globals['_NOTEPAGE']._serialized_start=913
+  _globals['_NOTEPAGE']._serialized_end=979
+  _globals['_NOTE']._serialized_start=982
+  _globals['_NOTE']._serialized_end=1149
+  _globals['_NOTEEMBEDDING']._serialized_start=1151
+  _globals['_NOTEEMBEDDING']._serialized_end=1200
+  _globals['_NOTEPERMISSION']._serialized_start=1202
+  _globals['_NOTEPERMISSION']._serialized_end=1235
+  _globals['_POSTNOTEREQUEST']._serialized_start=1238
+  _globals['_POSTNOTEREQUEST']._serialized_end=1367
+  _globals['_IMPORTFAILURE']._serialized_start=1369
+  _globals['_IMPORTFAILURE']._serialized_end=1415
+  _globals['_IMPORTSUMMARY']._serialized_start=1418
+  _globals['_IMPORTSUMMARY']._serialized_end=1559
+  _globals['_DELETENOTEREQUEST']._serialized_start=1561
+  _globals['_DELETENOTEREQUEST']._serialized_end=1611
+  _globals['_ALTERNOTEREQUEST']._serialized_start=1614
+  _globals['_ALTERNOTEREQUEST']._serialized_end=1746
+  _globals['_NOTESERVICE']._serialized_start=1749
+  _globals['_NOTESERVICE']._serialized_end=2304
 # @@protoc_insertion_point(module_scope)
@@ -6,6 +6,7 @@ isort:skip_file
 import builtins
 import collections.abc
 import google.protobuf.descriptor
+import google.protobuf.field_mask_pb2
 import google.protobuf.internal.containers
 import google.protobuf.internal.enum_type_wrapper
 import google.protobuf.message
@@ -28,18 +29,97 @@ class GetNoteRequest(google.protobuf.message.Message):
 
     ID_FIELD_NUMBER: builtins.int
     USER_ID_FIELD_NUMBER: builtins.int
+    READ_MASK_FIELD_NUMBER: builtins.int
     id: builtins.int
     user_id: builtins.int
+    @property
+    def read_mask(self) -> google.protobuf.field_mask_pb2.FieldMask:
+        """fields of the returned Note, e.g. ["id", "title", "updated_at"]. Empty returns all fields"""
+
     def __init__(
         self,
         *,
         id: builtins.int = ...,
         user_id: builtins.int = ...,
+        read_mask: google.protobuf.field_mask_pb2.FieldMask | None = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["id", b"id", "user_id", b"user_id"]) -> None: ...
+    def HasField(self, field_name: typing.Literal["read_mask", b"read_mask"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["id", b"id", "read_mask", b"read_mask", "user_id", b"user_id"]) -> None: ...
 
 Global___GetNoteRequest: typing_extensions.TypeAlias = GetNoteRequest
 
+@typing.final
+class BatchGetNotesRequest(google.protobuf.message.Message):
+    """Request for getting multiple notes by id"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    IDS_FIELD_NUMBER: builtins.int
+    USER_ID_FIELD_NUMBER: builtins.int
+    READ_MASK_FIELD_NUMBER: builtins.int
+    user_id: builtins.int
+    @property
+    def ids(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+    @property
+    def read_mask(self) -> google.protobuf.field_mask_pb2.FieldMask:
+        """fields of the returned Notes, see GetNoteRequest.read_mask"""
+
+    def __init__(
+        self,
+        *,
+        ids: collections.abc.Iterable[builtins.int] | None = ...,
+        user_id: builtins.int = ...,
+        read_mask: google.protobuf.field_mask_pb2.FieldMask | None = ...,
+    ) -> None: ...
+    def HasField(self, field_name: typing.Literal["read_mask", b"read_mask"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["ids", b"ids", "read_mask", b"read_mask", "user_id", b"user_id"]) -> None: ...
+
+Global___BatchGetNotesRequest: typing_extensions.TypeAlias = BatchGetNotesRequest
+
+@typing.final
+class NoteResult(google.protobuf.message.Message):
+    """Result for one requested id"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ID_FIELD_NUMBER: builtins.int
+    NOTE_FIELD_NUMBER: builtins.int
+    NOT_FOUND_FIELD_NUMBER: builtins.int
+    id: builtins.int
+    not_found: builtins.bool
+    @property
+    def note(self) -> Global___Note: ...
+    def __init__(
+        self,
+        *,
+        id: builtins.int = ...,
+        note: Global___Note | None = ...,
+        not_found: builtins.bool = ...,
+    ) -> None: ...
+    def HasField(self, field_name: typing.Literal["not_found", b"not_found", "note", b"note", "result", b"result"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["id", b"id", "not_found", b"not_found", "note", b"note", "result", b"result"]) -> None: ...
+    def WhichOneof(self, oneof_group: typing.Literal["result", b"result"]) -> typing.Literal["note", "not_found"] | None: ...
+
+Global___NoteResult: typing_extensions.TypeAlias = NoteResult
+
+@typing.final
+class BatchGetNotesResponse(google.protobuf.message.Message):
+    """Results in the order of the requested ids"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    RESULTS_FIELD_NUMBER: builtins.int
+    @property
+    def results(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[Global___NoteResult]: ...
+    def __init__(
+        self,
+        *,
+        results: collections.abc.Iterable[Global___NoteResult] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["results", b"results"]) -> None: ...
+
+Global___BatchGetNotesResponse: typing_extensions.TypeAlias = BatchGetNotesResponse
+
 @typing.final
 class GetSearchNotesRequest(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
@@ -78,6 +158,7 @@ class GetSearchNotesRequest(google.protobuf.message.Message):
     LIMIT_FIELD_NUMBER: builtins.int
     OFFSET_FIELD_NUMBER: builtins.int
     USER_ID_FIELD_NUMBER: builtins.int
+    CURSOR_FIELD_NUMBER: builtins.int
     search_type: Global___GetSearchNotesRequest.SearchType.ValueType
     """Search parameters"""
     query: builtins.str
@@ -86,6 +167,10 @@ class GetSearchNotesRequest(google.protobuf.message.Message):
     offset: builtins.int
     user_id: builtins.int
     """authentication"""
+    cursor: builtins.bytes
+    """opaque cursor of a previous NotePage (next_cursor).
+    When set, it takes precedence over offset
+    """
     def __init__(
         self,
         *,
@@ -94,11 +179,35 @@ class GetSearchNotesRequest(google.protobuf.message.Message):
         limit: builtins.int = ...,
         offset: builtins.int = ...,
         user_id: builtins.int = ...,
+        cursor: builtins.bytes = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["limit", b"limit", "offset", b"offset", "query", b"query", "search_type", b"search_type", "user_id", b"user_id"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["cursor", b"cursor", "limit", b"limit", "offset", b"offset", "query", b"query", "search_type", b"search_type", "user_id", b"user_id"]) -> None: ...
 
 Global___GetSearchNotesRequest: typing_extensions.TypeAlias = GetSearchNotesRequest
 
+@typing.final
+class GetSimilarNotesRequest(google.protobuf.message.Message):
+    """Request for notes which are similar to an existing note"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    NOTE_ID_FIELD_NUMBER: builtins.int
+    USER_ID_FIELD_NUMBER: builtins.int
+    LIMIT_FIELD_NUMBER: builtins.int
+    note_id: builtins.int
+    user_id: builtins.int
+    limit: builtins.int
+    def __init__(
+        self,
+        *,
+        note_id: builtins.int = ...,
+        user_id: builtins.int = ...,
+        limit: builtins.int = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["limit", b"limit", "note_id", b"note_id", "user_id", b"user_id"]) -> None: ...
+
+Global___GetSimilarNotesRequest: typing_extensions.TypeAlias = GetSimilarNotesRequest
+
 @typing.final
 class MinimalNote(google.protobuf.message.Message):
     """Response: represents a minimal Note for search results"""
@@ -131,6 +240,28 @@ class MinimalNote(google.protobuf.message.Message):
 
 Global___MinimalNote: typing_extensions.TypeAlias = MinimalNote
 
+@typing.final
+class NotePage(google.protobuf.message.Message):
+    """Response: one page of minimal notes for paged search results"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    NOTES_FIELD_NUMBER: builtins.int
+    NEXT_CURSOR_FIELD_NUMBER: builtins.int
+    next_cursor: builtins.bytes
+    """empty, when there are no further pages"""
+    @property
+    def notes(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[Global___MinimalNote]: ...
+    def __init__(
+        self,
+        *,
+        notes: collections.abc.Iterable[Global___MinimalNote] | None = ...,
+        next_cursor: builtins.bytes = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["next_cursor", b"next_cursor", "notes", b"notes"]) -> None: ...
+
+Global___NotePage: typing_extensions.TypeAlias = NotePage
+
 @typing.final
 class Note(google.protobuf.message.Message):
     """Response: represents a Note"""
@@ -211,22 +342,82 @@ class PostNoteRequest(google.protobuf.message.Message):
     TITLE_FIELD_NUMBER: builtins.int
     CONTENT_FIELD_NUMBER: builtins.int
     AUTHOR_ID_FIELD_NUMBER: builtins.int
+    PERMISSIONS_FIELD_NUMBER: builtins.int
     title: builtins.str
     content: builtins.str
     author_id: builtins.int
+    @property
+    def permissions(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[Global___NotePermission]:
+        """roles which may access the note"""
+
     def __init__(
         self,
         *,
         title: builtins.str = ...,
         content: builtins.str | None = ...,
         author_id: builtins.int = ...,
+        permissions: collections.abc.Iterable[Global___NotePermission] | None = ...,
     ) -> None: ...
     def HasField(self, field_name: typing.Literal["_content", b"_content", "content", b"content"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["_content", b"_content", "author_id", b"author_id", "content", b"content", "title", b"title"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["_content", b"_content", "author_id", b"author_id", "content", b"content", "permissions", b"permissions", "title", b"title"]) -> None: ...
     def WhichOneof(self, oneof_group: typing.Literal["_content", b"_content"]) -> typing.Literal["content"] | None: ...
 
 Global___PostNoteRequest: typing_extensions.TypeAlias = PostNoteRequest
 
+@typing.final
+class ImportFailure(google.protobuf.message.Message):
+    """A note of an ImportNotes stream which was not imported"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    INDEX_FIELD_NUMBER: builtins.int
+    REASON_FIELD_NUMBER: builtins.int
+    index: builtins.int
+    """position of the note in the stream, starting at 0"""
+    reason: builtins.str
+    """e.g. "note already exists", "unknown author or role", "invalid field" or "internal error" """
+    def __init__(
+        self,
+        *,
+        index: builtins.int = ...,
+        reason: builtins.str = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["index", b"index", "reason", b"reason"]) -> None: ...
+
+Global___ImportFailure: typing_extensions.TypeAlias = ImportFailure
+
+@typing.final
+class ImportSummary(google.protobuf.message.Message):
+    """Result of an ImportNotes stream"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    IMPORTED_FIELD_NUMBER: builtins.int
+    FAILED_FIELD_NUMBER: builtins.int
+    FAILURES_FIELD_NUMBER: builtins.int
+    DURATION_SECONDS_FIELD_NUMBER: builtins.int
+    NOTES_PER_SECOND_FIELD_NUMBER: builtins.int
+    imported: builtins.int
+    failed: builtins.int
+    duration_seconds: builtins.float
+    notes_per_second: builtins.float
+    @property
+    def failures(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[Global___ImportFailure]:
+        """the first failures; `failed` counts all of them"""
+
+    def __init__(
+        self,
+        *,
+        imported: builtins.int = ...,
+        failed: builtins.int = ...,
+        failures: collections.abc.Iterable[Global___ImportFailure] | None = ...,
+        duration_seconds: builtins.float = ...,
+        notes_per_second: builtins.float = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["duration_seconds", b"duration_seconds", "failed", b"failed", "failures", b"failures", "imported", b"imported", "notes_per_second", b"notes_per_second"]) -> None: ...
+
+Global___ImportSummary: typing_extensions.TypeAlias = ImportSummary
+
 @typing.final
 class DeleteNoteRequest(google.protobuf.message.Message):
     """Request to delete a note"""
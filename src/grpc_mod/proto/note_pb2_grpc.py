@@ -40,11 +40,21 @@ class NoteServiceStub(object):
                 request_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.GetNoteRequest.SerializeToString,
                 response_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.Note.FromString,
                 _registered_method=True)
+        self.BatchGetNotes = channel.unary_unary(
+                '/proto.NoteService/BatchGetNotes',
+                request_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.BatchGetNotesRequest.SerializeToString,
+                response_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.BatchGetNotesResponse.FromString,
+                _registered_method=True)
         self.PostNote = channel.unary_unary(
                 '/proto.NoteService/PostNote',
                 request_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.PostNoteRequest.SerializeToString,
                 response_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.Note.FromString,
                 _registered_method=True)
+        self.ImportNotes = channel.stream_unary(
+                '/proto.NoteService/ImportNotes',
+                request_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.PostNoteRequest.SerializeToString,
+                response_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.ImportSummary.FromString,
+                _registered_method=True)
         self.PatchNote = channel.unary_unary(
                 '/proto.NoteService/PatchNote',
                 request_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.AlterNoteRequest.SerializeToString,
@@ -60,6 +70,16 @@ class NoteServiceStub(object):
                 request_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.GetSearchNotesRequest.SerializeToString,
                 response_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.MinimalNote.FromString,
                 _registered_method=True)
+        self.SearchNotesPaged = channel.unary_unary(
+                '/proto.NoteService/SearchNotesPaged',
+                request_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.GetSearchNotesRequest.SerializeToString,
+                response_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.NotePage.FromString,
+                _registered_method=True)
+        self.SimilarNotes = channel.unary_stream(
+                '/proto.NoteService/SimilarNotes',
+                request_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.GetSimilarNotesRequest.SerializeToString,
+                response_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.MinimalNote.FromString,
+                _registered_method=True)
 
 
 class NoteServiceServicer(object):
@@ -72,12 +92,25 @@ class NoteServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchGetNotes(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def PostNote(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ImportNotes(self, request_iterator, context):
+        """bulk import, e.g. of an existing notebook; written in chunks
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def PatchNote(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -96,6 +129,18 @@ class NoteServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SearchNotesPaged(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SimilarNotes(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_NoteServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -104,11 +149,21 @@ def add_NoteServiceServicer_to_server(servicer, server):
                     request_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.GetNoteRequest.FromString,
                     response_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.Note.SerializeToString,
             ),
+            'BatchGetNotes': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetNotes,
+                    request_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.BatchGetNotesRequest.FromString,
+                    response_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.BatchGetNotesResponse.SerializeToString,
+            ),
             'PostNote': grpc.unary_unary_rpc_method_handler(
                     servicer.PostNote,
                     request_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.PostNoteRequest.FromString,
                     response_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.Note.SerializeToString,
             ),
+            'ImportNotes': grpc.stream_unary_rpc_method_handler(
+                    servicer.ImportNotes,
+                    request_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.PostNoteRequest.FromString,
+                    response_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.ImportSummary.SerializeToString,
+            ),
             'PatchNote': grpc.unary_unary_rpc_method_handler(
                     servicer.PatchNote,
                     request_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.AlterNoteRequest.FromString,
@@ -124,6 +179,16 @@ def add_NoteServiceServicer_to_server(servicer, server):
                     request_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.GetSearchNotesRequest.FromString,
                     response_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.MinimalNote.SerializeToString,
             ),
+            'SearchNotesPaged': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchNotesPaged,
+                    request_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.GetSearchNotesRequest.FromString,
+                    response_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.NotePage.SerializeToString,
+            ),
+            'SimilarNotes': grpc.unary_stream_rpc_method_handler(
+                    servicer.SimilarNotes,
+                    request_deserializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.GetSimilarNotesRequest.FromString,
+                    response_serializer=src_dot_grpc__mod_dot_proto_dot_note__pb2.MinimalNote.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'proto.NoteService', rpc_method_handlers)
@@ -163,6 +228,33 @@ class NoteService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BatchGetNotes(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/proto.NoteService/BatchGetNotes',
+            src_dot_grpc__mod_dot_proto_dot_note__pb2.BatchGetNotesRequest.SerializeToString,
+            src_dot_grpc__mod_dot_proto_dot_note__pb2.BatchGetNotesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def PostNote(request,
             target,
@@ -190,6 +282,33 @@ class NoteService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ImportNotes(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/proto.NoteService/ImportNotes',
+            src_dot_grpc__mod_dot_proto_dot_note__pb2.PostNoteRequest.SerializeToString,
+            src_dot_grpc__mod_dot_proto_dot_note__pb2.ImportSummary.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def PatchNote(request,
             target,
@@ -270,3 +389,57 @@ class NoteService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def SearchNotesPaged(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/proto.NoteService/SearchNotesPaged',
+            src_dot_grpc__mod_dot_proto_dot_note__pb2.GetSearchNotesRequest.SerializeToString,
+            src_dot_grpc__mod_dot_proto_dot_note__pb2.NotePage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SimilarNotes(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/proto.NoteService/SimilarNotes',
+            src_dot_grpc__mod_dot_proto_dot_note__pb2.GetSimilarNotesRequest.SerializeToString,
+            src_dot_grpc__mod_dot_proto_dot_note__pb2.MinimalNote.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1dsrc/grpc_mod/proto/user.proto\x12\x05proto\"n\n\x04User\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x12\n\ndiscord_id\x18\x02 \x01(\x03\x12\x0e\n\x06\x61vatar\x18\x03 \x01(\t\x12\x10\n\x08username\x18\x04 \x01(\t\x12\x15\n\rdiscriminator\x18\x05 \x01(\t\x12\r\n\x05\x65mail\x18\x06 \x01(\t\"P\n\x0eGetUserRequest\x12\x0f\n\x02id\x18\x01 \x01(\x05H\x00\x88\x01\x01\x12\x17\n\ndiscord_id\x18\x02 \x01(\x03H\x01\x88\x01\x01\x42\x05\n\x03_idB\r\n\x0b_discord_id\"m\n\x0fPostUserRequest\x12\x12\n\ndiscord_id\x18\x01 \x01(\x03\x12\x0e\n\x06\x61vatar\x18\x02 \x01(\t\x12\x10\n\x08username\x18\x03 \x01(\t\x12\x15\n\rdiscriminator\x18\x04 \x01(\t\x12\r\n\x05\x65mail\x18\x05 \x01(\t\"\xd6\x01\n\x10\x41lterUserRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x17\n\ndiscord_id\x18\x02 \x01(\x03H\x00\x88\x01\x01\x12\x13\n\x06\x61vatar\x18\x03 \x01(\tH\x01\x88\x01\x01\x12\x15\n\x08username\x18\x04 \x01(\tH\x02\x88\x01\x01\x12\x1a\n\rdiscriminator\x18\x05 \x01(\tH\x03\x88\x01\x01\x12\x12\n\x05\x65mail\x18\x06 \x01(\tH\x04\x88\x01\x01\x42\r\n\x0b_discord_idB\t\n\x07_avatarB\x0b\n\t_usernameB\x10\n\x0e_discriminatorB\x08\n\x06_email\"\x1f\n\x11\x44\x65leteUserRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"%\n\x12\x44\x65leteUserResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x32\xe3\x01\n\x0bUserService\x12-\n\x07GetUser\x12\x15.proto.GetUserRequest\x1a\x0b.proto.User\x12/\n\x08PostUser\x12\x16.proto.PostUserRequest\x1a\x0b.proto.User\x12\x31\n\tAlterUser\x12\x17.proto.AlterUserRequest\x1a\x0b.proto.User\x12\x41\n\nDeleteUser\x12\x18.proto.DeleteUserRequest\x1a\x19.proto.DeleteUserResponseB1Z/github.com/KuramaSyu/WerSu-Rest/src/proto;protob\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1dsrc/grpc_mod/proto/user.proto\x12\x05proto\"n\n\x04User\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x12\n\ndiscord_id\x18\x02 \x01(\x03\x12\x0e\n\x06\x61vatar\x18\x03 \x01(\t\x12\x10\n\x08username\x18\x04 \x01(\t\x12\x15\n\rdiscriminator\x18\x05 \x01(\t\x12\r\n\x05\x65mail\x18\x06 \x01(\t\"P\n\x0eGetUserRequest\x12\x0f\n\x02id\x18\x01 \x01(\x05H\x00\x88\x01\x01\x12\x17\n\ndiscord_id\x18\x02 \x01(\x03H\x01\x88\x01\x01\x42\x05\n\x03_idB\r\n\x0b_discord_id\"8\n\x14\x42\x61tchGetUsersRequest\x12\x0b\n\x03ids\x18\x01 \x03(\x05\x12\x13\n\x0b\x64iscord_ids\x18\x02 \x03(\x03\"s\n\nUserResult\x12\x0c\n\x02id\x18\x01 \x01(\x05H\x00\x12\x14\n\ndiscord_id\x18\x02 \x01(\x03H\x00\x12\x1b\n\x04user\x18\x03 \x01(\x0b\x32\x0b.proto.UserH\x01\x12\x13\n\tnot_found\x18\x04 \x01(\x08H\x01\x42\x05\n\x03keyB\x08\n\x06result\";\n\x15\x42\x61tchGetUsersResponse\x12\"\n\x07results\x18\x01 \x03(\x0b\x32\x11.proto.UserResult\"m\n\x0fPostUserRequest\x12\x12\n\ndiscord_id\x18\x01 \x01(\x03\x12\x0e\n\x06\x61vatar\x18\x02 \x01(\t\x12\x10\n\x08username\x18\x03 \x01(\t\x12\x15\n\rdiscriminator\x18\x04 \x01(\t\x12\r\n\x05\x65mail\x18\x05 \x01(\t\"\xd6\x01\n\x10\x41lterUserRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x17\n\ndiscord_id\x18\x02 \x01(\x03H\x00\x88\x01\x01\x12\x13\n\x06\x61vatar\x18\x03 \x01(\tH\x01\x88\x01\x01\x12\x15\n\x08username\x18\x04 \x01(\tH\x02\x88\x01\x01\x12\x1a\n\rdiscriminator\x18\x05 \x01(\tH\x03\x88\x01\x01\x12\x12\n\x05\x65mail\x18\x06 \x01(\tH\x04\x88\x01\x01\x42\r\n\x0b_discord_idB\t\n\x07_avatarB\x0b\n\t_usernameB\x10\n\x0e_discriminatorB\x08\n\x06_email\"\x1f\n\x11\x44\x65leteUserRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"%\n\x12\x44\x65leteUserResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x32\xaf\x02\n\x0bUserService\x12-\n\x07GetUser\x12\x15.proto.GetUserRequest\x1a\x0b.proto.User\x12J\n\rBatchGetUsers\x12\x1b.proto.BatchGetUsersRequest\x1a\x1c.proto.BatchGetUsersResponse\x12/\n\x08PostUser\x12\x16.proto.PostUserRequest\x1a\x0b.proto.User\x12\x31\n\tAlterUser\x12\x17.proto.AlterUserRequest\x1a\x0b.proto.User\x12\x41\n\nDeleteUser\x12\x18.proto.DeleteUserRequest\x1a\x19.proto.DeleteUserResponseB1Z/github.com/KuramaSyu/WerSu-Rest/src/proto;protob\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -36,14 +36,20 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_USER']._serialized_end=150
   _globals['_GETUSERREQUEST']._serialized_start=152
   _globals['_GETUSERREQUEST']._serialized_end=232
-  _globals['_POSTUSERREQUEST']._serialized_start=234
-  _globals['_POSTUSERREQUEST']._serialized_end=343
-  _globals['_ALTERUSERREQUEST']._serialized_start=346
-  _globals['_ALTERUSERREQUEST']._serialized_end=560
-  _globals['_DELETEUSERREQUEST']._serialized_start=562
-  _globals['_DELETEUSERREQUEST']._serialized_end=593
-  _globals['_DELETEUSERRESPONSE']._serialized_start=595
-  _globals['_DELETEUSERRESPONSE']._serialized_end=632
-  _globals['_USERSERVICE']._serialized_start=635
-  _globals['_USERSERVICE']._serialized_end=862
+  _globals['_BATCHGETUSERSREQUEST']._serialized_start=234
+  _globals['_BATCHGETUSERSREQUEST']._serialized_end=290
+  _globals['_USERRESULT']._serialized_start=292
+  _globals['_USERRESULT']._serialized_end=407
+  _globals['_BATCHGETUSERSRESPONSE']._serialized_start=409
+  _globals['_BATCHGETUSERSRESPONSE']._serialized_end=468
+  _globals['_POSTUSERREQUEST']._serialized_start=470
+  _globals['_POSTUSERREQUEST']._serialized_end=579
+  _globals['_ALTERUSERREQUEST']._serialized_start=582
+  _globals['_ALTERUSERREQUEST']._serialized_end=796
+  _globals['_DELETEUSERREQUEST']._serialized_start=798
+  _globals['_DELETEUSERREQUEST']._serialized_end=829
+  _globals['_DELETEUSERRESPONSE']._serialized_start=831
+  _globals['_DELETEUSERRESPONSE']._serialized_end=868
+  _globals['_USERSERVICE']._serialized_start=871
+  _globals['_USERSERVICE']._serialized_end=1174
 # @@protoc_insertion_point(module_scope)
@@ -4,7 +4,9 @@ isort:skip_file
 """
 
 import builtins
+import collections.abc
 import google.protobuf.descriptor
+import google.protobuf.internal.containers
 import google.protobuf.message
 import sys
 import typing
@@ -71,6 +73,78 @@ class GetUserRequest(google.protobuf.message.Message):
 
 Global___GetUserRequest: typing_extensions.TypeAlias = GetUserRequest
 
+@typing.final
+class BatchGetUsersRequest(google.protobuf.message.Message):
+    """Request for resolving multiple users by id and/or discord_id"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    IDS_FIELD_NUMBER: builtins.int
+    DISCORD_IDS_FIELD_NUMBER: builtins.int
+    @property
+    def ids(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+    @property
+    def discord_ids(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+    def __init__(
+        self,
+        *,
+        ids: collections.abc.Iterable[builtins.int] | None = ...,
+        discord_ids: collections.abc.Iterable[builtins.int] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["discord_ids", b"discord_ids", "ids", b"ids"]) -> None: ...
+
+Global___BatchGetUsersRequest: typing_extensions.TypeAlias = BatchGetUsersRequest
+
+@typing.final
+class UserResult(google.protobuf.message.Message):
+    """Result for one requested id or discord_id"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    ID_FIELD_NUMBER: builtins.int
+    DISCORD_ID_FIELD_NUMBER: builtins.int
+    USER_FIELD_NUMBER: builtins.int
+    NOT_FOUND_FIELD_NUMBER: builtins.int
+    id: builtins.int
+    discord_id: builtins.int
+    not_found: builtins.bool
+    @property
+    def user(self) -> Global___User: ...
+    def __init__(
+        self,
+        *,
+        id: builtins.int = ...,
+        discord_id: builtins.int = ...,
+        user: Global___User | None = ...,
+        not_found: builtins.bool = ...,
+    ) -> None: ...
+    def HasField(self, field_name: typing.Literal["discord_id", b"discord_id", "id", b"id", "key", b"key", "not_found", b"not_found", "result", b"result", "user", b"user"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing.Literal["discord_id", b"discord_id", "id", b"id", "key", b"key", "not_found", b"not_found", "result", b"result", "user", b"user"]) -> None: ...
+    @typing.overload
+    def WhichOneof(self, oneof_group: typing.Literal["key", b"key"]) -> typing.Literal["id", "discord_id"] | None: ...
+    @typing.overload
+    def WhichOneof(self, oneof_group: typing.Literal["result", b"result"]) -> typing.Literal["user", "not_found"] | None: ...
+
+Global___UserResult: typing_extensions.TypeAlias = UserResult
+
+@typing.final
+class BatchGetUsersResponse(google.protobuf.message.Message):
+    """Results for the requested ids, followed by the ones for the requested discord_ids, each in request order"""
+
+    DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+    RESULTS_FIELD_NUMBER: builtins.int
+    @property
+    def results(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[Global___UserResult]: ...
+    def __init__(
+        self,
+        *,
+        results: collections.abc.Iterable[Global___UserResult] | None = ...,
+    ) -> None: ...
+    def ClearField(self, field_name: typing.Literal["results", b"results"]) -> None: ...
+
+Global___BatchGetUsersResponse: typing_extensions.TypeAlias = BatchGetUsersResponse
+
 @typing.final
 class PostUserRequest(google.protobuf.message.Message):
     DESCRIPTOR: google.protobuf.descriptor.Descriptor
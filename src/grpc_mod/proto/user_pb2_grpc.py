@@ -40,6 +40,11 @@ class UserServiceStub(object):
                 request_serializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.GetUserRequest.SerializeToString,
                 response_deserializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.User.FromString,
                 _registered_method=True)
+        self.BatchGetUsers = channel.unary_unary(
+                '/proto.UserService/BatchGetUsers',
+                request_serializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.BatchGetUsersRequest.SerializeToString,
+                response_deserializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.BatchGetUsersResponse.FromString,
+                _registered_method=True)
         self.PostUser = channel.unary_unary(
                 '/proto.UserService/PostUser',
                 request_serializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.PostUserRequest.SerializeToString,
@@ -67,6 +72,12 @@ class UserServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchGetUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def PostUser(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -93,6 +104,11 @@ def add_UserServiceServicer_to_server(servicer, server):
                     request_deserializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.GetUserRequest.FromString,
                     response_serializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.User.SerializeToString,
             ),
+            'BatchGetUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetUsers,
+                    request_deserializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.BatchGetUsersRequest.FromString,
+                    response_serializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.BatchGetUsersResponse.SerializeToString,
+            ),
             'PostUser': grpc.unary_unary_rpc_method_handler(
                     servicer.PostUser,
                     request_deserializer=src_dot_grpc__mod_dot_proto_dot_user__pb2.PostUserRequest.FromString,
@@ -147,6 +163,33 @@ class UserService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BatchGetUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/proto.UserService/BatchGetUsers',
+            src_dot_grpc__mod_dot_proto_dot_user__pb2.BatchGetUsersRequest.SerializeToString,
+            src_dot_grpc__mod_dot_proto_dot_user__pb2.BatchGetUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def PostUser(request,
             target,
@@ -1,9 +1,15 @@
+import asyncio
+from contextlib import aclosing
 from datetime import datetime
+import functools
+import inspect
+import time
 import traceback
 from logging import getLogger
 import logging
-from typing import AsyncIterator, Callable, List, Optional
+from typing import AsyncIterator, Callable, List, Optional, Tuple, Type
 
+from google.protobuf.field_mask_pb2 import FieldMask
 import grpc
 from grpc.aio import ServicerContext
 import asyncpg
@@ -11,9 +17,12 @@ import asyncpg
 from src.api import LoggingProvider
 from src.api.types import Pagination
 from src.api.undefined import UNDEFINED
+from src.db import read_your_writes
 from src.db.repos import NoteRepoFacadeABC
 from src.db.entities import NoteEntity
+from src.db.entities.note.permission import NotePermissionEntity
 from src.db.repos.note.note import SearchType, UserContext
+from src.db.repos.note.search_planner import SearchPlan
 from src.grpc_mod import (
     GetNoteRequest, NoteEmbedding, 
     NotePermission, PostNoteRequest, Note,
@@ -21,11 +30,96 @@ from src.grpc_mod import (
     UserServiceServicer, GetUserRequest, User, 
     AlterUserRequest, DeleteUserRequest, 
     DeleteUserResponse, PostUserRequest,
+    BatchGetUsersRequest, BatchGetUsersResponse, UserResult,
 )
-from src.grpc_mod.converter import to_grpc_note, to_grpc_user
+from src.grpc_mod.converter import to_grpc_note, to_grpc_user, to_note_projection, encode_page_cursor, decode_page_cursor
 from src.db import UserRepoABC, UserEntity
 from src.grpc_mod.converter.note_entity_converter import to_grpc_minimal_note, to_search_type
-from src.grpc_mod.proto.note_pb2 import AlterNoteRequest, DeleteNoteRequest, GetSearchNotesRequest, MinimalNote
+from src.grpc_mod.proto.note_pb2 import AlterNoteRequest, BatchGetNotesRequest, BatchGetNotesResponse, DeleteNoteRequest, GetSearchNotesRequest, GetSimilarNotesRequest, ImportFailure, ImportSummary, MinimalNote, NotePage, NoteResult
+
+
+# page size of SearchNotesPaged, when the request does not set a limit
+DEFAULT_PAGE_SIZE = 50
+
+# maximum amount of ids per BatchGetNotes and BatchGetUsers request
+MAX_BATCH_SIZE = 500
+
+# initial metadata of search responses, which tells the search strategy that actually ran
+SEARCH_STRATEGY_METADATA_KEY = "x-search-strategy"
+SEARCH_PLAN_REASON_METADATA_KEY = "x-search-plan-reason"
+
+# notes per chunk of ImportNotes, written in one transaction
+IMPORT_CHUNK_SIZE = 500
+# full chunks which wait for the database; more stop reading the stream (backpressure)
+IMPORT_BUFFERED_CHUNKS = 2
+# failures which are reported by index in the ImportSummary
+MAX_IMPORT_FAILURES = 100
+# reasons of an ImportFailure. The errors themselves are only logged, since
+# they contain constraint names and SQL of the database
+_IMPORT_FAILURE_REASONS: List[Tuple[Type[Exception], str]] = [
+    (asyncpg.UniqueViolationError, "note already exists"),
+    (asyncpg.ForeignKeyViolationError, "unknown author or role"),
+    (asyncpg.NotNullViolationError, "missing field"),
+    (asyncpg.CheckViolationError, "invalid field"),
+    (asyncpg.DataError, "invalid field"),
+    (ValueError, "invalid note"),
+]
+
+
+def _apply_read_mask(note: Note, read_mask: FieldMask) -> Note:
+    """drops the fields of the note which are not in the read mask. An empty mask keeps all"""
+    if not read_mask.paths:
+        return note
+    masked = Note()
+    read_mask.MergeMessage(note, masked)
+    return masked
+
+
+def _note_from_post_request(request: PostNoteRequest) -> NoteEntity:
+    return NoteEntity(
+        note_id=UNDEFINED,
+        author_id=request.author_id,
+        content=request.content,
+        embeddings=[],
+        permissions=[
+            NotePermissionEntity(note_id=UNDEFINED, role_id=permission.role_id)
+            for permission in request.permissions
+        ],
+        title=request.title,
+        updated_at=datetime.now(),
+    )
+
+
+def _import_failure_reason(error: Exception) -> Optional[str]:
+    """the reason of an ImportFailure, which is sent to the client; None for unexpected errors"""
+    for error_type, reason in _IMPORT_FAILURE_REASONS:
+        if isinstance(error, error_type):
+            return reason
+    return None
+
+
+def _consistency_key(request: object) -> Optional[int]:
+    """the user of a request or entity, used as `read_your_writes` key"""
+    return getattr(request, "user_id", None) or getattr(request, "author_id", None) or None
+
+
+def _per_user_consistency(handler: Callable) -> Callable:
+    """runs the handler with the user of the request as `read_your_writes` key, 
+    so a user sees the own writes even when reads go to a lagging replica"""
+    if inspect.isasyncgenfunction(handler):
+        @functools.wraps(handler)
+        async def stream(self, request, context):
+            with read_your_writes(_consistency_key(request)):
+                async with aclosing(handler(self, request, context)) as responses:
+                    async for response in responses:
+                        yield response
+        return stream
+
+    @functools.wraps(handler)
+    async def unary(self, request, context):
+        with read_your_writes(_consistency_key(request)):
+            return await handler(self, request, context)
+    return unary
 
 
 class GrpcNoteService(NoteServiceServicer):
@@ -37,29 +131,59 @@ class GrpcNoteService(NoteServiceServicer):
         self.repo = repo
         self.log = log(__name__, self)
  
+    @_per_user_consistency
     async def GetNote(self, request: GetNoteRequest, context: ServicerContext) -> Note:
         try:
-            note_entity = await self.repo.select_by_id(request.id, UserContext(user_id=request.user_id))
-            return to_grpc_note(note_entity)
+            projection = to_note_projection(request.read_mask)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return Note()
+        try:
+            note_entity = await self.repo.select_by_id(
+                request.id, UserContext(user_id=request.user_id), projection=projection
+            )
+            return _apply_read_mask(to_grpc_note(note_entity), request.read_mask)
         except Exception:
             self.log.error(f"Error fetching note: {traceback.format_exc()}")
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details("Internal server error while fetching note")
             return Note()
 
-    async def PostNote(self, request: PostNoteRequest, context: ServicerContext) -> Note:
+    @_per_user_consistency
+    async def BatchGetNotes(self, request: BatchGetNotesRequest, context: ServicerContext) -> BatchGetNotesResponse:
+        if len(request.ids) > MAX_BATCH_SIZE:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"At most {MAX_BATCH_SIZE} ids can be requested at once")
+            return BatchGetNotesResponse()
         try:
-            note_entity = await self.repo.insert(
-                NoteEntity(
-                    note_id=UNDEFINED,
-                    author_id=request.author_id,
-                    content=request.content,
-                    embeddings=[],
-                    permissions=[],
-                    title=request.title,
-                    updated_at=datetime.now(),
-                )
+            projection = to_note_projection(request.read_mask)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return BatchGetNotesResponse()
+        try:
+            note_entities = await self.repo.select_by_ids(
+                list(request.ids), UserContext(user_id=request.user_id), projection=projection
             )
+            results: List[NoteResult] = []
+            for note_id, note_entity in zip(request.ids, note_entities):
+                if note_entity is None:
+                    results.append(NoteResult(id=note_id, not_found=True))
+                else:
+                    note = _apply_read_mask(to_grpc_note(note_entity), request.read_mask)
+                    results.append(NoteResult(id=note_id, note=note))
+            return BatchGetNotesResponse(results=results)
+        except Exception:
+            self.log.error(f"Error fetching notes: {traceback.format_exc()}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error while fetching notes")
+            return BatchGetNotesResponse()
+
+    @_per_user_consistency
+    async def PostNote(self, request: PostNoteRequest, context: ServicerContext) -> Note:
+        try:
+            note_entity = await self.repo.insert(_note_from_post_request(request))
             return to_grpc_note(note_entity)
         except asyncpg.UniqueViolationError as e:
             context.set_code(grpc.StatusCode.ALREADY_EXISTS)
@@ -71,6 +195,77 @@ class GrpcNoteService(NoteServiceServicer):
             context.set_details("Internal server error while creating note")
             return Note()
 
+    async def ImportNotes(
+        self, request_iterator: AsyncIterator[PostNoteRequest], context: ServicerContext
+    ) -> ImportSummary:
+        """writes the streamed notes in chunks of `IMPORT_CHUNK_SIZE`.
+
+        Reading the stream pauses while `IMPORT_BUFFERED_CHUNKS` chunks wait 
+        for the database, so that flow control slows down the client instead 
+        of buffering the whole import in memory.
+        """
+        chunks: asyncio.Queue[Optional[List[NoteEntity]]] = asyncio.Queue(maxsize=IMPORT_BUFFERED_CHUNKS)
+
+        async def read() -> None:
+            chunk: List[NoteEntity] = []
+            try:
+                async for request in request_iterator:
+                    chunk.append(_note_from_post_request(request))
+                    if len(chunk) >= IMPORT_CHUNK_SIZE:
+                        await chunks.put(chunk)
+                        chunk = []
+                if chunk:
+                    await chunks.put(chunk)
+            except Exception:
+                # wakes up the writer, which raises the error with `await reader`
+                await chunks.put(None)
+                raise
+            await chunks.put(None)
+
+        summary = ImportSummary()
+        start = time.perf_counter()
+        reader = asyncio.create_task(read())
+        try:
+            index = 0
+            while (chunk := await chunks.get()) is not None:
+                # like `_per_user_consistency`, but per chunk, since a stream has no single request
+                with read_your_writes(_consistency_key(chunk[0])):
+                    results = await self.repo.import_notes(chunk)
+                for result in results:
+                    if isinstance(result, Exception):
+                        summary.failed += 1
+                        reason = _import_failure_reason(result)
+                        if reason is None:
+                            self.log.error(
+                                f"Error importing note {index}: "
+                                f"{''.join(traceback.format_exception(result))}"
+                            )
+                            reason = "internal error"
+                        else:
+                            self.log.warning(f"Note {index} was not imported: {result!r}")
+                        if len(summary.failures) < MAX_IMPORT_FAILURES:
+                            summary.failures.append(ImportFailure(index=index, reason=reason))
+                    else:
+                        summary.imported += 1
+                    index += 1
+            # the error of the stream, if any
+            await reader
+        except Exception:
+            self.log.error(f"Error importing notes: {traceback.format_exc()}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Internal server error after importing {summary.imported} notes")
+        finally:
+            reader.cancel()
+        summary.duration_seconds = time.perf_counter() - start
+        if summary.duration_seconds > 0:
+            summary.notes_per_second = summary.imported / summary.duration_seconds
+        self.log.info(
+            f"Imported {summary.imported} notes ({summary.failed} failed) "
+            f"at {summary.notes_per_second:.0f} notes/s"
+        )
+        return summary
+
+    @_per_user_consistency
     async def PatchNote(self, request: AlterNoteRequest, context: ServicerContext) -> Note:
         try:
             note_entity = await self.repo.update(
@@ -93,6 +288,7 @@ class GrpcNoteService(NoteServiceServicer):
             context.set_details("Internal server error while updating note")
             return Note()
 
+    @_per_user_consistency
     async def DeleteNote(self, request: DeleteNoteRequest, context: ServicerContext) -> Note:
         try:
             deleted_note_entities = await self.repo.delete(
@@ -112,17 +308,87 @@ class GrpcNoteService(NoteServiceServicer):
             context.set_details("Internal server error while deleting note")
             return Note()
         
+    async def _plan_search(
+        self, request: GetSearchNotesRequest, context: ServicerContext
+    ) -> SearchPlan:
+        """plans the search within the remaining deadline of the call 
+        and announces the chosen strategy in the initial metadata"""
+        plan = self.repo.plan_search(
+            to_search_type(request.search_type),
+            request.query,
+            time_budget=context.time_remaining(),
+        )
+        await context.send_initial_metadata((
+            (SEARCH_STRATEGY_METADATA_KEY, plan.search_type.name.lower()),
+            (SEARCH_PLAN_REASON_METADATA_KEY, plan.reason),
+        ))
+        return plan
+
+    @_per_user_consistency
     async def SearchNotes(
         self, request: GetSearchNotesRequest, context: ServicerContext
     ) -> AsyncIterator[MinimalNote]:
-        notes = await self.repo.search_notes(
-            to_search_type(request.search_type),
+        plan = await self._plan_search(request, context)
+        notes = self.repo.stream_search_notes(
+            plan.search_type,
             request.query,
             pagination=Pagination(limit=request.limit, offset=request.offset),
             ctx=UserContext(user_id=request.user_id),
         )
-        for note in notes:
-            yield to_grpc_minimal_note(note)
+        # each note is sent as soon as its row arrives. When the client 
+        # cancels, the stream is closed, which also stops the DB scan
+        async with aclosing(notes):
+            async for note in notes:
+                yield to_grpc_minimal_note(note)
+
+    @_per_user_consistency
+    async def SearchNotesPaged(
+        self, request: GetSearchNotesRequest, context: ServicerContext
+    ) -> NotePage:
+        try:
+            offset = decode_page_cursor(request.cursor) if request.cursor else request.offset
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return NotePage()
+        page_size = request.limit or DEFAULT_PAGE_SIZE
+
+        try:
+            plan = await self._plan_search(request, context)
+            # fetch one more note than requested, to know whether a next page exists
+            notes = await self.repo.search_notes(
+                plan.search_type,
+                request.query,
+                pagination=Pagination(limit=page_size + 1, offset=offset),
+                ctx=UserContext(user_id=request.user_id),
+            )
+        except Exception:
+            self.log.error(f"Error searching notes: {traceback.format_exc()}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error while searching notes")
+            return NotePage()
+
+        next_cursor = b""
+        if len(notes) > page_size:
+            notes = notes[:page_size]
+            next_cursor = encode_page_cursor(offset + page_size)
+        return NotePage(
+            notes=[to_grpc_minimal_note(note) for note in notes],
+            next_cursor=next_cursor,
+        )
+
+    @_per_user_consistency
+    async def SimilarNotes(
+        self, request: GetSimilarNotesRequest, context: ServicerContext
+    ) -> AsyncIterator[MinimalNote]:
+        notes = self.repo.similar_notes(
+            request.note_id,
+            UserContext(user_id=request.user_id),
+            limit=request.limit or DEFAULT_PAGE_SIZE,
+        )
+        async with aclosing(notes):
+            async for note in notes:
+                yield to_grpc_minimal_note(note)
 
 
 class GrpcUserService(UserServiceServicer):
@@ -154,6 +420,33 @@ class GrpcUserService(UserServiceServicer):
         # user found and converted to gRPC User Message
         return to_grpc_user(user_entity)
 
+    async def BatchGetUsers(self, request: BatchGetUsersRequest, context: ServicerContext) -> BatchGetUsersResponse:
+        if len(request.ids) + len(request.discord_ids) > MAX_BATCH_SIZE:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"At most {MAX_BATCH_SIZE} users can be requested at once")
+            return BatchGetUsersResponse()
+        try:
+            by_id = await self.repo.select_many(list(request.ids))
+            by_discord_id = await self.repo.select_many_by_discord_ids(list(request.discord_ids))
+        except Exception:
+            self.log.error(f"Error fetching users: {traceback.format_exc()}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error while fetching users")
+            return BatchGetUsersResponse()
+
+        results: List[UserResult] = []
+        for user_id, user_entity in zip(request.ids, by_id):
+            if user_entity is None:
+                results.append(UserResult(id=user_id, not_found=True))
+            else:
+                results.append(UserResult(id=user_id, user=to_grpc_user(user_entity)))
+        for discord_id, user_entity in zip(request.discord_ids, by_discord_id):
+            if user_entity is None:
+                results.append(UserResult(discord_id=discord_id, not_found=True))
+            else:
+                results.append(UserResult(discord_id=discord_id, user=to_grpc_user(user_entity)))
+        return BatchGetUsersResponse(results=results)
+
     async def AlterUser(self, request: AlterUserRequest, context: ServicerContext) -> User:
         ...
     
@@ -1,3 +1,5 @@
+-- the schema from before the migrations. Written idempotent, 
+-- so that it also applies to databases which were set up with init.sql
 CREATE EXTENSION IF NOT EXISTS vector;
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
@@ -54,6 +56,24 @@ CREATE TABLE IF NOT EXISTS note.embedding (
     PRIMARY KEY(note_id, model)
 );
 
+-- ANN index for semantic and similar note searches
+CREATE INDEX IF NOT EXISTS note_embedding_hnsw_idx
+ON note.embedding
+USING hnsw (embedding vector_cosine_ops);
+
+-- precomputed nearest neighbours of a note (same author and model)
+CREATE TABLE IF NOT EXISTS note.neighbour (
+    note_id BIGINT NOT NULL REFERENCES note.content(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    model VARCHAR(128) NOT NULL,
+    neighbour_id BIGINT NOT NULL REFERENCES note.content(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    distance REAL NOT NULL,
+    PRIMARY KEY(note_id, model, neighbour_id)
+);
+
+-- lookup of the notes which have a given note as neighbour
+CREATE INDEX IF NOT EXISTS note_neighbour_neighbour_idx
+ON note.neighbour (neighbour_id, model);
+
 -- available permissions
 CREATE TABLE IF NOT EXISTS role.permission (
     id BIGINT PRIMARY KEY,
@@ -68,6 +88,45 @@ CREATE TABLE IF NOT EXISTS role.role (
   description TEXT
 );
 
+-- roles which may access a note
+CREATE TABLE IF NOT EXISTS note.permission (
+    note_id BIGINT NOT NULL REFERENCES note.content(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    role_id BIGINT NOT NULL REFERENCES role.role(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    PRIMARY KEY(note_id, role_id)
+);
+
+-- tells the caches of all server processes which row changed (see NoteEntityCache, UserCache).
+-- TG_ARGV[0] is the channel, TG_ARGV[1] the column with the ID that is sent as payload
+CREATE OR REPLACE FUNCTION notify_row_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM pg_notify(TG_ARGV[0], to_jsonb(OLD) ->> TG_ARGV[1]);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM pg_notify(TG_ARGV[0], to_jsonb(NEW) ->> TG_ARGV[1]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- inserted users are written through by the inserting process
+CREATE OR REPLACE TRIGGER users_changed
+AFTER UPDATE OR DELETE ON users
+FOR EACH ROW EXECUTE FUNCTION notify_row_changed('user_changed', 'id');
+
+-- new notes can not be cached yet, hence no INSERT
+CREATE OR REPLACE TRIGGER note_content_changed
+AFTER UPDATE OR DELETE ON note.content
+FOR EACH ROW EXECUTE FUNCTION notify_row_changed('note_changed', 'id');
+
+CREATE OR REPLACE TRIGGER note_permission_changed
+AFTER INSERT OR UPDATE OR DELETE ON note.permission
+FOR EACH ROW EXECUTE FUNCTION notify_row_changed('note_changed', 'note_id');
+
+CREATE OR REPLACE TRIGGER note_embedding_changed
+AFTER INSERT OR UPDATE OR DELETE ON note.embedding
+FOR EACH ROW EXECUTE FUNCTION notify_row_changed('note_changed', 'note_id');
+
 -- default permissions for a role / for now not important
 CREATE TABLE IF NOT EXISTS role.role_permission (
     role_id BIGINT NOT NULL REFERENCES role.role(id) ON DELETE CASCADE ON UPDATE CASCADE,
@@ -0,0 +1,6 @@
+-- author of the note, so that author scoped searches can prune the partitions (see src/db/partitioning.py)
+ALTER TABLE note.embedding ADD COLUMN IF NOT EXISTS author_id BIGINT;
+
+UPDATE note.embedding SET author_id = c.author_id
+FROM note.content AS c
+WHERE c.id = note.embedding.note_id AND note.embedding.author_id IS NULL;
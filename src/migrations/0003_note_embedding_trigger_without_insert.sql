@@ -0,0 +1,6 @@
+-- new notes can not be cached yet, so inserted embeddings do not need to
+-- invalidate anything. With INSERT, every PostNote and imported note sent a 
+-- NOTIFY to all server processes.
+CREATE OR REPLACE TRIGGER note_embedding_changed
+AFTER UPDATE OR DELETE ON note.embedding
+FOR EACH ROW EXECUTE FUNCTION notify_row_changed('note_changed', 'note_id');
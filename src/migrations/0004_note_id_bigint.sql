@@ -0,0 +1,6 @@
+-- note IDs with 64 bit. Every shard hands out only every 64th ID (see 
+-- src/db/repos/note/sharding.py), with 32 bit a shard ran out after ~33M notes.
+-- The columns referencing note.content(id) are BIGINT already.
+-- Rewrites note.content, which is locked meanwhile.
+ALTER TABLE note.content ALTER COLUMN id TYPE BIGINT;
+ALTER SEQUENCE note.content_id_seq AS BIGINT;
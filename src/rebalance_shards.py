@@ -0,0 +1,56 @@
+"""Moves authors to their shard of the hash ring, e.g. after a shard was added.
+
+The shards are read from WERSU_DB_SHARDS (`name=dsn,name=dsn`), like the
+server does. Update the server first, so that new writes already go to the
+new shards, then run:
+
+    python -m src.rebalance_shards              # every misplaced author
+    python -m src.rebalance_shards --author 42  # only author 42
+"""
+import argparse
+import asyncio
+import os
+from typing import List
+
+from src.db import Database
+from src.db.repos.note.sharding import Shard, move_author, parse_shards, prepare_shard, rebalance, shard_ring
+from src.utils import logging_provider
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default=os.environ.get("WERSU_DB_SHARDS", ""), help="name=dsn,name=dsn")
+    parser.add_argument("--author", type=int, help="move only this author")
+    args = parser.parse_args()
+
+    shards: List[Shard] = []
+    for number, (name, dsn) in enumerate(parse_shards(args.shards)):
+        db = Database(dsn=dsn, log=logging_provider)
+        await db.init_db()
+        shards.append(Shard(name, number, db))
+    if not shards:
+        parser.error("no shards configured")
+    try:
+        for shard in shards:
+            await prepare_shard(shard)
+        ring = shard_ring(shards)
+        if args.author is None:
+            moved = await rebalance(shards, ring)
+            for author_id, name in moved.items():
+                print(f"moved author {author_id} to {name}")
+            print(f"{len(moved)} authors moved")
+            return
+
+        target = next(shard for shard in shards if shard.name == ring.node_for(args.author))
+        for source in shards:
+            if source is not target:
+                notes = await move_author(args.author, source, target)
+                if notes:
+                    print(f"moved {notes} notes of author {args.author} from {source.name} to {target.name}")
+    finally:
+        for shard in shards:
+            await shard.db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
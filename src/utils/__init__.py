@@ -1,3 +1,8 @@
 from .convert import asdict
 from .dict_helper import drop_undefined, drop_except_keys
-from .logging import logging_provider
\ No newline at end of file
+from .logging import logging_provider
+from .ttl_cache import TTLCache, CacheStats
+from .batch_loader import BatchLoader
+from .hash_ring import HashRing
+from .write_coalescer import WriteCoalescer
+from .metrics import render_cache_metrics, serve_metrics
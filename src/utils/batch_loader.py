@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Coalesces the keys which are requested in the same event loop iteration
+    into one call of `load_many`, and hands each caller its own value.
+
+    The batch is dispatched with `call_soon`, hence it contains every key which
+    was requested by tasks that ran before the loop starts its next iteration.
+    A key which is requested multiple times in one batch is loaded once.
+
+    `load_many` runs in an empty context, so it never sees context variables
+    of one of the callers - e.g. the connection of a `Database.transaction()`.
+
+    Example:
+    ```py
+    loader: BatchLoader[int, User] = BatchLoader(repo.select_many)
+    await asyncio.gather(loader.load(1), loader.load(2))  # one call: select_many([1, 2])
+    ```
+    """
+    def __init__(
+        self,
+        load_many: Callable[[List[K]], Awaitable[List[Optional[V]]]],
+        max_batch_size: int = 500,
+    ):
+        """
+        Args:
+        -----
+        load_many: `Callable[[List[K]], Awaitable[List[Optional[V]]]]`
+            loads the values of the keys; returns them in the order of the keys
+        max_batch_size: `int`
+            the maximum amount of keys per call of `load_many`
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self._load_many = load_many
+        self._max_batch_size = max_batch_size
+        self._pending: Dict[K, asyncio.Future[Optional[V]]] = {}
+        self._dispatch_scheduled = False
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+
+    async def load(self, key: K) -> Optional[V]:
+        """loads the value of the key together with the other keys of this loop iteration
+
+        Raises:
+        -------
+        Exception:
+            the exception of `load_many`, if it failed for the batch of the key
+        """
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(self._dispatch, context=contextvars.Context())
+        # shielded, since other callers may wait for the same key
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._dispatch_scheduled = False
+        keys = list(pending)
+        for start in range(0, len(keys), self._max_batch_size):
+            batch = {key: pending[key] for key in keys[start:start + self._max_batch_size]}
+            task = asyncio.create_task(self._load_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch: Dict[K, asyncio.Future[Optional[V]]]) -> None:
+        self.batches += 1
+        try:
+            values = await self._load_many(list(batch))
+            if len(values) != len(batch):
+                raise RuntimeError(f"load_many returned {len(values)} values for {len(batch)} keys")
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except BaseException:
+            for future in batch.values():
+                future.cancel()
+            raise
+        for future, value in zip(batch.values(), values):
+            if not future.done():
+                future.set_result(value)
@@ -0,0 +1,75 @@
+import bisect
+import hashlib
+from typing import Dict, Generic, Hashable, Iterable, List, TypeVar
+
+N = TypeVar("N", bound=Hashable)
+
+
+def _hash(value: str) -> int:
+    """stable 64 bit hash; `hash()` of str differs between processes"""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing(Generic[N]):
+    """
+    Consistent hashing of keys onto nodes.
+
+    Every node is placed `vnodes` times on a ring of 64 bit hashes; a key
+    belongs to the first node point at or after its own hash. Adding or
+    removing a node therefore only moves the keys of that node, about
+    1 / nodes of all keys, and every process computes the same placement.
+
+    Example:
+    ```py
+    ring = HashRing(["shard_a", "shard_b"])
+    ring.node_for(42)
+    'shard_b'
+    ```
+    """
+    def __init__(self, nodes: Iterable[N], vnodes: int = 128):
+        """
+        Args:
+        -----
+        nodes: `Iterable[N]`
+            the nodes; their `str` has to be unique and stable, e.g. shard names
+        vnodes: `int`
+            points per node. More points spread the keys more evenly
+        """
+        if vnodes < 1:
+            raise ValueError(f"vnodes must be at least 1, got {vnodes}")
+        self._vnodes = vnodes
+        self._nodes: List[N] = []
+        self._points: List[int] = []
+        self._owners: Dict[int, N] = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[N]:
+        return list(self._nodes)
+
+    def add(self, node: N) -> None:
+        if node in self._nodes:
+            raise ValueError(f"{node!r} is already on the ring")
+        self._nodes.append(node)
+        for i in range(self._vnodes):
+            point = _hash(f"{node}#{i}")
+            # a collision keeps the first owner, so the placement does not depend on the order of adds
+            if point in self._owners:
+                continue
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node: N) -> None:
+        self._nodes.remove(node)
+        points = [point for point, owner in self._owners.items() if owner == node]
+        for point in points:
+            del self._owners[point]
+        self._points = sorted(self._owners)
+
+    def node_for(self, key: Hashable) -> N:
+        """the node of the key; keys are hashed by their `str`"""
+        if not self._points:
+            raise LookupError("The ring has no nodes")
+        i = bisect.bisect_left(self._points, _hash(str(key)))
+        return self._owners[self._points[i % len(self._points)]]
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List
+
+from .ttl_cache import CacheStats
+
+log = logging.getLogger(__name__)
+
+type CacheStatsProviders = Dict[str, Callable[[], CacheStats]]
+
+
+def render_cache_metrics(stats_providers: CacheStatsProviders) -> str:
+    """renders the statistics of the caches in the Prometheus text format
+
+    Args:
+    -----
+    stats_providers: `Dict[str, Callable[[], CacheStats]]`
+        the name of each cache and the function returning its statistics
+
+    Returns:
+    --------
+    `str`:
+        one sample per cache and metric, labeled with the name of the cache
+    """
+    snapshots = {name: provide_stats() for name, provide_stats in stats_providers.items()}
+    metrics = [
+        ("wersu_cache_hits_total", "counter", "lookups which found an entry", lambda s: s.hits),
+        ("wersu_cache_misses_total", "counter", "lookups which found no entry", lambda s: s.misses),
+        ("wersu_cache_evictions_total", "counter", "entries evicted to stay within the size", lambda s: s.evictions),
+        ("wersu_cache_entries", "gauge", "entries in the cache", lambda s: s.entries),
+        ("wersu_cache_memory_bytes", "gauge", "estimated memory use of the entries", lambda s: s.memory_bytes),
+        ("wersu_cache_hit_ratio", "gauge", "hits per lookup since the start", lambda s: s.hit_ratio),
+    ]
+    lines: List[str] = []
+    for metric, kind, help_text, value in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, stats in snapshots.items():
+            lines.append(f'{metric}{{cache="{name}"}} {value(stats)}')
+    return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(stats_providers: CacheStatsProviders, host: str, port: int) -> asyncio.Server:
+    """serves `render_cache_metrics` over plain HTTP for a Prometheus scraper.
+    Every request gets the metrics, regardless of its path.
+
+    Args:
+    -----
+    stats_providers: `Dict[str, Callable[[], CacheStats]]`
+        the caches to export; caches added later are exported as well
+    host: `str`
+        the address to listen on
+    port: `int`
+        the port to listen on, 0 picks a free one
+
+    Returns:
+    --------
+    `asyncio.Server`:
+        the listening server
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # the request itself is irrelevant, but has to be read up to the end of its header
+            await reader.readuntil(b"\r\n\r\n")
+            body = render_cache_metrics(stats_providers).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError) as e:
+            log.debug(f"Invalid metrics request: {e}")
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
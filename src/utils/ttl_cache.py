@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import sys
+import time
+from typing import Callable, Generic, Hashable, Tuple, TypeVar
+
+from src.api.undefined import UNDEFINED, UndefinedOr
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Snapshot of the counters of a cache"""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    memory_bytes: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """hits / lookups, or 0.0 when there were no lookups yet"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TTLCache(Generic[K, V]):
+    """
+    A bounded LRU cache whose entries expire `ttl` seconds after they were set.
+
+    The memory use is an estimation, summed up from the `sizeof` function
+    for each value.
+
+    Example:
+    ```py
+    cache: TTLCache[int, str] = TTLCache(max_entries=2, ttl=60)
+    cache.set(1, "a")
+    cache.get(1)
+    'a'
+    cache.get(2)
+    UNDEFINED
+    ```
+    """
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        sizeof: Callable[[V], int] = sys.getsizeof,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._sizeof = sizeof
+        self._clock = clock
+        # key -> (value, expires_at, size)
+        self._entries: OrderedDict[K, Tuple[V, float, int]] = OrderedDict()
+        self._memory_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: K) -> UndefinedOr[V]:
+        """returns the cached value or UNDEFINED when it's missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return UNDEFINED
+        value, expires_at, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self._misses += 1
+            return UNDEFINED
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """caches the value, evicting the least recently used entries when full"""
+        if key in self._entries:
+            self._remove(key)
+        size = self._sizeof(value)
+        self._entries[key] = (value, self._clock() + self._ttl, size)
+        self._memory_bytes += size
+        while len(self._entries) > self._max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def pop(self, key: K) -> None:
+        """removes the entry of the key, if there is one"""
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._memory_bytes = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            entries=len(self._entries),
+            memory_bytes=self._memory_bytes,
+        )
+
+    def _remove(self, key: K) -> None:
+        _, _, size = self._entries.pop(key)
+        self._memory_bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
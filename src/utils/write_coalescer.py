@@ -0,0 +1,127 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class WriteCoalescer(Generic[T, R]):
+    """
+    Collects the writes which arrive within `window` seconds into one call of
+    `write_many` (a group commit), and hands each caller its own result.
+
+    When `write_many` fails, the items of the batch are written again one by
+    one with `write_one`, so that an item which e.g. violates a constraint only
+    fails its own caller. Hence `write_many` has to be atomic.
+
+    Like `BatchLoader`, the writes run in an empty context, so they never see
+    context variables of one of the callers - e.g. the connection of a
+    `Database.transaction()`. A cancelled caller does not cancel its write.
+
+    Example:
+    ```py
+    coalescer: WriteCoalescer[Note, Note] = WriteCoalescer(repo.insert_many, repo.insert)
+    await asyncio.gather(coalescer.write(a), coalescer.write(b))  # one call: insert_many([a, b])
+    ```
+    """
+    def __init__(
+        self,
+        write_many: Callable[[List[T]], Awaitable[List[R]]],
+        write_one: Callable[[T], Awaitable[R]],
+        window: float = 0.002,
+        max_batch_size: int = 100,
+    ):
+        """
+        Args:
+        -----
+        write_many: `Callable[[List[T]], Awaitable[List[R]]]`
+            writes the items atomically; returns the results in the order of the items
+        write_one: `Callable[[T], Awaitable[R]]`
+            writes one item, after `write_many` failed for its batch
+        window: `float`
+            seconds to wait for more writes after the first one of a batch
+        max_batch_size: `int`
+            the maximum amount of items per call of `write_many`. A full batch
+            is written without waiting for the end of the window
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        if window < 0:
+            raise ValueError(f"window must not be negative, got {window}")
+        self._write_many = write_many
+        self._write_one = write_one
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._pending: List[Tuple[T, asyncio.Future[R]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.fallbacks = 0
+
+    async def write(self, item: T) -> R:
+        """writes the item together with the other items of the window
+
+        Raises:
+        -------
+        Exception:
+            the exception of `write_one` for this item
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self._max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._dispatch)
+        # shielded, since the write of the batch goes on without this caller
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._write_batch(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _write_batch(self, batch: List[Tuple[T, asyncio.Future[R]]]) -> None:
+        self.batches += 1
+        try:
+            results = await self._write_many([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"write_many returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            self.fallbacks += 1
+            await self._write_each(batch)
+            return
+        except BaseException:
+            for _, future in batch:
+                future.cancel()
+            raise
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _write_each(self, batch: List[Tuple[T, asyncio.Future[R]]]) -> None:
+        for item, future in batch:
+            try:
+                result = await self._write_one(item)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            except BaseException:
+                for _, other in batch:
+                    other.cancel()
+                raise
+            else:
+                if not future.done():
+                    future.set_result(result)
@@ -1,5 +1,5 @@
 import asyncio
-from typing import Iterator
+from typing import Iterator, Optional
 import asyncpg
 import pytest
 from testcontainers.postgres import PostgresContainer
@@ -8,6 +8,8 @@ from src.db.repos.note.content import NoteContentPostgresRepo
 from src.db.repos.note.embedding import NoteEmbeddingPostgresRepo
 from src.db.repos.note.note import NoteRepoFacade, NoteRepoFacadeABC
 from src.db.repos.note.permission import NotePermissionPostgresRepo
+from src.db.repos.note.neighbour import NoteNeighbourPostgresRepo
+from src.db.repos.note.search_cache import SearchResultCache
 from src.db.table import Table
 from src.db.entities.user.user import UserEntity
 from src.db.repos.user.user import UserRepoABC
@@ -49,7 +51,7 @@ def test_user() -> UserEntity:
 
 @pytest.fixture(scope="function")
 async def db(dsn):
-    db = Database(dsn, logging_provider, init_file="src/init.sql")
+    db = Database(dsn, logging_provider)
     await db.init_db()
 
     # clean state
@@ -68,6 +70,14 @@ async def db(dsn):
 
 @pytest.fixture(scope="function")
 def note_repo_facade(db: Database) -> NoteRepoFacadeABC:
+    return create_note_repo_facade(db)
+
+def create_note_repo_facade(
+    db: Database, 
+    generator: Optional[EmbeddingGenerator] = None, 
+    insert_window: Optional[float] = None,
+    search_cache: Optional[SearchResultCache] = None,
+) -> NoteRepoFacade:
     common_table_kwargs = {"db": db, "logging_provider": logging_provider}
     content_table = Table(
         **common_table_kwargs, 
@@ -93,12 +103,16 @@ def note_repo_facade(db: Database) -> NoteRepoFacadeABC:
         content_repo=NoteContentPostgresRepo(content_table),
         embedding_repo=NoteEmbeddingPostgresRepo(
             table=embedding_table,
-            embedding_generator=EmbeddingGenerator(
+            embedding_generator=generator or EmbeddingGenerator(
                 model_name=Models.MINI_LM_L6_V2, 
                 logging_provider=logging_provider
             )
         ),
         permission_repo=NotePermissionPostgresRepo(permission_table),
+        logging_provider=logging_provider,
+        neighbour_repo=NoteNeighbourPostgresRepo(db, k=2),
+        insert_window=insert_window,
+        search_cache=search_cache,
     )
     return repo
 
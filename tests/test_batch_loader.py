@@ -0,0 +1,67 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from src.utils import BatchLoader
+
+
+class Source:
+    """records the batches it was asked for"""
+    def __init__(self, fail: bool = False):
+        self.calls: List[List[int]] = []
+        self.fail = fail
+
+    async def load_many(self, keys: List[int]) -> List[Optional[str]]:
+        self.calls.append(keys)
+        if self.fail:
+            raise RuntimeError("database down")
+        return [f"value {key}" if key > 0 else None for key in keys]
+
+
+async def test_loads_of_one_tick_are_coalesced():
+    source = Source()
+    loader = BatchLoader(source.load_many)
+
+    values = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(-1))
+
+    assert values == ["value 1", "value 2", "value 1", None]
+    assert source.calls == [[1, 2, -1]]
+
+
+async def test_loads_of_different_ticks_are_separate_batches():
+    source = Source()
+    loader = BatchLoader(source.load_many)
+
+    assert await loader.load(1) == "value 1"
+    assert await loader.load(2) == "value 2"
+    assert source.calls == [[1], [2]]
+
+
+async def test_batches_are_split_by_max_batch_size():
+    source = Source()
+    loader = BatchLoader(source.load_many, max_batch_size=2)
+
+    await asyncio.gather(*(loader.load(key) for key in range(1, 6)))
+    assert source.calls == [[1, 2], [3, 4], [5]]
+
+
+async def test_exception_reaches_every_caller():
+    loader = BatchLoader(Source(fail=True).load_many)
+
+    results = await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    source = Source()
+    loader = BatchLoader(source.load_many)
+
+    cancelled = asyncio.create_task(loader.load(1))
+    waiting = asyncio.create_task(loader.load(1))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiting == "value 1"
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
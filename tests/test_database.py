@@ -0,0 +1,83 @@
+from contextlib import aclosing
+
+import pytest
+
+from src.db.entities.user.user import UserEntity
+from src.db.repos import Database
+from src.db.repos.user.user import UserRepoABC
+
+# import fixtures, otherise pytest will not detect them
+from .fixtures import db, user_repo, dsn, test_user
+
+
+async def test_transaction_rolls_back_all_statements(db: Database, user_repo: UserRepoABC, test_user: UserEntity):
+    """Statements of repos inside a unit of work are rolled back together"""
+    with pytest.raises(RuntimeError, match="abort"):
+        async with db.transaction():
+            assert db.in_transaction
+            await user_repo.insert(test_user)
+            assert await user_repo.select_by_discord_id(test_user.discord_id)
+            raise RuntimeError("abort")
+
+    assert not db.in_transaction
+    assert await user_repo.select_by_discord_id(test_user.discord_id) is None
+
+
+async def test_transaction_uses_one_connection(db: Database):
+    """All queries inside of a unit of work run on the same backend"""
+    async with db.transaction():
+        pids = {
+            (await db.fetchrow("SELECT pg_backend_pid() AS pid"))["pid"],
+            (await db.fetchrow_readonly("SELECT pg_backend_pid() AS pid"))["pid"],
+            *[record["pid"] async for record in db.iterate("SELECT pg_backend_pid() AS pid")],
+        }
+    assert len(pids) == 1
+
+
+async def test_nested_transaction_is_savepoint(db: Database, user_repo: UserRepoABC, test_user: UserEntity):
+    """A failing nested unit of work only rolls back its own statements"""
+    async with db.transaction():
+        await user_repo.insert(test_user)
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await db.execute("UPDATE users SET avatar = 'changed'")
+                raise RuntimeError("abort")
+
+    user = await user_repo.select_by_discord_id(test_user.discord_id)
+    assert user and user.avatar == test_user.avatar
+
+
+async def test_cursor_yields_bounded_batches(db: Database):
+    batches = [
+        [record["i"] for record in batch]
+        async for batch in db.cursor("SELECT i FROM generate_series(1, 25) AS i", batch_size=10)
+    ]
+    assert batches == [list(range(1, 11)), list(range(11, 21)), list(range(21, 26))]
+
+
+async def test_cursor_is_closed_on_early_break(db: Database):
+    count_cursors = "SELECT count(*) AS n FROM pg_cursors"
+    async with db.transaction():
+        # the portal of this query is listed as well
+        before = (await db.fetchrow(count_cursors))["n"]
+        async with aclosing(db.cursor("SELECT i FROM generate_series(1, 100) AS i", batch_size=10)) as batches:
+            async for batch in batches:
+                break
+            assert (await db.fetchrow(count_cursors))["n"] == before + 1
+        # the unit of work goes on, but the cursor is gone
+        assert (await db.fetchrow(count_cursors))["n"] == before
+
+        # nested cursors of one unit of work get their own names
+        outer = db.cursor("SELECT i FROM generate_series(1, 4) AS i", batch_size=2)
+        inner_batches = []
+        async for batch in outer:
+            async for inner in db.cursor("SELECT i FROM generate_series(1, 3) AS i", batch_size=2):
+                inner_batches.append([record["i"] for record in inner])
+        assert inner_batches == [[1, 2], [3]] * 2
+        assert (await db.fetchrow(count_cursors))["n"] == before
+
+    async with aclosing(db.cursor("SELECT i FROM generate_series(1, 100) AS i", batch_size=10)) as batches:
+        async for batch in batches:
+            break
+    # the connection went back to the pool
+    assert db.pool.get_size() - db.pool.get_idle_size() == 0
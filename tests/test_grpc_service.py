@@ -0,0 +1,100 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+import asyncpg
+import grpc
+import pytest
+
+import src.grpc_mod.service as service
+from src.db.entities import NoteEntity
+from src.db.replica import current_consistency_key
+from src.grpc_mod import PostNoteRequest
+from src.grpc_mod.service import GrpcNoteService
+from src.utils import logging_provider
+
+
+class ImportRepo:
+    """records the imported chunks; notes titled "bad" miss their author, 
+    notes titled "broken" fail unexpectedly. Blocks while `blocked` is set"""
+    def __init__(self):
+        self.chunks: List[List[str]] = []
+        self.keys: List[object] = []
+        self.blocked = asyncio.Event()
+        self.released = asyncio.Event()
+
+    async def import_notes(self, notes: List[NoteEntity]) -> List[NoteEntity | Exception]:
+        self.chunks.append([note.title for note in notes])
+        self.keys.append(current_consistency_key())
+        if self.blocked.is_set():
+            await self.released.wait()
+        return [self._result(note) for note in notes]
+
+    @staticmethod
+    def _result(note: NoteEntity) -> NoteEntity | Exception:
+        if note.title == "bad":
+            return asyncpg.ForeignKeyViolationError('violates foreign key constraint "content_author_id_fkey"')
+        if note.title == "broken":
+            return RuntimeError("SELECT secret FROM internals")
+        return note
+
+
+class Context:
+    def __init__(self):
+        self.code: Optional[grpc.StatusCode] = None
+        self.details = ""
+
+    def set_code(self, code: grpc.StatusCode) -> None:
+        self.code = code
+
+    def set_details(self, details: str) -> None:
+        self.details = details
+
+
+async def requests(titles: List[str], read: Optional[List[str]] = None) -> AsyncIterator[PostNoteRequest]:
+    for title in titles:
+        if read is not None:
+            read.append(title)
+        yield PostNoteRequest(title=title, content="content", author_id=7)
+
+
+async def test_import_notes_in_chunks_with_failure_indices(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(service, "IMPORT_CHUNK_SIZE", 3)
+    repo = ImportRepo()
+    titles = ["a", "bad", "b", "c", "broken", "d", "e", "bad"]
+    context = Context()
+
+    summary = await GrpcNoteService(repo, logging_provider).ImportNotes(requests(titles), context)  # type: ignore[arg-type]
+    assert context.code is None
+    assert repo.chunks == [["a", "bad", "b"], ["c", "broken", "d"], ["e", "bad"]]
+    # every chunk reads its own writes
+    assert repo.keys == [7, 7, 7]
+    assert (summary.imported, summary.failed) == (5, 3)
+    # the indices count across chunks
+    assert [failure.index for failure in summary.failures] == [1, 4, 7]
+    # the errors of the database are not sent to the client
+    assert [failure.reason for failure in summary.failures] == [
+        "unknown author or role", "internal error", "unknown author or role"
+    ]
+
+
+async def test_import_notes_stops_reading_while_the_database_is_busy(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(service, "IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(service, "IMPORT_BUFFERED_CHUNKS", 2)
+    repo = ImportRepo()
+    repo.blocked.set()
+    titles = [str(i) for i in range(20)]
+    read: List[str] = []
+
+    task = asyncio.create_task(
+        GrpcNoteService(repo, logging_provider).ImportNotes(requests(titles, read), Context())  # type: ignore[arg-type]
+    )
+    await asyncio.sleep(0.05)
+    # one chunk is written, two are queued and the reader waits with the fourth
+    assert len(repo.chunks) == 1
+    assert len(read) == (1 + 2 + 1) * 2
+
+    repo.released.set()
+    summary = await asyncio.wait_for(task, timeout=1)
+    assert read == titles
+    assert len(repo.chunks) == 10
+    assert summary.imported == 20 and summary.failed == 0
@@ -0,0 +1,35 @@
+from collections import Counter
+
+import pytest
+
+from src.utils import HashRing
+
+
+def test_placement_is_stable_and_spread():
+    ring = HashRing(["a", "b", "c"])
+    placement = {key: ring.node_for(key) for key in range(3000)}
+
+    assert placement == {key: HashRing(["c", "b", "a"]).node_for(key) for key in range(3000)}
+    counts = Counter(placement.values())
+    assert all(700 < count < 1300 for count in counts.values()), counts
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(["a", "b", "c"])
+    before = {key: ring.node_for(key) for key in range(3000)}
+    ring.add("d")
+    after = {key: ring.node_for(key) for key in range(3000)}
+
+    moved = [key for key in before if before[key] != after[key]]
+    assert all(after[key] == "d" for key in moved)
+    assert 450 < len(moved) < 1050
+
+    ring.remove("d")
+    assert {key: ring.node_for(key) for key in range(3000)} == before
+
+
+def test_empty_ring():
+    with pytest.raises(LookupError):
+        HashRing([]).node_for(1)
+    with pytest.raises(ValueError):
+        HashRing(["a", "a"])
@@ -0,0 +1,106 @@
+import asyncio
+from pathlib import Path
+
+import asyncpg
+import pytest
+
+from src.db.migrations import Migration, applied_migrations, load_migrations, migrate
+
+# import fixtures, otherise pytest will not detect them
+from .fixtures import dsn
+
+
+@pytest.fixture
+async def fresh_dsn(dsn: str):
+    """an empty database, since the tests record migrations"""
+    base, _, _ = dsn.rpartition("/")
+    admin = await asyncpg.connect(dsn)
+    await admin.execute("DROP DATABASE IF EXISTS migration_test WITH (FORCE)")
+    await admin.execute("CREATE DATABASE migration_test")
+    await admin.close()
+    yield f"{base}/migration_test"
+
+
+def _write(directory: Path, file_name: str, sql: str) -> None:
+    (directory / file_name).write_text(sql)
+
+
+def test_load_migrations_orders_by_version(tmp_path: Path):
+    _write(tmp_path, "0010_later.sql", "SELECT 10;")
+    _write(tmp_path, "0002_earlier.sql", "SELECT 2;")
+    _write(tmp_path, "README.md", "not a migration")
+    assert [(m.version, m.name) for m in load_migrations(str(tmp_path))] == [(2, "earlier"), (10, "later")]
+
+    _write(tmp_path, "0002_duplicate.sql", "SELECT 2;")
+    with pytest.raises(ValueError):
+        load_migrations(str(tmp_path))
+
+
+def test_load_migrations_rejects_unnumbered_files(tmp_path: Path):
+    _write(tmp_path, "indexes.sql", "SELECT 1;")
+    with pytest.raises(ValueError):
+        load_migrations(str(tmp_path))
+
+
+def test_no_transaction_migrations_are_split_into_statements():
+    migration = Migration(3, "index", """-- migrate: no-transaction
+-- builds without blocking writes
+CREATE INDEX CONCURRENTLY IF NOT EXISTS a_idx
+ON a (x);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS b_idx ON b (y);
+-- trailing comment
+""")
+    assert not migration.transactional
+    assert Migration(1, "init", "CREATE TABLE a (x int);").transactional
+    assert [statement.splitlines()[-1] for statement in migration.statements()] == [
+        "ON a (x);", "CREATE INDEX CONCURRENTLY IF NOT EXISTS b_idx ON b (y);"
+    ]
+
+
+async def test_migrate_applies_each_migration_once(fresh_dsn: str, tmp_path: Path):
+    _write(tmp_path, "0001_table.sql", "CREATE TABLE item (id INT PRIMARY KEY, name TEXT);")
+    _write(tmp_path, "0002_index.sql", "-- migrate: no-transaction\nCREATE INDEX CONCURRENTLY item_name_idx ON item (name);\n")
+    connections = [await asyncpg.connect(fresh_dsn) for _ in range(3)]
+    try:
+        # several processes start at once; one migrates, the others wait and skip
+        results = await asyncio.gather(*(migrate(connection, str(tmp_path)) for connection in connections))
+        assert sorted(len(applied) for applied in results) == [0, 0, 2]
+        assert await connections[0].fetchval("SELECT to_regclass('item_name_idx') IS NOT NULL")
+        assert await migrate(connections[0], str(tmp_path)) == []
+
+        _write(tmp_path, "0003_column.sql", "ALTER TABLE item ADD COLUMN price INT;")
+        assert [m.version for m in await migrate(connections[0], str(tmp_path))] == [3]
+        assert sorted(await applied_migrations(connections[0])) == [1, 2, 3]
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+async def test_failed_migration_is_rolled_back(fresh_dsn: str, tmp_path: Path):
+    _write(tmp_path, "0001_table.sql", "CREATE TABLE item (id INT PRIMARY KEY);")
+    _write(tmp_path, "0002_broken.sql", "CREATE TABLE other (id INT);\nSELECT * FROM missing;")
+    connection = await asyncpg.connect(fresh_dsn)
+    try:
+        with pytest.raises(asyncpg.UndefinedTableError):
+            await migrate(connection, str(tmp_path))
+        assert sorted(await applied_migrations(connection)) == [1]
+        assert await connection.fetchval("SELECT to_regclass('other') IS NULL")
+
+        _write(tmp_path, "0002_broken.sql", "CREATE TABLE other (id INT);")
+        assert [m.version for m in await migrate(connection, str(tmp_path))] == [2]
+    finally:
+        await connection.close()
+
+
+async def test_schema_migrations_adopt_a_database_from_init_sql(fresh_dsn: str):
+    connection = await asyncpg.connect(fresh_dsn)
+    try:
+        # what init_db did before the migrations
+        await connection.execute(load_migrations("src/migrations")[0].sql)
+        applied = await migrate(connection, "src/migrations")
+        assert [m.version for m in applied] == [m.version for m in load_migrations("src/migrations")]
+        assert await connection.fetchval(
+            "SELECT count(*) FROM information_schema.columns WHERE table_name = 'embedding' AND column_name = 'author_id'"
+        ) == 1
+    finally:
+        await connection.close()
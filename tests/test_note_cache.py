@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+
+from src.db.entities.note.metadata import NoteEntity
+from src.db.entities.user.user import UserEntity
+from src.db.repos import Database
+from src.db.repos.note.note import NoteProjection, NoteRepoFacadeABC, UserContext
+from src.db.repos.note.note_cache import NoteEntityCache
+from src.db.repos.user.user import UserRepoABC
+
+# import fixtures, otherise pytest will not detect them
+from .fixtures import db, note_repo_facade, user_repo, dsn, test_user
+
+
+def create_note(note_id: int) -> NoteEntity:
+    return NoteEntity(note_id=note_id, title="Title", content="Content", author_id=1, permissions=[])
+
+
+async def wait_until(condition, timeout: float = 2.0) -> bool:
+    for _ in range(int(timeout / 0.02)):
+        if condition():
+            return True
+        await asyncio.sleep(0.02)
+    return condition()
+
+
+def test_invalidate_drops_all_projections():
+    cache = NoteEntityCache()
+    full, metadata = NoteProjection(), NoteProjection(content=False)
+    cache.set(1, full, create_note(1), cache.generation)
+    cache.set(1, metadata, create_note(1), cache.generation)
+    cache.set(2, full, create_note(2), cache.generation)
+
+    cache.invalidate(1)
+    assert cache.get(1, full) is None
+    assert cache.get(1, metadata) is None
+    assert cache.get(2, full) == create_note(2)
+
+
+def test_set_after_invalidation_is_ignored():
+    """a load which raced with a change must not store the old note"""
+    cache = NoteEntityCache()
+    generation = cache.generation
+    cache.invalidate(1)
+    cache.set(1, NoteProjection(), create_note(1), generation)
+    assert cache.get(1, NoteProjection()) is None
+
+
+def test_invalidation_of_other_notes_does_not_affect_a_load():
+    cache = NoteEntityCache()
+    generation = cache.generation
+    cache.invalidate(2)
+    cache.set(1, NoteProjection(), create_note(1), generation)
+    assert cache.get(1, NoteProjection()) == create_note(1)
+
+
+def test_forgotten_invalidations_reject_older_loads():
+    """only the latest invalidations are remembered, older loads are not stored at all"""
+    cache = NoteEntityCache(max_entries=2)
+    generation = cache.generation
+    for note_id in (1, 2, 3):
+        cache.invalidate(note_id)
+    cache.set(1, NoteProjection(), create_note(1), generation)
+    cache.set(4, NoteProjection(), create_note(4), generation)
+    assert cache.get(1, NoteProjection()) is None
+    assert cache.get(4, NoteProjection()) is None
+
+    cache.set(4, NoteProjection(), create_note(4), cache.generation)
+    assert cache.get(4, NoteProjection()) == create_note(4)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = NoteEntityCache()
+    cache.disable()
+    cache.set(1, NoteProjection(), create_note(1), cache.generation)
+    assert cache.get(1, NoteProjection()) is None
+
+
+async def test_notify_invalidates_cached_note(
+    db: Database,
+    note_repo_facade: NoteRepoFacadeABC,
+    user_repo: UserRepoABC,
+    test_user: UserEntity,
+):
+    """A change by another process (plain SQL here) invalidates the note through NOTIFY"""
+    user = await user_repo.insert(test_user)
+    assert user.id
+    note = await note_repo_facade.insert(NoteEntity(
+        title="Test Note", content="This is a test note.", updated_at=datetime.now(), author_id=user.id
+    ))
+    assert isinstance(note.note_id, int)
+    note_id = note.note_id
+
+    cache = NoteEntityCache()
+    await cache.subscribe(db)
+    cache.set(note_id, NoteProjection(), note, cache.generation)
+
+    await db.execute("UPDATE note.content SET title = 'changed' WHERE id = $1", note_id)
+    assert await wait_until(lambda: cache.get(note_id, NoteProjection()) is None)
+
+    # losing the listener connection disables the cache
+    await db.execute(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE query LIKE 'LISTEN%'"
+    )
+    assert await wait_until(lambda: not cache.enabled)
@@ -0,0 +1,19 @@
+import pytest
+from google.protobuf.field_mask_pb2 import FieldMask
+
+from src.db.repos.note.note import NoteProjection
+from src.grpc_mod.converter.note_entity_converter import to_note_projection
+
+
+def test_empty_read_mask_selects_all_fields():
+    assert to_note_projection(FieldMask()) == NoteProjection(embeddings=False)
+
+
+def test_read_mask_leaves_out_content():
+    projection = to_note_projection(FieldMask(paths=["id", "title", "updated_at", "permissions"]))
+    assert projection == NoteProjection(content=False, permissions=True, embeddings=False)
+
+
+def test_unknown_read_mask_path_raises():
+    with pytest.raises(ValueError, match="Invalid read mask"):
+        to_note_projection(FieldMask(paths=["title", "embeddings"]))
@@ -1,20 +1,25 @@
+import asyncio
 from dataclasses import replace
 from datetime import datetime
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Callable, List, Optional
+import asyncpg
 import pytest
 from testcontainers.postgres import PostgresContainer
 from src.api.types import Pagination
 from src.api.undefined import UNDEFINED
 from src.db.entities.note.metadata import NoteEntity
+from src.db.entities.note.permission import NotePermissionEntity
 from src.db.repos.note.content import NoteContentPostgresRepo, NoteContentRepo
-from src.db.repos.note.note import NoteRepoFacade, NoteRepoFacadeABC, SearchType, UserContext
+from src.db.repos.note.search_cache import SearchResultCache
+from src.db.repos.note.note import NoteProjection, NoteRepoFacade, NoteRepoFacadeABC, SearchType, UserContext
+from src.db.pool import Workload
 from src.db.table import Table
 from src.db.entities.user.user import UserEntity
 from src.db.repos.user.user import UserRepoABC
 import src.api
 from src.db.repos import UserPostgresRepo, Database, note
 from src.utils import logging_provider
-from .fixtures import db, note_repo_facade, user_repo, dsn, test_user
+from .fixtures import create_note_repo_facade, db, note_repo_facade, user_repo, dsn, test_user
 
 # each test recreates user and note to keep readability per test
 
@@ -30,7 +35,10 @@ async def test_create_note(db: Database, note_repo_facade: NoteRepoFacadeABC, us
         updated_at=updated_at, 
         author_id=user.id
     )
+    # the model does not run while the transaction holds a connection
+    encoded_in_transaction = record_encodes(db, note_repo_facade)
     ret_note = await note_repo_facade.insert(test_note)
+    assert encoded_in_transaction == [False]
     assert ret_note.note_id is not UNDEFINED
     test_note = replace(test_note, note_id=ret_note.note_id)
     log.debug(f"Created note: {ret_note}; expected: {test_note}")
@@ -314,3 +322,331 @@ async def test_search_no_filter(
     assert search_results[1].content == "Second note content."
     assert search_results[0].content == "Third note content."
 
+
+async def test_cached_search_results_are_copies(
+    db: Database,
+    user_repo: UserRepoABC,
+    test_user: UserEntity
+):
+    """A caller which changes a search result does not change the cached result"""
+    repo = create_note_repo_facade(db, search_cache=SearchResultCache())
+    user = await user_repo.insert(test_user)
+    assert user.id
+    await repo.insert(NoteEntity(title="Cached", content="cached content", updated_at=datetime.now(), author_id=user.id))
+    ctx = UserContext(user_id=user.id)
+
+    async def search() -> List[NoteEntity]:
+        return await repo.search_notes(SearchType.NO_SEARCH, "", ctx, Pagination(limit=10, offset=0))
+
+    # the first search fills the cache, the second one hits it
+    for _ in range(2):
+        [note] = await search()
+        assert note.title == "Cached"
+        note.title = "changed by the caller"
+    [note] = await search()
+    assert note.title == "Cached"
+
+
+async def test_stream_search_stops_early(
+    note_repo_facade: NoteRepoFacadeABC, 
+    user_repo: UserRepoABC,
+    test_user: UserEntity
+):
+    """Creates a test user, 
+    and creates multiple notes for this user, 
+    then streams a search and stops after the first note.
+    A following search should still work, since the cursor was closed.
+    """
+    user = await user_repo.insert(test_user)
+    assert user.id
+    ctx = UserContext(user_id=user.id)
+
+    for content in ["First note content.", "Second note content."]:
+        test_note = NoteEntity(
+            title=content, 
+            content=content, 
+            updated_at=datetime.now(), 
+            author_id=user.id
+        )
+        await note_repo_facade.insert(test_note)
+
+    streamed = []
+    async for note in note_repo_facade.stream_search_notes(
+        search_type=SearchType.NO_SEARCH,
+        query="",
+        pagination=Pagination(limit=10, offset=0),
+        ctx=ctx
+    ):
+        streamed.append(note)
+        break
+    assert len(streamed) == 1
+    assert streamed[0].content == "Second note content."
+
+    search_results = await note_repo_facade.search_notes(
+        search_type=SearchType.NO_SEARCH,
+        query="",
+        pagination=Pagination(limit=10, offset=0),
+        ctx=ctx
+    )
+    assert [note.content for note in search_results] == [
+        "Second note content.", 
+        "First note content.",
+    ]
+
+
+async def test_similar_notes(
+    note_repo_facade: NoteRepoFacadeABC, 
+    user_repo: UserRepoABC,
+    test_user: UserEntity
+):
+    """Creates a test user, 
+    and creates multiple notes for this user, 
+    then searches notes similar to one of them, 
+    once from the precomputed neighbours (limit <= k) 
+    and once with the ANN index (limit > k)
+    """
+    user = await user_repo.insert(test_user)
+    assert user.id
+    ctx = UserContext(user_id=user.id)
+
+    note_contents = [
+        "Tears of the Kingdom is a game for Nintendo Switch.",
+        "Python is a nice language which makes programming easier.",
+        "Mario Kart 8 is a racing game for Nintendo Switch.",
+        "Rust is a programming language focused on safety.",
+    ]
+    notes = []
+    for content in note_contents:
+        notes.append(await note_repo_facade.insert(NoteEntity(
+            title=content, 
+            content=content, 
+            updated_at=datetime.now(), 
+            author_id=user.id
+        )))
+
+    for limit in (1, 3):
+        similar = [
+            note async for note in note_repo_facade.similar_notes(notes[0].note_id, ctx, limit=limit)
+        ]
+        assert len(similar) == limit
+        assert notes[0].note_id not in [note.note_id for note in similar]
+        assert similar[0].content == "Mario Kart 8 is a racing game for Nintendo Switch."
+
+    # the neighbours of deleted notes are recomputed
+    await note_repo_facade.delete(notes[2].note_id, ctx)
+    similar = [
+        note async for note in note_repo_facade.similar_notes(notes[0].note_id, ctx, limit=2)
+    ]
+    assert notes[2].note_id not in [note.note_id for note in similar]
+    assert len(similar) == 2
+
+
+async def test_select_note_with_projection(
+    db: Database,
+    note_repo_facade: NoteRepoFacadeABC,
+    user_repo: UserRepoABC,
+    test_user: UserEntity
+):
+    """Creates a note with permissions, then selects it once fully and once metadata only"""
+    user = await user_repo.insert(test_user)
+    assert user.id
+    ctx = UserContext(user_id=user.id)
+    await db.execute("INSERT INTO role.role (id, name) VALUES (1, 'reader'), (2, 'writer')")
+
+    note = await note_repo_facade.insert(NoteEntity(
+        title="Test Note", 
+        content="This is a test note.", 
+        updated_at=datetime(2024, 1, 1, 12, 0, 0), 
+        author_id=user.id,
+        permissions=[
+            NotePermissionEntity(note_id=UNDEFINED, role_id=2),
+            NotePermissionEntity(note_id=UNDEFINED, role_id=1),
+        ],
+    ))
+    assert isinstance(note.note_id, int)
+
+    full = await note_repo_facade.select_by_id(note.note_id, ctx)
+    assert full
+    assert [permission.role_id for permission in full.permissions] == [1, 2]
+    assert full.embeddings and full.embeddings == note.embeddings
+
+    metadata = await note_repo_facade.select_by_id(
+        note.note_id, ctx, projection=NoteProjection(content=False, permissions=False, embeddings=False)
+    )
+    assert metadata
+    assert metadata.title == note.title
+    assert metadata.content is UNDEFINED
+    assert metadata.permissions is UNDEFINED
+    assert metadata.embeddings is UNDEFINED
+
+
+async def test_select_notes_by_ids(
+    note_repo_facade: NoteRepoFacadeABC,
+    user_repo: UserRepoABC,
+    test_user: UserEntity
+):
+    """Creates notes, then selects them in a different order together with unknown IDs"""
+    user = await user_repo.insert(test_user)
+    assert user.id
+    ctx = UserContext(user_id=user.id)
+
+    notes = [
+        await note_repo_facade.insert(NoteEntity(
+            title=f"Note {i}", 
+            content=f"Content {i}", 
+            updated_at=datetime(2024, 1, 1, 12, 0, 0), 
+            author_id=user.id
+        ))
+        for i in range(3)
+    ]
+    note_ids = [notes[2].note_id, 999_999, notes[0].note_id, notes[2].note_id]
+
+    selected = await note_repo_facade.select_by_ids(note_ids, ctx)
+    assert selected == [notes[2], None, notes[0], notes[2]]
+
+    metadata = await note_repo_facade.select_by_ids(
+        note_ids, ctx, projection=NoteProjection(content=False, embeddings=False)
+    )
+    assert [note.title if note else None for note in metadata] == ["Note 2", None, "Note 0", "Note 2"]
+    assert await note_repo_facade.select_by_ids([], ctx) == []
+
+
+async def test_concurrent_selects_are_batched(
+    note_repo_facade: NoteRepoFacadeABC,
+    user_repo: UserRepoABC,
+    test_user: UserEntity
+):
+    """Concurrent select_by_id calls return the same notes as sequential ones"""
+    user = await user_repo.insert(test_user)
+    assert user.id
+    ctx = UserContext(user_id=user.id)
+
+    notes = [
+        await note_repo_facade.insert(NoteEntity(
+            title=f"Note {i}", 
+            content=f"Content {i}", 
+            updated_at=datetime(2024, 1, 1, 12, 0, 0), 
+            author_id=user.id
+        ))
+        for i in range(3)
+    ]
+    selected = await asyncio.gather(
+        *(note_repo_facade.select_by_id(note.note_id, ctx) for note in notes),
+        note_repo_facade.select_by_id(notes[0].note_id, ctx),
+    )
+    assert selected == [*notes, notes[0]]
+    assert selected[0] is not selected[-1]
+
+    with pytest.raises(RuntimeError, match="not found"):
+        await asyncio.gather(
+            note_repo_facade.select_by_id(notes[0].note_id, ctx),
+            note_repo_facade.select_by_id(999_999, ctx),
+        )
+
+
+async def readable_notes(db: Database) -> Callable[..., NoteEntity]:
+    """creates the role 1 and returns a factory of notes which it can read"""
+    await db.execute("INSERT INTO role.role (id, name) VALUES (1, 'readers')")
+
+    def new_note(i: int, author_id: int, with_content: bool = True) -> NoteEntity:
+        return NoteEntity(
+            title=f"Note {i}", 
+            content=f"Content {i}" if with_content else "", 
+            updated_at=datetime(2024, 1, 1, 12, 0, 0), 
+            author_id=author_id,
+            permissions=[NotePermissionEntity(note_id=UNDEFINED, role_id=1)],
+        )
+    return new_note
+
+
+def record_encodes(db: Database, repo: NoteRepoFacadeABC) -> List[bool]:
+    """records for every encode of `repo`, whether it ran inside of a transaction"""
+    assert isinstance(repo, NoteRepoFacade)
+    generator = repo._embedding_repo.embedding_generator
+    generate_async, generate_many_async = generator.generate_async, generator.generate_many_async
+    in_transaction: List[bool] = []
+
+    async def record_one(text):
+        in_transaction.append(db.in_transaction)
+        return await generate_async(text)
+
+    async def record_many(texts):
+        in_transaction.append(db.in_transaction)
+        return await generate_many_async(texts)
+
+    generator.generate_async, generator.generate_many_async = record_one, record_many  # type: ignore[method-assign]
+    return in_transaction
+
+
+async def test_concurrent_inserts_are_group_committed(
+    db: Database,
+    user_repo: UserRepoABC,
+    test_user: UserEntity
+):
+    """Inserts of one window share a transaction, and a failing note only fails its own caller"""
+    repo = create_note_repo_facade(db, insert_window=0.05)
+    user = await user_repo.insert(test_user)
+    assert user.id
+    ctx = UserContext(user_id=user.id)
+    new_note = await readable_notes(db)
+
+    # notes without content get no embedding
+    notes = await asyncio.gather(*(repo.insert(new_note(i, user.id, with_content=bool(i))) for i in range(4)))
+    assert repo._insert_coalescer is not None and repo._insert_coalescer.batches == 1
+    assert len({note.note_id for note in notes}) == 4
+    for i, note in enumerate(notes):
+        selected = await repo.select_by_id(note.note_id, ctx)
+        assert selected.title == f"Note {i}"
+        assert [permission.role_id for permission in selected.permissions] == [1]
+        assert len(selected.embeddings) == (1 if i else 0)
+        assert note.embeddings == selected.embeddings
+
+    # the author does not exist
+    results = await asyncio.gather(
+        repo.insert(new_note(5, user.id)), repo.insert(new_note(6, user.id + 1000)), return_exceptions=True
+    )
+    assert isinstance(results[0], NoteEntity) and results[0].title == "Note 5"
+    assert isinstance(results[1], asyncpg.ForeignKeyViolationError)
+    assert repo._insert_coalescer.fallbacks == 1
+    assert (await db.fetchrow("SELECT count(*) AS n FROM note.content"))["n"] == 5
+
+
+async def test_import_notes_in_chunks(
+    db: Database,
+    note_repo_facade: NoteRepoFacadeABC,
+    user_repo: UserRepoABC,
+    test_user: UserEntity
+):
+    """A chunk is loaded with COPY; when a note fails, only that note is reported"""
+    user = await user_repo.insert(test_user)
+    assert user.id
+    ctx = UserContext(user_id=user.id)
+    new_note = await readable_notes(db)
+
+    # encoding happens before the transaction is opened
+    encoded_in_transaction = record_encodes(db, note_repo_facade)
+    results = await note_repo_facade.import_notes([new_note(i, user.id) for i in range(5)])
+    assert encoded_in_transaction == [False]
+    assert isinstance(note_repo_facade, NoteRepoFacade) and note_repo_facade._bulk_db.workload == Workload.BULK
+    for i, result in enumerate(results):
+        assert isinstance(result, NoteEntity)
+        selected = await note_repo_facade.select_by_id(result.note_id, ctx)
+        assert selected.title == f"Note {i}" and len(selected.embeddings) == 1
+        assert [permission.role_id for permission in selected.permissions] == [1]
+    # the neighbours are added for the whole chunk: k=2 per note
+    neighbours = await db.fetch("SELECT note_id, neighbour_id FROM note.neighbour")
+    assert len(neighbours) == 5 * 2
+    assert all(record["note_id"] != record["neighbour_id"] for record in neighbours)
+
+    # the second author does not exist
+    results = await note_repo_facade.import_notes(
+        [new_note(5, user.id, with_content=False), new_note(6, user.id + 1000), new_note(7, user.id)]
+    )
+    assert isinstance(results[0], NoteEntity) and results[0].title == "Note 5" and results[0].embeddings == []
+    assert isinstance(results[1], asyncpg.ForeignKeyViolationError)
+    assert isinstance(results[2], NoteEntity) and len(results[2].embeddings) == 1
+    selected = await note_repo_facade.select_by_id(results[2].note_id, ctx)
+    assert selected.embeddings == results[2].embeddings
+    # the notes inserted one by one reuse the embeddings of the chunk
+    assert encoded_in_transaction == [False, False]
+    assert (await db.fetchrow("SELECT count(*) AS n FROM note.content"))["n"] == 7
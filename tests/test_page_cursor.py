@@ -0,0 +1,19 @@
+import pytest
+
+from src.grpc_mod.converter.page_cursor import decode_page_cursor, encode_page_cursor
+
+
+def test_cursor_roundtrip():
+    assert decode_page_cursor(encode_page_cursor(0)) == 0
+    assert decode_page_cursor(encode_page_cursor(150)) == 150
+
+
+def test_malformed_cursor_raises():
+    with pytest.raises(ValueError, match="Malformed page cursor"):
+        decode_page_cursor(b"not a cursor")
+
+
+def test_unknown_cursor_version_raises():
+    cursor = b"\x02" + encode_page_cursor(10)[1:]
+    with pytest.raises(ValueError, match="Unsupported page cursor version"):
+        decode_page_cursor(cursor)
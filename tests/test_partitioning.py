@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import asyncpg
+import pytest
+
+from src.api.types import Pagination
+from src.api.undefined import UNDEFINED
+from src.db import Database
+from src.db.entities import NoteEntity
+from src.db.entities.note.permission import NotePermissionEntity
+from src.db.partitioning import note_partitions, partition_note_tables
+from src.db.repos.note.note import UserContext
+from src.db.repos.note.search_strategy import SearchType
+from src.utils import logging_provider
+
+# import fixtures, otherise pytest will not detect them
+from .fixtures import create_note_repo_facade, dsn
+
+
+@pytest.fixture
+async def fresh_db(dsn: str):
+    """an own database, since the migration changes the schema"""
+    base, _, _ = dsn.rpartition("/")
+    admin = await asyncpg.connect(dsn)
+    await admin.execute("DROP DATABASE IF EXISTS partition_test WITH (FORCE)")
+    await admin.execute("CREATE DATABASE partition_test")
+    await admin.close()
+
+    db = Database(f"{base}/partition_test", logging_provider)
+    await db.init_db()
+    for user_id in (1, 2, 3):
+        await db.execute(
+            "INSERT INTO users (id, discord_id, avatar, username, email) VALUES ($1, $2, '', '', '')", user_id, user_id
+        )
+    await db.execute("INSERT INTO role.role (id, name) VALUES (1, 'readers')")
+    yield db
+    await db.close()
+
+
+def _note(author_id: int, title: str) -> NoteEntity:
+    return NoteEntity(
+        note_id=UNDEFINED, author_id=author_id, title=title, content=f"{title} content",
+        updated_at=datetime.now(), embeddings=[], permissions=[NotePermissionEntity(note_id=UNDEFINED, role_id=1)],
+    )
+
+
+async def _counts(db: Database) -> list:
+    return [
+        (await db.fetchrow(f"SELECT count(*) AS n FROM {table}"))["n"]
+        for table in ("note.content", "note.embedding", "note.permission", "note.neighbour")
+    ]
+
+
+async def test_migration_keeps_rows_and_prunes_by_author(fresh_db: Database):
+    db = fresh_db
+    repo = create_note_repo_facade(db)
+    for author_id in (1, 2):
+        for title in ("alpha", "beta", "gamma"):
+            await repo.insert(_note(author_id, title))
+    before = await _counts(db)
+
+    assert await note_partitions(db) is None
+    assert await partition_note_tables(db, partitions=4)
+    assert await note_partitions(db) == 4
+    assert await _counts(db) == before
+    # a second process or restart does nothing, another partition count is refused
+    assert not await partition_note_tables(db, partitions=4)
+    with pytest.raises(ValueError):
+        await partition_note_tables(db, partitions=8)
+
+    hnsw_indexes = await db.fetch(
+        "SELECT tablename FROM pg_indexes WHERE schemaname = 'note' AND indexdef LIKE '%hnsw%' ORDER BY tablename"
+    )
+    # the partitioned index of the parent, and one graph per partition
+    assert [record["tablename"] for record in hnsw_indexes] == ["embedding"] + [f"embedding_p{i}" for i in range(4)]
+
+    plan = "\n".join(record[0] for record in await db.fetch("""
+        EXPLAIN SELECT note.content.id
+        FROM note.embedding
+        JOIN note.content ON note.content.id = note.embedding.note_id AND note.content.author_id = 1
+        WHERE note.embedding.author_id = 1
+        ORDER BY embedding <=> (SELECT embedding FROM note.embedding WHERE author_id = 1 LIMIT 1)
+    """))
+    assert plan.count("on embedding_p") == 2  # the ANN scan, and the subquery
+    assert plan.count("on content_p") == 1
+
+    # the repo keeps working on the partitioned tables
+    note = await repo.insert(_note(3, "delta"))
+    selected = await repo.select_by_id(note.note_id, UserContext(user_id=3))
+    assert selected.title == "delta" and [p.role_id for p in selected.permissions] == [1]
+    found = await repo.search_notes(SearchType.NO_SEARCH, "", UserContext(user_id=1), Pagination(limit=10, offset=0))
+    assert sorted(note.title for note in found) == ["alpha", "beta", "gamma"]
+    await repo.delete(note.note_id, UserContext(user_id=3))
+    assert await _counts(db) == before
@@ -0,0 +1,115 @@
+import asyncio
+from typing import List
+
+import pytest
+from asyncpg import Connection
+
+from src.db import Database, PoolConfig, Table, Workload
+from src.db.repos.note.content import NoteContentPostgresRepo
+from src.db.repos.note.neighbour import NoteNeighbourPostgresRepo
+from src.utils import logging_provider
+
+# import fixtures, otherise pytest will not detect them
+from .fixtures import dsn
+
+
+def test_config_from_env():
+    config = PoolConfig.from_env(
+        {"WERSU_DB_MAX_SIZE": "20", "WERSU_DB_ACQUIRE_TIMEOUT": "1.5", "WERSU_DB_COMMAND_TIMEOUT": ""},
+        min_size=2,
+        max_size=5,  # defaults are overridden by the environment
+    )
+    assert (config.min_size, config.max_size, config.acquire_timeout, config.command_timeout) == (2, 20, 1.5, None)
+    with pytest.raises(ValueError):
+        PoolConfig(min_size=5, max_size=2)
+
+
+async def test_hooks_and_server_settings(dsn: str):
+    initialized: List[Connection] = []
+    set_up: List[Connection] = []
+
+    async def init(connection: Connection) -> None:
+        initialized.append(connection)
+
+    async def setup(connection: Connection) -> None:
+        set_up.append(connection)
+
+    config = PoolConfig(min_size=1, max_size=2, server_settings={"work_mem": "7MB"}, init=init, setup=setup)
+    db = Database(dsn, logging_provider, pool_config=config)
+    await db.init_db()
+    try:
+        record = await db.fetchrow_readonly("SELECT current_setting('work_mem') AS work_mem")
+        assert record["work_mem"] == "7MB"
+        assert len(initialized) >= 1 and len(set_up) >= 1
+    finally:
+        await db.close()
+
+
+async def test_stats_count_waits_and_timeouts(dsn: str):
+    db = Database(dsn, logging_provider, pool_config=PoolConfig(min_size=1, max_size=1, acquire_timeout=0.05))
+    await db.init_db()
+    try:
+        async with db.pool.acquire():
+            stats = db.pool_stats()[Workload.OLTP]
+            assert (stats.in_use, stats.max_size) == (1, 1)
+            with pytest.raises(asyncio.TimeoutError):
+                await db.fetch_readonly("SELECT 1")
+
+        await db.fetch_readonly("SELECT 1")
+        stats = db.pool_stats()[Workload.OLTP]
+        assert stats.timeouts == 1
+        assert stats.acquires == 2
+        assert stats.in_use == 0 and stats.waiting == 0
+        assert stats.acquire_wait_max >= stats.acquire_wait_avg > 0
+        assert await db.check_connection_budget(processes=1)
+        assert not await db.check_connection_budget(processes=100_000)
+    finally:
+        await db.close()
+
+
+async def test_workloads_use_their_own_pool(dsn: str):
+    db = Database(
+        dsn, logging_provider,
+        pool_config=PoolConfig(min_size=1, max_size=1),
+        pools={Workload.SEARCH: PoolConfig(min_size=1, max_size=1, statement_timeout="1234ms", work_mem="5MB")},
+    )
+    await db.init_db()
+    try:
+        search_db = db.with_workload(Workload.SEARCH)
+        settings = "SELECT current_setting('statement_timeout') AS timeout, current_setting('work_mem') AS work_mem"
+        record = await search_db.fetchrow_readonly(settings)
+        assert (record["timeout"], record["work_mem"]) == ("1234ms", "5MB")
+        assert (await db.fetchrow_readonly(settings))["timeout"] == "0"
+
+        # a busy search pool does not block the default pool
+        async with search_db.pool.acquire():
+            assert await asyncio.wait_for(db.fetch_readonly("SELECT 1"), timeout=1)
+            assert db.pool_stats()[Workload.SEARCH].in_use == 1
+
+        # workloads without an own pool use the default pool
+        assert db.with_workload(Workload.BULK).pool is db.pool
+        # units of work are shared
+        async with search_db.transaction():
+            assert db.in_transaction
+    finally:
+        await db.close()
+
+
+async def test_repos_declare_their_workload(dsn: str):
+    db = Database(
+        dsn, logging_provider,
+        pool_config=PoolConfig(min_size=1, max_size=1),
+        pools={Workload.BULK: PoolConfig(min_size=0, max_size=1, work_mem="7MB")},
+    )
+    await db.init_db()
+    try:
+        neighbour_repo = NoteNeighbourPostgresRepo(db.with_workload(Workload.SEARCH))
+        assert neighbour_repo._db.workload == Workload.BULK
+        table = Table("note.content", logging_provider, db.with_workload(Workload.BULK))
+        content_repo = NoteContentPostgresRepo(table)
+        assert content_repo._table.db.workload == Workload.OLTP
+        # the table itself is not changed
+        assert table.db.workload == Workload.BULK
+        assert (await neighbour_repo._db.fetchrow("SELECT current_setting('work_mem') AS m"))["m"] == "7MB"
+    finally:
+        await db.close()
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+
+from src.db.predicate import After, And, Eq, In, IsNull, Range
+
+
+def test_compile_predicates():
+    assert Eq("id", 1).sql() == "id=$1"
+    assert In("id", [1, 2], sql_type="bigint").sql(3) == "id = ANY($3::bigint[])"
+    assert IsNull("deleted_at", negate=True).sql() == "deleted_at IS NOT NULL"
+    assert Range("age", lower=18, upper=65, upper_inclusive=True).sql() == "age >= $1 AND age <= $2"
+    assert Range("age", upper=65).sql() == "age < $1"
+
+
+def test_and_numbers_placeholders_in_order():
+    since = datetime(2024, 1, 1)
+    where = In("author_id", [1, 2]) & Range("updated_at", lower=since) & IsNull("title") & Eq("id", 5)
+    assert where.sql() == "author_id = ANY($1) AND updated_at >= $2 AND title IS NULL AND id=$3"
+    assert where.values() == [[1, 2], since, 5]
+
+
+def test_keyset():
+    after = After(("updated_at", "id"), (datetime(2024, 1, 1), 7), descending=True)
+    assert after.sql(2) == "(updated_at, id) < ($2, $3)"
+    assert after.order_by == "updated_at DESC, id DESC"
+    with pytest.raises(ValueError):
+        After(("updated_at", "id"), (1,))
+
+
+def test_same_shape_same_sql():
+    """values are not part of the SQL, so statements are reused"""
+    assert In("id", [1]).shape == In("id", [1, 2, 3]).shape
+    assert And.from_dict({"a": 1, "b": 2}).sql() == And.from_dict({"a": 3, "b": 4}).sql() == "a=$1 AND b=$2"
+    assert Range("age", lower=1).shape != Range("age", upper=1).shape
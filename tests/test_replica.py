@@ -0,0 +1,140 @@
+import asyncio
+import os
+from typing import List
+
+import pytest
+
+from src.db import Balancing, Database, PoolConfig, read_your_writes
+from src.db.replica import ReplicaSet
+from src.utils import logging_provider
+
+# import fixtures, otherise pytest will not detect them
+from .fixtures import dsn
+
+
+def _replica_db(primary_dsn: str, replica_dsns: List[str], balancing: Balancing = Balancing.ROUND_ROBIN) -> Database:
+    return Database(
+        primary_dsn,
+        logging_provider,
+        pool_config=PoolConfig(min_size=1, max_size=2),
+        replica_dsns=replica_dsns,
+        balancing=balancing,
+    )
+
+
+async def _served_by(db: Database) -> str:
+    record = await db.fetchrow_readonly("SELECT current_setting('application_name') AS name")
+    return record["name"]
+
+
+@pytest.fixture
+async def replicated_db(dsn: str):
+    """the test server as primary, and twice as "replica" - told apart by the application name"""
+    db = _replica_db(
+        f"{dsn}?application_name=primary",
+        [f"{dsn}?application_name=replica_a", f"{dsn}?application_name=replica_b"],
+    )
+    await db.init_db()
+    await db.execute("CREATE TABLE IF NOT EXISTS replica_test (id int)")
+    yield db
+    await db.execute("DROP TABLE replica_test")
+    await db.close()
+
+
+def test_least_outstanding_chooses_the_idlest_replica():
+    replicas = ReplicaSet(["a", "b", "c"], Balancing.LEAST_OUTSTANDING)
+    replicas.replicas[0].outstanding = 2
+    replicas.replicas[1].outstanding = 1
+    replicas.replicas[2].outstanding = 3
+    assert replicas.choose().dsn == "b"
+
+
+async def test_reads_go_to_the_replicas(replicated_db: Database):
+    db = replicated_db
+    assert [await _served_by(db) for _ in range(4)] == ["replica_a", "replica_b"] * 2
+
+    # writes, transactions and the primary view stay on the primary
+    record = await db.fetchrow("SELECT current_setting('application_name') AS name")
+    assert record["name"] == "primary"
+    async with db.transaction():
+        assert await _served_by(db) == "primary"
+    assert await _served_by(db.primary()) == "primary"
+
+    batches = [batch async for batch in db.cursor("SELECT current_setting('application_name') AS name")]
+    assert batches[0][0]["name"].startswith("replica")
+    assert "replica 0 oltp" in db.pool_stats()
+
+
+async def test_read_your_writes(replicated_db: Database, monkeypatch: pytest.MonkeyPatch):
+    db = replicated_db
+    lagging = True
+
+    async def caught_up(connection, lsn: int) -> bool:
+        return not lagging
+
+    monkeypatch.setattr(ReplicaSet, "caught_up", staticmethod(caught_up))
+
+    with read_your_writes(1):
+        await db.execute("INSERT INTO replica_test (id) VALUES (1)")
+        assert db.has_pending_writes
+        assert await _served_by(db) == "primary"
+    # other users are not affected by the write
+    with read_your_writes(2):
+        assert not db.has_pending_writes
+        assert (await _served_by(db)).startswith("replica")
+
+    lagging = False
+    with read_your_writes(1):
+        assert (await _served_by(db)).startswith("replica")
+        # pending until both replicas were seen to have replayed the write
+        assert db.has_pending_writes
+        assert (await _served_by(db)).startswith("replica")
+        assert not db.has_pending_writes
+
+
+async def test_only_writes_are_recorded(replicated_db: Database):
+    db = replicated_db
+    with read_your_writes(1):
+        await db.fetch("SELECT id FROM replica_test")
+        await db.fetchrow("SELECT 1 AS one")
+        async with db.transaction():
+            await db.fetch("SELECT id FROM replica_test")
+        assert not db.has_pending_writes
+
+        await db.fetchrow("INSERT INTO replica_test (id) VALUES (1) RETURNING id")
+        assert db.has_pending_writes
+
+
+@pytest.mark.skipif(
+    not (os.environ.get("WERSU_TEST_PRIMARY_DSN") and os.environ.get("WERSU_TEST_REPLICA_DSN")),
+    reason="needs a primary and a streaming replica (see docker-compose.replica.yaml)",
+)
+async def test_read_your_writes_with_streaming_replication():
+    primary_dsn = os.environ["WERSU_TEST_PRIMARY_DSN"]
+    replica_dsn = os.environ["WERSU_TEST_REPLICA_DSN"]
+    db = _replica_db(primary_dsn, [replica_dsn])
+    await db.init_db()
+    replica = db._replicas.replicas[0].pool("oltp")
+    await db.execute("CREATE TABLE IF NOT EXISTS replica_test (id int)")
+    try:
+        while await replica.fetchval("SELECT to_regclass('replica_test')") is None:
+            await asyncio.sleep(0.1)
+        await replica.execute("SELECT pg_wal_replay_pause()")
+        with read_your_writes(1):
+            await db.execute("INSERT INTO replica_test (id) VALUES (42)")
+            # the replica does not replay the insert, so the primary answers
+            assert await db.fetchrow_readonly("SELECT id FROM replica_test WHERE id = 42")
+        with read_your_writes(2):
+            assert await db.fetchrow_readonly("SELECT id FROM replica_test WHERE id = 42") is None
+
+        await replica.execute("SELECT pg_wal_replay_resume()")
+        for _ in range(50):
+            if await db.fetchrow_readonly("SELECT id FROM replica_test WHERE id = 42"):
+                break
+            await asyncio.sleep(0.1)
+        else:
+            pytest.fail("the replica did not replay the insert")
+    finally:
+        await replica.execute("SELECT pg_wal_replay_resume()")
+        await db.execute("DROP TABLE replica_test")
+        await db.close()
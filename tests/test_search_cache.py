@@ -0,0 +1,143 @@
+import asyncio
+
+from src.api.types import Pagination
+from src.api.undefined import UNDEFINED
+from src.db.entities import NoteEntity
+from src.db.repos.note.note import SearchType
+from src.db.repos.note.search_cache import SearchResultCache
+from src.utils import TTLCache, render_cache_metrics, serve_metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# -------------------------
+# TTLCache tests
+# -------------------------
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(max_entries=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    clock.now = 5
+    assert cache.get("a") is UNDEFINED
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[str, int] = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats().evictions == 1
+
+
+def test_ttl_cache_stats():
+    cache: TTLCache[str, str] = TTLCache(max_entries=10, ttl=60, sizeof=len)
+    cache.set("a", "12345")
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.hit_ratio == 0.5
+    assert stats.memory_bytes == 5
+
+    cache.pop("a")
+    assert cache.stats().memory_bytes == 0
+
+
+# -------------------------
+# SearchResultCache tests
+# -------------------------
+
+def test_search_cache_normalises_query():
+    cache = SearchResultCache()
+    pagination = Pagination(limit=10, offset=0)
+    notes = [NoteEntity(note_id=1, title="Zelda", content="Tears of the Kingdom")]
+
+    cache.set(cache.key(1, SearchType.FUZZY, "  Zelda   TOTK ", pagination), notes)
+    assert cache.get(cache.key(1, SearchType.FUZZY, "zelda totk", pagination)) == tuple(notes)
+    assert cache.get(cache.key(1, SearchType.CONTEXT, "zelda totk", pagination)) is None
+    assert cache.get(cache.key(1, SearchType.FUZZY, "zelda totk", Pagination(limit=10, offset=10))) is None
+
+
+def test_search_cache_invalidates_only_written_user():
+    cache = SearchResultCache()
+    pagination = Pagination(limit=10, offset=0)
+    notes = [NoteEntity(note_id=1, title="Zelda", content="Tears of the Kingdom")]
+
+    cache.set(cache.key(1, SearchType.FUZZY, "zelda", pagination), notes)
+    cache.set(cache.key(2, SearchType.FUZZY, "zelda", pagination), notes)
+    cache.invalidate_user(1)
+
+    assert cache.get(cache.key(1, SearchType.FUZZY, "zelda", pagination)) is None
+    assert cache.get(cache.key(2, SearchType.FUZZY, "zelda", pagination)) == tuple(notes)
+
+
+def test_search_cache_skips_results_of_an_older_generation():
+    cache = SearchResultCache()
+    pagination = Pagination(limit=10, offset=0)
+    notes = [NoteEntity(note_id=1, title="Zelda", content="Tears of the Kingdom")]
+
+    # the search started before the write
+    key = cache.key(1, SearchType.FUZZY, "zelda", pagination)
+    cache.invalidate_user(1)
+    cache.set(key, notes)
+
+    assert cache.get(key) is None
+    assert cache.get(cache.key(1, SearchType.FUZZY, "zelda", pagination)) is None
+
+
+def test_search_cache_forgets_generations_after_the_ttl():
+    clock = FakeClock()
+    cache = SearchResultCache(ttl=5, clock=clock)
+    pagination = Pagination(limit=10, offset=0)
+    notes = [NoteEntity(note_id=1, title="Zelda", content="Tears of the Kingdom")]
+
+    cache.set(cache.key(1, SearchType.FUZZY, "zelda", pagination), notes)
+    cache.invalidate_user(1)
+    cache.set(cache.key(1, SearchType.FUZZY, "zelda", pagination), notes)
+    assert cache.tracked_users == 1
+
+    clock.now = 5
+    cache.invalidate_user(2)
+    assert cache.tracked_users == 1
+    # neither the result of generation 0 nor of the forgotten generation is reachable
+    assert cache.get(cache.key(1, SearchType.FUZZY, "zelda", pagination)) is None
+
+
+async def test_cache_metrics_are_served():
+    cache = SearchResultCache()
+    pagination = Pagination(limit=10, offset=0)
+    cache.get(cache.key(1, SearchType.FUZZY, "zelda", pagination))
+    providers = {"search": cache.stats}
+
+    metrics = render_cache_metrics(providers)
+    assert 'wersu_cache_misses_total{cache="search"} 1' in metrics
+    assert 'wersu_cache_hit_ratio{cache="search"} 0.0' in metrics
+
+    server = await serve_metrics(providers, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    response = (await reader.read()).decode()
+    writer.close()
+    server.close()
+    await server.wait_closed()
+
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert response.endswith(metrics)
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from src.ai.embedding_generator import EmbeddingGenerator, EmbeddingGeneratorABC, Models
+from src.db.repos.note.search_planner import SearchPlanner
+from src.db.repos.note.search_strategy import SearchType
+from src.utils import logging_provider
+
+
+class FakeGenerator(EmbeddingGeneratorABC):
+    """Generator with a fixed queue depth and latency"""
+    def __init__(self, pending: int = 0, latency: float = 0.0):
+        self._pending = pending
+        self._latency = latency
+
+    def generate(self, text: str):
+        return np.zeros(3, dtype=np.float32)
+
+    @property
+    def model_name(self) -> str:
+        return "fake"
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def recent_latency(self) -> float:
+        return self._latency
+
+
+def test_auto_uses_query_features():
+    planner = SearchPlanner(FakeGenerator())
+    assert planner.plan(SearchType.AUTO, "   ").search_type == SearchType.NO_SEARCH
+    assert planner.plan(SearchType.AUTO, "zelda").search_type == SearchType.FULL_TEXT_TITLE
+    assert planner.plan(SearchType.AUTO, "games on the switch").search_type == SearchType.CONTEXT
+
+
+def test_requested_type_is_kept():
+    planner = SearchPlanner(FakeGenerator())
+    plan = planner.plan(SearchType.FUZZY, "games on the switch", time_budget=0.001)
+    assert plan.search_type == SearchType.FUZZY
+    assert plan.reason == "requested"
+
+
+def test_context_falls_back_when_over_budget():
+    planner = SearchPlanner(FakeGenerator(pending=3, latency=0.05), vector_query_latency=0.01)
+    # (3 pending + 1) * 50ms + 10ms = 210ms
+    assert planner.plan(SearchType.CONTEXT, "games", time_budget=1.0).search_type == SearchType.CONTEXT
+    plan = planner.plan(SearchType.AUTO, "games on the switch", time_budget=0.2)
+    assert plan.search_type == SearchType.FUZZY
+    assert "210ms" in plan.reason
+
+
+def test_no_deadline_never_falls_back():
+    planner = SearchPlanner(FakeGenerator(pending=100, latency=1.0))
+    assert planner.plan(SearchType.CONTEXT, "games").search_type == SearchType.CONTEXT
+
+
+async def test_pending_counts_encodes_waiting_for_the_worker():
+    generator = EmbeddingGenerator(model_name=Models.MINI_LM_L6_V2, logging_provider=logging_provider)
+    release = threading.Event()
+
+    class BlockingModel:
+        def encode(self, texts):
+            release.wait()
+            return np.zeros((len(texts), 3) if isinstance(texts, list) else 3, dtype=np.float32)
+
+    generator.model = BlockingModel()  # type: ignore[assignment]
+    encodes = [
+        asyncio.create_task(generator.generate_async("games")),
+        asyncio.create_task(generator.generate_many_async(["zelda", "mario"])),
+    ]
+    # the event loop keeps running while the worker is busy
+    await asyncio.sleep(0.01)
+    assert generator.pending == 3
+    release.set()
+    await asyncio.gather(*encodes)
+    assert generator.pending == 0
@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import List
+
+import asyncpg
+import pytest
+
+from src.ai.embedding_generator import EmbeddingGenerator, Models
+from src.api.undefined import UNDEFINED
+from src.db import Database
+from src.db.entities import NoteEntity
+from src.db.repos.note.note import UserContext
+from src.db.repos.note.search_strategy import SearchType
+from src.db.repos.note.sharding import (
+    ID_STRIDE, Shard, ShardedNoteRepoFacade, parse_shards, prepare_shard, rebalance,
+)
+from src.api.types import Pagination
+from src.grpc_mod.converter import to_grpc_note
+from src.utils import logging_provider
+
+# import fixtures, otherise pytest will not detect them
+from .fixtures import create_note_repo_facade, dsn
+
+
+@pytest.fixture
+async def shards(dsn: str):
+    """two databases of the test server as shards"""
+    base, _, _ = dsn.rpartition("/")
+    admin = await asyncpg.connect(dsn)
+    for name in ("shard_a", "shard_b"):
+        if not await admin.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", name):
+            await admin.execute(f"CREATE DATABASE {name}")
+    await admin.close()
+
+    generator = EmbeddingGenerator(model_name=Models.MINI_LM_L6_V2, logging_provider=logging_provider)
+    shards: List[Shard] = []
+    for number, name in enumerate(("shard_a", "shard_b")):
+        db = Database(f"{base}/{name}", logging_provider)
+        await db.init_db()
+        await db.execute("TRUNCATE TABLE note.content RESTART IDENTITY CASCADE")
+        # drop the ID stride of the previous test
+        await db.execute("ALTER SEQUENCE note.content_id_seq INCREMENT BY 1")
+        shard = Shard(name, number, db, create_note_repo_facade(db, generator))
+        await prepare_shard(shard)
+        shards.append(shard)
+    yield shards
+    for shard in shards:
+        await shard.db.close()
+
+
+def _note(author_id: int, title: str) -> NoteEntity:
+    return NoteEntity(
+        note_id=UNDEFINED, author_id=author_id, title=title, content=f"{title} content",
+        updated_at=datetime.now(), embeddings=[], permissions=[],
+    )
+
+
+async def _count(shard: Shard, author_id: int) -> int:
+    record = await shard.db.fetchrow("SELECT count(*) AS notes FROM note.content WHERE author_id = $1", author_id)
+    return record["notes"]
+
+
+def test_parse_shards():
+    assert parse_shards("a=postgres://x/db?sslmode=disable, b=postgres://y/db") == [
+        ("a", "postgres://x/db?sslmode=disable"), ("b", "postgres://y/db")
+    ]
+    with pytest.raises(ValueError):
+        parse_shards("postgres://x/db")
+
+
+async def test_notes_are_routed_to_the_shard_of_the_author(shards: List[Shard]):
+    repo = ShardedNoteRepoFacade(shards)
+    authors = range(1, 11)
+    notes = {author_id: await repo.insert(_note(author_id, f"note of {author_id}")) for author_id in authors}
+
+    # both shards are used, and every author is on exactly one
+    assert {repo.shard_for(author_id).name for author_id in authors} == {"shard_a", "shard_b"}
+    for author_id, note in notes.items():
+        home = repo.shard_for(author_id)
+        assert note.note_id % ID_STRIDE == home.number
+        assert [await _count(shard, author_id) for shard in shards] == [int(shard is home) for shard in shards]
+
+    # author scoped search on one shard
+    found = await repo.search_notes(SearchType.NO_SEARCH, "", UserContext(user_id=3), Pagination(limit=10, offset=0))
+    assert [note.note_id for note in found] == [notes[3].note_id]
+
+    # lookups by ID also find notes on the shards of other users
+    other = next(author_id for author_id in authors if repo.shard_for(author_id) is not repo.shard_for(1))
+    note = await repo.select_by_id(notes[other].note_id, UserContext(user_id=1))
+    assert note is not None and note.title == f"note of {other}"
+    selected = await repo.select_by_ids([notes[1].note_id, notes[other].note_id, -1], UserContext(user_id=1))
+    assert [note.author_id if note else None for note in selected] == [1, other, None]
+    with pytest.raises(RuntimeError):
+        await repo.select_by_id(-1, UserContext(user_id=1))
+
+
+async def test_rebalance_moves_authors_with_their_rows(shards: List[Shard]):
+    repo = ShardedNoteRepoFacade(shards)
+    author_id = next(author_id for author_id in range(1, 100) if repo.shard_for(author_id).name == "shard_b")
+    shard_a, shard_b = shards
+    # written while only shard_a existed
+    for title in ("first", "second", "third"):
+        await shard_a.repo.insert(_note(author_id, title))  # type: ignore[union-attr]
+    embeddings = await shard_a.db.fetchrow("SELECT count(*) AS n FROM note.embedding")
+
+    assert await rebalance(shards) == {author_id: "shard_b"}
+    assert await _count(shard_a, author_id) == 0
+    assert await _count(shard_b, author_id) == 3
+    assert (await shard_b.db.fetchrow("SELECT count(*) AS n FROM note.embedding"))["n"] == embeddings["n"]
+    assert (await shard_b.db.fetchrow("SELECT count(*) AS n FROM note.neighbour"))["n"] > 0
+
+    found = await repo.search_notes(
+        SearchType.NO_SEARCH, "", UserContext(user_id=author_id), Pagination(limit=10, offset=0)
+    )
+    assert sorted(note.title for note in found) == ["first", "second", "third"]
+    assert await rebalance(shards) == {}
+
+
+async def test_prepare_shard_checks_the_note_id_headroom(shards: List[Shard]):
+    shard = shards[0]
+    await shard.db.execute("ALTER SEQUENCE note.content_id_seq AS integer")
+    with pytest.raises(RuntimeError, match="0004_note_id_bigint"):
+        await prepare_shard(shard)
+    await shard.db.execute("ALTER SEQUENCE note.content_id_seq AS bigint")
+
+    # IDs above 32 bit are stored and sent to clients
+    await shard.db.execute(f"SELECT setval('note.content_id_seq', {2**62 + shard.number}, false)")
+    note = await shard.repo.insert(_note(1, "late note"))  # type: ignore[union-attr]
+    assert note.note_id == 2**62 + shard.number
+    assert to_grpc_note(note).id == note.note_id
+    assert await prepare_shard(shard) == (2**63 - 1 - note.note_id) // ID_STRIDE
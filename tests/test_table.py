@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.db.repos import Database
+from src.db.columnar import ResultFormat, parse_vectors
+from src.db.predicate import After, In, IsNull, Range
+from src.db.table import Table, _select_sql
+from src.utils import logging_provider
+
+# import fixtures, otherise pytest will not detect them
+from .fixtures import db, dsn
+
+
+def users_table(db: Database) -> Table:
+    return Table(db=db, logging_provider=logging_provider, table_name="users", id_fields=["discord_id"])
+
+
+def user_rows(amount: int, start: int = 1):
+    return [
+        {"discord_id": i, "avatar": "", "username": f"user {i}", "email": f"{i}@example.com"}
+        for i in range(start, start + amount)
+    ]
+
+
+async def test_insert_many_records_and_dataframe(db: Database):
+    table = users_table(db)
+    inserted = await table.insert_many(user_rows(3), returning="discord_id, username")
+    assert [(r["discord_id"], r["username"]) for r in inserted] == [(1, "user 1"), (2, "user 2"), (3, "user 3")]
+
+    # without returning -> COPY
+    assert await table.insert_many(pd.DataFrame(user_rows(2, start=4)), returning="") == []
+    count = await db.fetchrow("SELECT count(*) AS n FROM users")
+    assert count["n"] == 5
+
+
+def test_rows_need_same_columns():
+    rows = user_rows(2)
+    del rows[1]["email"]
+    with pytest.raises(ValueError):
+        Table._to_rows(rows)
+
+
+def test_dataframe_rows_use_none_for_missing_values():
+    columns, rows = Table._to_rows(pd.DataFrame({"a": [1, None], "b": ["x", None]}))
+    assert columns == ["a", "b"]
+    assert rows == [(1.0, "x"), (None, None)]
+
+
+async def test_upsert_many_updates_existing(db: Database):
+    table = users_table(db)
+    await table.insert_many(user_rows(2))
+    rows = user_rows(3)
+    for row in rows:
+        row["username"] = "renamed"
+    upserted = await table.upsert_many(rows, returning="discord_id")
+    assert len(upserted) == 3
+    records = await db.fetch("SELECT username FROM users")
+    assert {r["username"] for r in records} == {"renamed"}
+
+
+async def test_select_and_delete_many_by_composite_key(db: Database):
+    table = users_table(db)
+    await table.insert_many(user_rows(4))
+    keys = [{"discord_id": 1, "username": "user 1"}, {"discord_id": 3, "username": "user 3"}, {"discord_id": 2, "username": "wrong"}]
+
+    selected = await table.select_many(keys, select="discord_id", order_by="discord_id")
+    assert [r["discord_id"] for r in selected] == [1, 3]
+
+    deleted = await table.delete_many(pd.DataFrame(keys), returning="discord_id")
+    assert sorted(r["discord_id"] for r in deleted) == [1, 3]
+    remaining = await db.fetch("SELECT discord_id FROM users ORDER BY discord_id")
+    assert [r["discord_id"] for r in remaining] == [2, 4]
+
+
+async def test_single_row_methods_accept_multi_row_dataframes(db: Database):
+    table = users_table(db)
+    await table.insert(pd.DataFrame(user_rows(3)))
+    selected = await table.select(pd.DataFrame({"discord_id": [1, 2]}), select="discord_id")
+    assert sorted(r["discord_id"] for r in selected) == [1, 2]
+    await table.delete(pd.DataFrame({"discord_id": [1, 2]}))
+    remaining = await db.fetch("SELECT discord_id FROM users")
+    assert [r["discord_id"] for r in remaining] == [3]
+
+
+async def test_insert_many_extension_type(db: Database):
+    """vector columns are sent as text and cast in the statement"""
+    user = await db.fetchrow("INSERT INTO users (discord_id, avatar, username, email) VALUES (1, '', 'u', '') RETURNING id")
+    note = await db.fetchrow("INSERT INTO note.content (title, content, updated_at, author_id) VALUES ('t', 'c', now(), $1) RETURNING id", user["id"])
+    table = Table(db=db, logging_provider=logging_provider, table_name="note.embedding", id_fields=["note_id", "model"])
+    rows = [{"note_id": note["id"], "model": f"m{i}", "embedding": str([float(i)] * 384)} for i in range(2)]
+    inserted = await table.insert_many(rows, returning="model")
+    assert sorted(r["model"] for r in inserted) == ["m0", "m1"]
+
+
+def test_where_statement_numbering():
+    assert Table.create_where_statement(["id", "status"]) == "id=$1 AND status=$2"
+    assert Table.create_where_statement(["email"], dollar_start=3) == "email=$3"
+
+
+async def test_update_numbers_set_before_where(db: Database):
+    table = users_table(db)
+    await table.insert_many(user_rows(2))
+    updated = await table.update(
+        set={"username": "renamed", "email": "new@example.com"},
+        where={"discord_id": 2, "avatar": ""},
+        returning="discord_id, username, email",
+    )
+    assert (updated["discord_id"], updated["username"], updated["email"]) == (2, "renamed", "new@example.com")
+
+
+async def test_statements_are_compiled_once_per_shape(db: Database):
+    table = users_table(db)
+    await table.insert_many(user_rows(3))
+    _select_sql.cache_clear()
+    for discord_id in (1, 2, 3):
+        assert await table.select({"discord_id": discord_id}, select="username")
+    await table.select({"discord_id": 1, "username": "user 1"}, select="username")
+    info = _select_sql.cache_info()
+    assert (info.misses, info.hits) == (2, 2)
+
+
+async def test_predicates_with_select_update_delete(db: Database):
+    table = users_table(db)
+    await table.insert_many(user_rows(6))
+
+    selected = await table.select(In("discord_id", [1, 2, 3, 4]) & Range("discord_id", lower=2), select="discord_id", order_by="discord_id")
+    assert [r["discord_id"] for r in selected] == [2, 3, 4]
+
+    # keyset pagination
+    page = await table.select(After(("discord_id",), (0,)), select="discord_id", order_by="discord_id", limit=4)
+    assert [r["discord_id"] for r in page] == [1, 2, 3, 4]
+    after = After(("discord_id",), (page[-1]["discord_id"],))
+    page = await table.select(after, select="discord_id", order_by=after.order_by, limit=4)
+    assert [r["discord_id"] for r in page] == [5, 6]
+
+    updated = await table.update(set={"avatar": "changed"}, where=In("discord_id", [5, 6]) & IsNull("discriminator"), returning="discord_id")
+    assert updated["discord_id"] in (5, 6)
+    assert len(await table.select({"avatar": "changed"})) == 2
+
+    deleted = await table.delete(Range("discord_id", upper=3))
+    assert sorted(r["discord_id"] for r in deleted) == [1, 2]
+
+
+async def test_numpy_result_format(db: Database):
+    user = await db.fetchrow("INSERT INTO users (discord_id, avatar, username, email) VALUES (1, '', 'u', '') RETURNING id")
+    note = await db.fetchrow("INSERT INTO note.content (title, content, updated_at, author_id) VALUES ('t', 'c', now(), $1) RETURNING id", user["id"])
+    table = Table(db=db, logging_provider=logging_provider, table_name="note.embedding", id_fields=["note_id", "model"])
+    await table.insert_many(
+        [{"note_id": note["id"], "model": f"m{i}", "embedding": str([float(i)] * 384)} for i in range(3)]
+    )
+
+    table.return_as(ResultFormat.NUMPY)
+    columns = await table.select({"note_id": note["id"]}, select="note_id, model, embedding", order_by="model")
+    assert columns["note_id"].dtype == np.int64
+    assert list(columns["model"]) == ["m0", "m1", "m2"]
+    assert columns["embedding"].dtype == np.float32
+    assert columns["embedding"].shape == (3, 384)
+    assert np.all(columns["embedding"][2] == 2.0)
+
+    assert await table.select({"note_id": -1}) == {}
+
+    table.return_as_dataframe(True)
+    frame = await table.select({"note_id": note["id"]}, select="model")
+    assert isinstance(frame, pd.DataFrame) and len(frame) == 3
+
+
+def test_parse_vectors_with_nulls():
+    matrix = parse_vectors(["[1,2]", None, "[3,4]"])
+    assert matrix.shape == (3, 2)
+    assert np.isnan(matrix[1]).all()
+    assert matrix[2].tolist() == [3.0, 4.0]
+    with pytest.raises(ValueError):
+        parse_vectors(["[1,2]", "[1,2,3]"])
+    # same amount of numbers in total, but not per vector
+    with pytest.raises(ValueError, match="different dimensions"):
+        parse_vectors(["[1,2,3]", "[4,5,6,7]", "[8,9]"])
+
+
+def test_parse_vectors_rejects_malformed_values():
+    with pytest.raises(ValueError, match="Not a vector"):
+        parse_vectors(["[1,2]", "3,4"])
+    with pytest.raises(ValueError):
+        parse_vectors(["[1,2]", "[3,x]"])
+    assert parse_vectors(["[1e-3,-2.5]"]).tolist() == [[np.float32(1e-3), -2.5]]
+
+
+async def test_iter_select_batches(db: Database):
+    table = users_table(db)
+    await table.insert_many(user_rows(7))
+    batches = [
+        [r["discord_id"] for r in batch]
+        async for batch in table.iter_select(Range("discord_id", lower=2), batch_size=3, order_by="discord_id", select="discord_id")
+    ]
+    assert batches == [[2, 3, 4], [5, 6, 7]]
+
+    table.return_as(ResultFormat.NUMPY)
+    sizes = [len(batch["discord_id"]) async for batch in table.iter_select(batch_size=5)]
+    assert sizes == [5, 2]
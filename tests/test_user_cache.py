@@ -0,0 +1,48 @@
+from src.db.entities.user.user import UserEntity
+from src.db.repos.user.user_cache import UserCache
+
+
+def create_user(user_id: int = 1, discord_id: int = 100) -> UserEntity:
+    return UserEntity(id=user_id, discord_id=discord_id, avatar="avatar", username="name", email="mail")
+
+
+def test_user_is_found_by_both_keys():
+    cache = UserCache()
+    cache.set(create_user())
+    assert cache.get(1) == create_user()
+    assert cache.get_by_discord_id(100) == create_user()
+    assert cache.get(2) is None
+    assert cache.get_by_discord_id(200) is None
+
+
+def test_changed_discord_id_drops_old_mapping():
+    cache = UserCache()
+    cache.set(create_user(discord_id=100))
+    cache.set(create_user(discord_id=101))
+    assert cache.get_by_discord_id(100) is None
+    assert cache.get_by_discord_id(101) == create_user(discord_id=101)
+
+
+def test_invalidate_drops_both_keys():
+    cache = UserCache()
+    cache.set(create_user())
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    assert cache.get_by_discord_id(100) is None
+
+
+def test_load_older_than_invalidation_is_not_stored():
+    cache = UserCache()
+    generation = cache.generation
+    cache.invalidate(1)
+    cache.set(create_user(), generation)
+    assert cache.get(1) is None
+
+
+def test_returned_users_are_copies():
+    cache = UserCache()
+    cache.set(create_user())
+    user = cache.get(1)
+    assert user
+    user.avatar = "changed"
+    assert cache.get(1) == create_user()
@@ -1,3 +1,4 @@
+import asyncio
 from dataclasses import replace
 from datetime import datetime
 from typing import AsyncGenerator, Optional
@@ -9,6 +10,7 @@ from src.db.repos.note.note import NoteRepoFacadeABC, UserContext
 from src.db.repos.user.user import UserRepoABC
 import src.api
 from src.db.repos import UserPostgresRepo, Database
+from src.db.repos.user.user_cache import UserCache
 from src.utils import logging_provider
 
 # import fixtures, otherise pytest will not detect them
@@ -60,4 +62,39 @@ async def test_create_user_with_note_and_delete(user_repo: UserRepoABC, note_rep
     assert ret_user is None 
 
     with pytest.raises(RuntimeError, match="not found"):
-        ret_note = await note_repo_facade.select_by_id(note.note_id, ctx=ctx)
\ No newline at end of file
+        ret_note = await note_repo_facade.select_by_id(note.note_id, ctx=ctx)
+
+
+async def test_concurrent_user_selects(user_repo: UserRepoABC, test_user: UserEntity):
+    """Concurrent selects are answered by one batch, unknown IDs return None"""
+    user = await user_repo.insert(test_user)
+    assert user.id
+    selected = await asyncio.gather(user_repo.select(user.id), user_repo.select(user.id + 1))
+    assert selected == [user, None]
+
+
+async def test_cached_user_repo(db: Database, test_user: UserEntity):
+    """Users are written through on insert and upsert, and served from the cache afterwards"""
+    repo = UserPostgresRepo(db, cache=UserCache())
+    user = await repo.insert(test_user)
+    assert user.id
+
+    # remove the row behind the back of the repo; the cache still knows the user
+    await db.execute("DELETE FROM users")
+    assert await repo.select(user.id) == user
+    assert await repo.select_by_discord_id(user.discord_id) == user
+
+    # upsert writes through with the returned id
+    upserted = await repo.upsert(replace(test_user, id=None, avatar="http://somewhere"))
+    assert isinstance(upserted.id, int)
+    assert await repo.select_by_discord_id(user.discord_id) == upserted
+
+    await repo.delete(upserted.id)
+    assert await repo.select(upserted.id) is None
+
+
+async def test_select_users_by_discord_ids(user_repo: UserRepoABC, test_user: UserEntity):
+    """Users are resolved by discord_id in request order, unknown discord_ids return None"""
+    user = await user_repo.insert(test_user)
+    selected = await user_repo.select_many_by_discord_ids([123, user.discord_id])
+    assert selected == [None, user]
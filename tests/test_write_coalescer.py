@@ -0,0 +1,90 @@
+import asyncio
+import contextvars
+from typing import List
+
+import pytest
+
+from src.utils import WriteCoalescer
+
+caller: contextvars.ContextVar[str] = contextvars.ContextVar("caller", default="")
+
+
+class Sink:
+    """records the batches and single writes it was asked for; negative items fail"""
+    def __init__(self):
+        self.batches: List[List[int]] = []
+        self.singles: List[int] = []
+        self.contexts: List[str] = []
+
+    async def write_many(self, items: List[int]) -> List[str]:
+        self.batches.append(items)
+        self.contexts.append(caller.get())
+        if any(item < 0 for item in items):
+            raise ValueError("negative item")
+        return [f"written {item}" for item in items]
+
+    async def write_one(self, item: int) -> str:
+        self.singles.append(item)
+        if item < 0:
+            raise ValueError(f"negative item {item}")
+        return f"written {item}"
+
+
+async def test_writes_of_one_window_are_one_batch():
+    sink = Sink()
+    coalescer = WriteCoalescer(sink.write_many, sink.write_one, window=0.01)
+
+    async def write(item: int) -> str:
+        caller.set(f"caller {item}")
+        return await coalescer.write(item)
+
+    assert await asyncio.gather(*(write(item) for item in (1, 2, 3))) == ["written 1", "written 2", "written 3"]
+    assert sink.batches == [[1, 2, 3]]
+    # the batch does not run with the context variables of a caller
+    assert sink.contexts == [""]
+    assert await coalescer.write(4) == "written 4"
+    assert sink.batches == [[1, 2, 3], [4]]
+
+
+async def test_full_batches_are_written_before_the_window_ends():
+    sink = Sink()
+    coalescer = WriteCoalescer(sink.write_many, sink.write_one, window=60, max_batch_size=2)
+
+    results = await asyncio.wait_for(asyncio.gather(*(coalescer.write(item) for item in range(4))), timeout=1)
+    assert results == [f"written {item}" for item in range(4)]
+    assert sink.batches == [[0, 1], [2, 3]]
+
+
+async def test_failed_batch_fails_only_the_bad_item():
+    sink = Sink()
+    coalescer = WriteCoalescer(sink.write_many, sink.write_one, window=0.01)
+
+    results = await asyncio.gather(*(coalescer.write(item) for item in (1, -2, 3)), return_exceptions=True)
+    assert results[0] == "written 1" and results[2] == "written 3"
+    assert isinstance(results[1], ValueError) and "-2" in str(results[1])
+    assert sink.singles == [1, -2, 3]
+    assert coalescer.fallbacks == 1
+
+
+async def test_failed_single_write_is_not_retried():
+    sink = Sink()
+    coalescer = WriteCoalescer(sink.write_many, sink.write_one, window=0)
+
+    with pytest.raises(ValueError, match="negative item"):
+        await coalescer.write(-1)
+    assert sink.singles == []
+
+
+async def test_cancelled_caller_does_not_cancel_the_write():
+    sink = Sink()
+    coalescer = WriteCoalescer(sink.write_many, sink.write_one, window=0.01)
+
+    cancelled = asyncio.create_task(coalescer.write(1))
+    waiting = asyncio.create_task(coalescer.write(2))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiting == "written 2"
+    assert sink.batches == [[1, 2]]
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled